@@ -0,0 +1,76 @@
+"""
+基准测试：analyze_many 在线程池下的扩展曲线
+
+在自由线程（无GIL）的 CPython 3.13+ 上吞吐量应随线程数近线性增长；
+常规 CPython 受GIL限制，曲线基本持平，可作为对照。
+
+用法: python benchmarks/analyze_scaling.py [--count 4000] [--threads 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import sysconfig
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.calculator import BaZiCalculator
+from analysis.analyzer import ANALYZE_CHUNK_SIZE, BaZiAnalyzer
+
+
+def build_charts(count: int):
+    """基准语料：从1950年起每隔37小时取一个出生时间"""
+    calculator = BaZiCalculator()
+    start = datetime(1950, 1, 1)
+    return [calculator.calculate_bazi_from_datetime(start + timedelta(hours=37 * i)) for i in range(count)]
+
+
+def gil_status() -> str:
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        return "常规构建（有GIL）"
+    enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return "自由线程构建，GIL" + ("已重新启用" if enabled else "已关闭")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="analyze_many 扩展性基准测试")
+    parser.add_argument("--count", type=int, default=4000, help="命盘数")
+    parser.add_argument("--threads", default="1,2,4,8", help="线程数列表，逗号分隔")
+    parser.add_argument("--chunk-size", type=int, default=ANALYZE_CHUNK_SIZE, help="每个任务的命盘数")
+    parser.add_argument("--repeat", type=int, default=3, help="每档重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    charts = build_charts(args.count)
+    analyzer = BaZiAnalyzer()
+    # 预热：加载数据表并触发各类缓存
+    analyzer.analyze_many(charts[:ANALYZE_CHUNK_SIZE])
+
+    print(f"Python {sys.version.split()[0]}，{gil_status()}，CPU {os.cpu_count()} 核")
+    print(f"命盘 {len(charts)} 个，每块 {args.chunk_size} 个")
+    print("线程数\t耗时(秒)\t吞吐(个/秒)\t加速比\t并行效率")
+
+    baseline = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        analyzer.analyze_many(charts)
+        baseline = min(baseline, time.perf_counter() - started)
+    print(f"顺序\t{baseline:.3f}\t{len(charts) / baseline:,.0f}\t1.00x\t-")
+
+    for threads in [int(value) for value in args.threads.split(",")]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                started = time.perf_counter()
+                analyzer.analyze_many(charts, executor, args.chunk_size)
+                best = min(best, time.perf_counter() - started)
+        speedup = baseline / best
+        print(f"{threads}\t{best:.3f}\t{len(charts) / best:,.0f}\t{speedup:.2f}x\t{speedup / threads:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+基准测试：紧凑扁平序列化 vs pydantic model_dump_json / model_validate_json
+
+用法: python benchmarks/serialization.py [--count 2000]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.calculator import BaZiCalculator
+from analysis.analyzer import BaZiAnalyzer
+from core.models import AnalysisResult
+from utils.serializer import dumps_result, loads_result
+
+
+def build_corpus(count: int):
+    """基准语料：从1950年起每隔37小时取一个出生时间"""
+    calculator = BaZiCalculator()
+    analyzer = BaZiAnalyzer()
+    start = datetime(1950, 1, 1)
+    return [
+        analyzer.analyze_chart(calculator.calculate_bazi_from_datetime(start + timedelta(hours=37 * i)))
+        for i in range(count)
+    ]
+
+
+def measure(func, items, repeat: int = 5) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def compare(baseline, baseline_items, fast, fast_items, repeat: int = 7):
+    """两种实现交替运行、各取最短耗时（秒），减小机器负载波动对比值的影响"""
+    baseline_best = fast_best = float("inf")
+    for _ in range(repeat):
+        baseline_best = min(baseline_best, measure(baseline, baseline_items, 1))
+        fast_best = min(fast_best, measure(fast, fast_items, 1))
+    return baseline_best, fast_best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="序列化基准测试")
+    parser.add_argument("--count", type=int, default=2000, help="语料条数")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count)
+    pydantic_blobs = [result.model_dump_json().encode("utf-8") for result in corpus]
+    flat_blobs = [dumps_result(result) for result in corpus]
+
+    rows = [
+        ("序列化", *compare(lambda r: r.model_dump_json(), corpus, dumps_result, corpus)),
+        ("反序列化", *compare(AnalysisResult.model_validate_json, pydantic_blobs, loads_result, flat_blobs)),
+    ]
+
+    print(f"语料: {len(corpus)} 条分析结果")
+    print(f"平均大小: pydantic {sum(map(len, pydantic_blobs)) / len(corpus):.0f} 字节, "
+          f"扁平 {sum(map(len, flat_blobs)) / len(corpus):.0f} 字节")
+    for name, baseline, fast in rows:
+        print(f"{name}: pydantic {baseline / len(corpus) * 1e6:.1f} us/条, "
+              f"扁平 {fast / len(corpus) * 1e6:.1f} us/条, 加速 {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+基准测试：进程池子进程各自构建查表 vs 挂载父进程的共享内存表
+
+每个子进程做一次排盘与分析（触发查表的首次构建或取用共享数组）后报告：
+从建池到该进程就绪的时间、RSS 与私有内存（Linux 下读 /proc/self/smaps_rollup）。
+默认用 spawn 启动子进程；fork 时子进程直接继承父进程已构建的表，两种模式无差别。
+
+用法: python benchmarks/shared_tables.py [--workers 4] [--start-method spawn]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.shared import SharedTables, init_worker
+
+# 就绪后停留的秒数，使每个子进程恰好领到一个探测任务
+HOLD_SECONDS = 1.0
+
+
+def memory_kb() -> Dict[str, int]:
+    """本进程的 Rss、Pss 与私有内存（KB）；非 Linux 时只有峰值 RSS"""
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in smaps if line.endswith("kB\n")}
+        return {
+            "rss": fields["Rss"],
+            "pss": fields["Pss"],
+            "private": fields["Private_Clean"] + fields["Private_Dirty"],
+        }
+    except OSError:
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pss": 0, "private": 0}
+
+
+def probe(_) -> Tuple[int, float, Dict[str, int]]:
+    """子进程任务：排盘并分析一次，返回进程号、就绪时刻与内存"""
+    from analysis.analyzer import BaZiAnalyzer
+    from core.calculator import BaZiCalculator
+
+    chart = BaZiCalculator().calculate_bazi_from_datetime(datetime(1990, 5, 15, 10))
+    BaZiAnalyzer().analyze_chart(chart)
+    ready = time.time()
+    memory = memory_kb()
+    time.sleep(HOLD_SECONDS)
+    return os.getpid(), ready, memory
+
+
+def run_pool(workers: int, start_method: str, spec=None) -> List[Tuple[int, float, Dict[str, int]]]:
+    """建池并让每个子进程跑一次探测，返回各子进程的（进程号、就绪耗时、内存）"""
+    context = multiprocessing.get_context(start_method)
+    initializer, initargs = (init_worker, (spec,)) if spec is not None else (None, ())
+    started = time.time()
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=initializer, initargs=initargs) as executor:
+        results = list(executor.map(probe, range(workers)))
+    return [(pid, ready - started, memory) for pid, ready, memory in results]
+
+
+def summarize(label: str, results: List[Tuple[int, float, Dict[str, int]]]):
+    count = len({pid for pid, _, _ in results})
+    last_ready = max(elapsed for _, elapsed, _ in results)
+    average = {key: sum(memory[key] for _, _, memory in results) / len(results) for key in ("rss", "pss", "private")}
+    print(
+        f"{label}\t{count}\t{last_ready * 1000:.0f}\t"
+        f"{average['rss'] / 1024:.1f}\t{average['pss'] / 1024:.1f}\t{average['private'] / 1024:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共享内存查表基准测试")
+    parser.add_argument("--workers", type=int, default=4, help="子进程数")
+    parser.add_argument("--start-method", default="spawn", help="子进程启动方式（spawn / forkserver / fork）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式的重复次数")
+    args = parser.parse_args()
+
+    with SharedTables.create() as tables:
+        size = sum(array.nbytes for array in tables.arrays.values())
+        print(f"共享表 {len(tables.arrays)} 个数组，共 {size / 1024:.1f} KB；启动方式 {args.start_method}")
+        print("模式\t进程数\t全部就绪(ms)\tRSS(MB)\tPSS(MB)\t私有(MB)")
+        for _ in range(args.repeat):
+            summarize("各自构建", run_pool(args.workers, args.start_method))
+            summarize("共享内存", run_pool(args.workers, args.start_method, tables.spec))
+
+
+if __name__ == "__main__":
+    main()
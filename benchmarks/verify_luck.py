@@ -0,0 +1,70 @@
+"""
+差分校验：大运（BaZiCalculator.calculate_luck_pillars）对照 lunar_python 的 getYun().getDaYun()
+
+随机取出生时刻与性别，逐步比较大运干支与起止年份；不一致的样本列出出生时刻与两边的结果。
+
+用法: python benchmarks/verify_luck.py [--samples 2000] [--seed 0]
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.calculator import BaZiCalculator
+
+# 取样范围
+START = datetime(1801, 1, 1)
+END = datetime(2150, 1, 1)
+# 比较的大运步数
+STEPS = 8
+
+
+def reference_luck(birth: datetime, is_male: bool):
+    """lunar_python 的大运：[(干支, 起始年, 结束年)]"""
+    from lunar_python import Solar
+
+    lunar = Solar.fromYmdHms(
+        birth.year, birth.month, birth.day, birth.hour, birth.minute, birth.second
+    ).getLunar()
+    # 第0步为起运前的童限，从第1步起为大运
+    da_yun = lunar.getEightChar().getYun(1 if is_male else 0).getDaYun(STEPS + 1)[1:]
+    return [(luck.getGanZhi(), luck.getStartYear(), luck.getEndYear()) for luck in da_yun]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大运与 lunar_python 的差分校验")
+    parser.add_argument("--samples", type=int, default=2000, help="样本数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--limit", type=int, default=20, help="最多列出的不一致样本数")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    calculator = BaZiCalculator()
+    span = int((END - START).total_seconds())
+    mismatches = 0
+    for _ in range(args.samples):
+        birth = START + timedelta(seconds=rng.randrange(span))
+        is_male = rng.random() < 0.5
+        chart = calculator.calculate_bazi_from_datetime(birth, is_male)
+        actual = [
+            (luck.gan_zhi.name, luck.start_year, luck.end_year)
+            for luck in calculator.calculate_luck_pillars(chart, STEPS)
+        ]
+        expected = reference_luck(birth, is_male)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= args.limit:
+                print(f"  {birth.isoformat()} {'男' if is_male else '女'}  期望{expected[0]} 实得{actual[0]}")
+
+    print(f"样本 {args.samples} 个，不一致 {mismatches} 个")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+差分校验：向量化四柱（SolarTermTable.pillars_at）对照 lunar_python，逐柱比较
+
+取样：
+  1. 每个时辰一点（偶数整点，即各时辰正中）
+  2. 每个节交接时刻前后（-1小时、-1分、-1秒、0、+1秒、+1分、+1小时）
+  3. 每日子时交界（22:59:59、23:00:00、23:59:59，00:00:00 已含于第1类）
+
+参照路径按时间顺序分块交给多个进程计算；不一致的样本按（柱、期望、实得）分组，
+每组给出最早的时刻，并在其与前一个一致样本之间二分出首个出错的秒。
+
+用法: python benchmarks/verify_pillars.py [--start-year 1800] [--end-year 2200] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.calendar import SECONDS_PER_DAY, SOLAR_TERMS, from_seconds, to_seconds
+from core.tables import GANZHI_INDEX, GANZHI_NAMES, PILLAR_NAMES
+
+# 节交接时刻附近的取样偏移（秒）
+TERM_OFFSETS = [-3600, -60, -1, 0, 1, 60, 3600]
+# 子时交界的取样时刻（当日秒数）
+MIDNIGHT_OFFSETS = [22 * 3600 + 3599, 23 * 3600, 24 * 3600 - 1]
+# 每块样本数：块内按时间连续，参照库的年度缓存可以复用
+CHUNK_SIZE = 4096
+
+
+def build_samples(start_year: int, end_year: int) -> np.ndarray:
+    """[start_year, end_year] 内全部取样时刻（东八区秒序，已排序去重）"""
+    first = to_seconds(datetime(start_year, 1, 1))
+    last = to_seconds(datetime(end_year + 1, 1, 1))
+    days = np.arange(first // SECONDS_PER_DAY, last // SECONDS_PER_DAY, dtype=np.int64)
+
+    slots = (days[:, None] * SECONDS_PER_DAY + np.arange(0, 24, 2) * 3600).ravel()
+    midnights = (days[:, None] * SECONDS_PER_DAY + np.array(MIDNIGHT_OFFSETS)).ravel()
+    jie = SOLAR_TERMS.jie_seconds
+    terms = (jie[(jie >= first) & (jie < last)][:, None] + np.array(TERM_OFFSETS)).ravel()
+
+    samples = np.unique(np.concatenate([slots, midnights, terms]))
+    return samples[(samples >= first) & (samples < last)]
+
+
+def reference_pillar(seconds: int) -> List[int]:
+    """lunar_python 的四柱六十甲子序号"""
+    from lunar_python import Solar
+
+    value = from_seconds(seconds)
+    bazi = Solar.fromYmdHms(
+        value.year, value.month, value.day, value.hour, value.minute, value.second
+    ).getLunar().getEightChar()
+    return [
+        GANZHI_INDEX[bazi.getYear()], GANZHI_INDEX[bazi.getMonth()],
+        GANZHI_INDEX[bazi.getDay()], GANZHI_INDEX[bazi.getTime()]
+    ]
+
+
+def reference_chunk(seconds: np.ndarray) -> Tuple[np.ndarray, float]:
+    """子进程任务：一块样本的参照四柱及耗时"""
+    started = time.perf_counter()
+    pillars = np.array([reference_pillar(value) for value in seconds.tolist()], dtype=np.int8)
+    return pillars.reshape(-1, 4), time.perf_counter() - started
+
+
+def fast_pillars(seconds: np.ndarray) -> np.ndarray:
+    return SOLAR_TERMS.pillars_at(seconds).astype(np.int8)
+
+
+def first_mismatch(good: int, bad: int, pillar: int) -> int:
+    """在一致样本 good 与不一致样本 bad 之间二分出该柱首个出错的秒"""
+    while bad - good > 1:
+        middle = (good + bad) // 2
+        if int(fast_pillars(np.array([middle]))[0, pillar]) == reference_pillar(middle)[pillar]:
+            good = middle
+        else:
+            bad = middle
+    return bad
+
+
+def report_mismatches(samples: np.ndarray, fast: np.ndarray, reference: np.ndarray, limit: int) -> int:
+    """按（柱、期望、实得）分组打印不一致样本，返回不一致样本数"""
+    rows, pillars = np.nonzero(fast != reference)
+    if not len(rows):
+        return 0
+
+    groups: Dict[Tuple[int, int, int], List[int]] = {}
+    for row, pillar in zip(rows.tolist(), pillars.tolist()):
+        groups.setdefault((pillar, int(reference[row, pillar]), int(fast[row, pillar])), []).append(row)
+
+    print(f"不一致: {len(np.unique(rows))} 个样本，{len(groups)} 组")
+    for (pillar, expected, actual), group_rows in sorted(groups.items(), key=lambda item: item[1][0])[:limit]:
+        row = group_rows[0]
+        moment = int(samples[row])
+        # 前一个样本该柱一致时，二分出首个出错的秒作为最小复现时刻
+        if row > 0 and fast[row - 1, pillar] == reference[row - 1, pillar]:
+            moment = first_mismatch(int(samples[row - 1]), moment, pillar)
+        print(
+            f"  {PILLAR_NAMES[pillar]}柱 期望{GANZHI_NAMES[expected]} 实得{GANZHI_NAMES[actual]}"
+            f" ×{len(group_rows)}  最小复现: {from_seconds(moment).isoformat()}"
+        )
+    return len(np.unique(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="四柱快速路径与 lunar_python 的差分校验")
+    parser.add_argument("--start-year", type=int, default=SOLAR_TERMS.first_year + 1, help="起始年份")
+    parser.add_argument("--end-year", type=int, default=SOLAR_TERMS.last_year - 1, help="结束年份（含）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="参照路径的进程数")
+    parser.add_argument("--limit", type=int, default=20, help="最多列出的不一致分组数")
+    args = parser.parse_args()
+
+    samples = build_samples(args.start_year, args.end_year)
+    print(f"范围: {args.start_year}-{args.end_year}年，样本 {len(samples)} 个")
+
+    started = time.perf_counter()
+    fast = np.concatenate([
+        fast_pillars(samples[i:i + CHUNK_SIZE]) for i in range(0, len(samples), CHUNK_SIZE)
+    ]) if len(samples) else np.empty((0, 4), dtype=np.int8)
+    fast_elapsed = time.perf_counter() - started
+
+    chunks = [samples[i:i + CHUNK_SIZE] for i in range(0, len(samples), CHUNK_SIZE)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(reference_chunk, chunks))
+    reference_elapsed = time.perf_counter() - started
+    reference = np.concatenate([pillars for pillars, _ in results]) if results else np.empty((0, 4), dtype=np.int8)
+    cpu_seconds = sum(elapsed for _, elapsed in results)
+
+    print(f"快速路径: {len(samples) / max(fast_elapsed, 1e-9):,.0f} 个/秒（单进程）")
+    print(
+        f"lunar_python: {len(samples) / max(reference_elapsed, 1e-9):,.0f} 个/秒（{args.workers} 进程），"
+        f"单进程 {len(samples) / max(cpu_seconds, 1e-9):,.0f} 个/秒"
+    )
+
+    mismatches = report_mismatches(samples, fast, reference, args.limit)
+    if mismatches:
+        sys.exit(1)
+    print("四柱全部一致")
+
+
+if __name__ == "__main__":
+    main()
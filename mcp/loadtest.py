@@ -0,0 +1,316 @@
+"""
+MCP 工具压测：按设定的并发与速率回放请求语料，统计吞吐量与 p50/p95/p99 延迟。
+
+两种目标：
+  inproc  在本进程内直接调用 server.py / sample.py 的工具函数
+  http    通过本机 gradio 服务的 HTTP 接口调用（与 MCP 工具同一组函数）
+
+语料为 JSONL，每行 {"tool": 工具名, "args": {参数名: 值}}；
+不指定语料时按生肖、日期的合成分布生成请求。
+
+用法（在 mcp 目录下运行）:
+  python loadtest.py --app server --target inproc -n 20000 -c 8
+  python loadtest.py --app server --target http --url http://127.0.0.1:7860 --rate 200 -d 30
+  python loadtest.py --app sample --corpus corpus.jsonl --target http --url http://127.0.0.1:7860
+"""
+import argparse
+import http.client
+import importlib
+import itertools
+import json
+import random
+import select
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 十二生肖（与 server.py 一致）
+ZODIACS = ["鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪"]
+
+# 各服务的模块名与工具：工具名 -> (gradio 接口名, 参数顺序)
+APPS = {
+    "server": {
+        "module": "server",
+        "tools": {"fortune_telling": ("fortune_telling", ["zodiac", "date"])},
+    },
+    "sample": {
+        "module": "sample",
+        "tools": {"luner_info": ("predict", ["date"])},
+    },
+}
+
+# 合成请求中不带日期（即查询当日）的比例
+TODAY_RATIO = 0.5
+# 合成日期的范围（距今天数）
+DATE_SPAN_DAYS = 365
+
+# 报告中的分位数
+PERCENTILES = [50, 95, 99]
+
+Request = Tuple[str, Dict[str, Any]]
+
+
+def synthetic_requests(app: str, seed: int = 0) -> Iterator[Request]:
+    """合成请求：生肖均匀分布，日期一半为当日、其余在前后一年内均匀分布"""
+    rng = random.Random(seed)
+    today = date.today()
+    tools = list(APPS[app]["tools"])
+    while True:
+        tool = rng.choice(tools)
+        if rng.random() < TODAY_RATIO:
+            day = today
+        else:
+            day = today + timedelta(days=rng.randint(-DATE_SPAN_DAYS, DATE_SPAN_DAYS))
+        if tool == "fortune_telling":
+            args = {"zodiac": rng.choice(ZODIACS)}
+            if day != today:
+                args["date"] = day.strftime("%Y-%m-%d")
+        else:
+            args = {"date": day.strftime("%Y-%m-%d")}
+        yield tool, args
+
+
+def corpus_requests(path: str) -> Iterator[Request]:
+    """循环回放 JSONL 语料"""
+    with open(path, "r", encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    if not requests:
+        raise ValueError(f"语料为空: {path}")
+    for request in itertools.cycle(requests):
+        yield request["tool"], request.get("args", {})
+
+
+def inproc_caller(app: str) -> Callable[[str, Dict[str, Any]], Any]:
+    """本进程内调用工具函数（需在 mcp 目录下运行，以便模块读取规则文件）"""
+    module = importlib.import_module(APPS[app]["module"])
+    functions = {tool: getattr(module, tool) for tool in APPS[app]["tools"]}
+
+    def call(tool: str, args: Dict[str, Any]) -> Any:
+        return functions[tool](**args)
+    return call
+
+
+class HttpCaller:
+    """经 gradio 的 HTTP 接口调用工具：POST 提交得到 event_id，再读取事件流直到完成
+
+    每个线程一条长连接，避免每次请求重新建连。
+    """
+
+    def __init__(self, app: str, url: str, api_prefix: str = "/gradio_api", timeout: float = 30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.base = parts.path.rstrip("/") + api_prefix
+        self.tools = APPS[app]["tools"]
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and connection.sock is not None:
+            # 空闲的长连接可读，说明服务端已关闭（或发来多余数据），发送前换新连接
+            readable, _, _ = select.select([connection.sock], [], [], 0)
+            if readable:
+                self._drop_connection()
+                connection = None
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return connection
+
+    def _drop_connection(self):
+        self._local.connection.close()
+        self._local.connection = None
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection = self._connection()
+        reused = connection.sock is not None
+        try:
+            connection.request(method, path, body=body, headers=headers)
+        except (http.client.HTTPException, OSError):
+            self._drop_connection()
+            if not reused:
+                raise
+            # 复用的长连接在发送时已被服务端关闭，请求未被处理，换新连接重发一次
+            connection = self._connection()
+            connection.request(method, path, body=body, headers=headers)
+        try:
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            # 请求已发出，服务端可能已经处理（POST 会重复提交），不重试
+            self._drop_connection()
+            raise
+
+    def __call__(self, tool: str, args: Dict[str, Any]) -> Any:
+        api_name, params = self.tools[tool]
+        body = json.dumps({"data": [args.get(name, "") for name in params]}, ensure_ascii=False)
+        status, payload = self._request("POST", f"{self.base}/call/{api_name}", body.encode("utf-8"))
+        if status != 200:
+            raise RuntimeError(f"提交失败: HTTP {status}")
+        event_id = json.loads(payload)["event_id"]
+
+        status, payload = self._request("GET", f"{self.base}/call/{api_name}/{event_id}")
+        if status != 200:
+            raise RuntimeError(f"读取结果失败: HTTP {status}")
+        event = None
+        for line in payload.decode("utf-8").splitlines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event in ("complete", "error"):
+                if event == "error":
+                    raise RuntimeError(f"工具出错: {line[5:].strip()}")
+                return json.loads(line[5:])
+        raise RuntimeError("事件流中没有结果")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩法分位数（输入须已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(len(sorted_values) * p / 100 + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class LoadTest:
+    """多线程压测
+
+    rate 为空时为闭环压测（各线程连续发请求，测最大吞吐）；
+    指定 rate 时为开环压测：第 i 个请求按 start + i / rate 的计划时刻发出，
+    延迟从计划时刻起算，服务变慢造成的排队也计入延迟。
+    """
+
+    def __init__(self, call: Callable[[str, Dict[str, Any]], Any], requests: Iterator[Request],
+                 concurrency: int = 8, rate: Optional[float] = None,
+                 total: Optional[int] = None, duration: Optional[float] = None):
+        if concurrency <= 0:
+            raise ValueError("并发数必须为正数")
+        if rate is not None and rate <= 0:
+            raise ValueError("速率必须为正数")
+        if total is None and duration is None:
+            raise ValueError("请求数与持续时间至少指定一个")
+        self.call = call
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rate = rate
+        self.total = total
+        self.duration = duration
+        self._lock = threading.Lock()
+
+    def _next(self) -> Optional[Tuple[int, Request]]:
+        with self._lock:
+            index = next(self._counter)
+            if self.total is not None and index >= self.total:
+                return None
+            return index, next(self.requests)
+
+    def _worker(self, start: float, deadline: float, results: List[Tuple[str, float, bool]]):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            index, (tool, args) = item
+            if self.rate is not None:
+                scheduled = start + index / self.rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            if scheduled >= deadline:
+                return
+
+            ok = True
+            try:
+                self.call(tool, args)
+            except Exception:
+                ok = False
+            results.append((tool, time.perf_counter() - scheduled, ok))
+
+    def run(self) -> Dict[str, Any]:
+        self._counter = itertools.count()
+        shards: List[List[Tuple[str, float, bool]]] = [[] for _ in range(self.concurrency)]
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration is not None else float("inf")
+        threads = [
+            threading.Thread(target=self._worker, args=(start, deadline, shard), daemon=True)
+            for shard in shards
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return summarize([record for shard in shards for record in shard], elapsed)
+
+
+def summarize(records: List[Tuple[str, float, bool]], elapsed: float) -> Dict[str, Any]:
+    """按工具与总体统计请求数、错误数、吞吐量与延迟分位数（毫秒）"""
+    groups: Dict[str, List[Tuple[str, float, bool]]] = {"全部": records}
+    for record in records:
+        groups.setdefault(record[0], []).append(record)
+
+    report = {"elapsed": round(elapsed, 3), "tools": {}}
+    for name, group in groups.items():
+        latencies = sorted(latency for _, latency, _ in group)
+        entry = {
+            "requests": len(group),
+            "errors": sum(1 for _, _, ok in group if not ok),
+            "throughput": round(len(group) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        for p in PERCENTILES:
+            entry[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 3)
+        entry["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else 0.0
+        report["tools"][name] = entry
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"耗时: {report['elapsed']} 秒")
+    header = ["工具", "请求数", "错误", "吞吐(次/秒)"] + [f"p{p}(ms)" for p in PERCENTILES] + ["最大(ms)"]
+    print("\t".join(header))
+    for name, entry in report["tools"].items():
+        row = [name, entry["requests"], entry["errors"], entry["throughput"]]
+        row += [entry[f"p{p}_ms"] for p in PERCENTILES] + [entry["max_ms"]]
+        print("\t".join(str(value) for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 工具压测（仅限本机）")
+    parser.add_argument("--app", choices=sorted(APPS), default="server", help="被测服务")
+    parser.add_argument("--target", choices=["inproc", "http"], default="inproc", help="调用方式")
+    parser.add_argument("--url", default="http://127.0.0.1:7860", help="gradio 服务地址（http 方式）")
+    parser.add_argument("--api-prefix", default="/gradio_api", help="gradio 接口前缀（gradio 4 为空串）")
+    parser.add_argument("--corpus", help="JSONL 请求语料，缺省时使用合成分布")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="并发线程数")
+    parser.add_argument("--rate", type=float, help="目标速率（次/秒），缺省为闭环压测")
+    parser.add_argument("-n", "--requests", type=int, help="请求总数")
+    parser.add_argument("-d", "--duration", type=float, help="持续时间（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="合成分布的随机种子")
+    parser.add_argument("--json", action="store_true", help="以JSON输出报告")
+    args = parser.parse_args()
+
+    if args.target == "http":
+        host = urlsplit(args.url).hostname
+        if host not in ("127.0.0.1", "localhost", "::1"):
+            parser.error("压测只允许指向本机地址")
+        call = HttpCaller(args.app, args.url, args.api_prefix)
+    else:
+        call = inproc_caller(args.app)
+
+    requests = corpus_requests(args.corpus) if args.corpus else synthetic_requests(args.app, args.seed)
+    total = args.requests if args.requests is not None or args.duration is not None else 1000
+    report = LoadTest(call, requests, args.concurrency, args.rate, total, args.duration).run()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
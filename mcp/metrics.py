@@ -0,0 +1,241 @@
+"""
+MCP 服务的运行指标：按工具统计请求数、错误数、耗时直方图、并发数与缓存命中率，
+以 Prometheus 文本格式经本地 HTTP 路径暴露。
+
+计数在各线程的私有分片中累加，热路径上不加锁；抓取时再汇总各分片。
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 默认的指标端口与路径（仅监听本机，由负载均衡侧的采集器拉取）
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+METRICS_PATH = "/metrics"
+# 覆盖指标端口的环境变量（同一主机上运行多个服务时各自指定）
+METRICS_PORT_ENV = "MCP_METRICS_PORT"
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 指标族：名称 -> (类型, 说明)
+METRIC_FAMILIES = {
+    "mcp_tool_requests_total": ("counter", "工具调用次数"),
+    "mcp_tool_errors_total": ("counter", "工具调用抛出异常的次数"),
+    "mcp_tool_in_flight": ("gauge", "正在执行的工具调用数"),
+    "mcp_tool_latency_seconds": ("histogram", "工具调用耗时（秒）"),
+    "mcp_cache_hits_total": ("counter", "缓存命中次数"),
+    "mcp_cache_misses_total": ("counter", "缓存未命中次数"),
+    "mcp_cache_size": ("gauge", "缓存当前条数"),
+    "mcp_cache_max_size": ("gauge", "缓存容量（无上限时为 -1）"),
+}
+
+# 标签：按 (键, 值) 元组存放，便于作为字典键
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """单个线程私有的计数分片，只有所属线程写入"""
+
+    __slots__ = ("values", "histograms")
+
+    def __init__(self):
+        # (指标名, 标签) -> 数值（计数器与 gauge 的增量）
+        self.values: Dict[Tuple[str, Labels], float] = {}
+        # (指标名, 标签) -> [各桶计数..., +Inf 桶计数, 总和]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metrics:
+    """指标注册表
+
+    inc / observe 只写当前线程的分片；分片在线程首次写入时登记（仅此一步加锁），
+    线程结束后分片仍保留，计数不会丢失。render 汇总全部分片并读取已登记缓存的
+    cache_info，生成 Prometheus 文本。
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        # 缓存名 -> 带 cache_info() 的函数（functools.lru_cache）
+        self._caches: Dict[str, Callable] = {}
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1):
+        """计数器或 gauge 加上 amount（gauge 可传负数）"""
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """直方图记录一个观测值"""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            counts = histograms[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def cache_hit(self, cache: str):
+        self.inc("mcp_cache_hits_total", (("cache", cache),))
+
+    def cache_miss(self, cache: str):
+        self.inc("mcp_cache_misses_total", (("cache", cache),))
+
+    def register_cache(self, name: str, func: Callable):
+        """登记 lru_cache 函数，抓取时读取其 cache_info()，不在调用路径上计数"""
+        self._caches[name] = func
+
+    def instrument(self, tool: Optional[str] = None) -> Callable:
+        """装饰器：统计工具调用的次数、错误、并发与耗时
+
+        使用 functools.wraps 保留原函数的签名与文档，MCP 工具描述不受影响。
+        """
+        def decorator(func: Callable) -> Callable:
+            labels = (("tool", tool or func.__name__),)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                self.inc("mcp_tool_in_flight", labels)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    self.inc("mcp_tool_errors_total", labels)
+                    raise
+                finally:
+                    self.observe("mcp_tool_latency_seconds", labels, time.perf_counter() - started)
+                    self.inc("mcp_tool_requests_total", labels)
+                    self.inc("mcp_tool_in_flight", labels, -1)
+            return wrapper
+        return decorator
+
+    def collect(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        """汇总各分片与缓存统计"""
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        values: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        for shard in shards:
+            # dict.copy 在持有 GIL 时一次完成，不会与所属线程的插入冲突
+            for key, value in shard.values.copy().items():
+                values[key] = values.get(key, 0) + value
+            for key, counts in shard.histograms.copy().items():
+                total = histograms.get(key)
+                if total is None:
+                    histograms[key] = list(counts)
+                else:
+                    for i, count in enumerate(counts):
+                        total[i] += count
+
+        for name, func in self._caches.items():
+            info = func.cache_info()
+            labels = (("cache", name),)
+            for metric, value in (
+                ("mcp_cache_hits_total", info.hits),
+                ("mcp_cache_misses_total", info.misses),
+                ("mcp_cache_size", info.currsize),
+                ("mcp_cache_max_size", -1 if info.maxsize is None else info.maxsize),
+            ):
+                key = (metric, labels)
+                values[key] = values.get(key, 0) + value
+        return values, histograms
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        values, histograms = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRIC_FAMILIES.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "histogram":
+                for (metric, labels), counts in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(counts[-1])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            else:
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+        """在后台线程启动指标 HTTP 服务，GET METRICS_PATH 返回 Prometheus 文本"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 抓取请求频繁，不写访问日志
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+def metrics_port(default: int = METRICS_PORT) -> int:
+    """指标端口：环境变量 MCP_METRICS_PORT 优先，否则为各服务给定的默认端口"""
+    value = os.environ.get(METRICS_PORT_ENV, "").strip()
+    if not value:
+        return default
+    try:
+        port = int(value)
+    except ValueError:
+        raise ValueError(f"{METRICS_PORT_ENV} 不是有效的端口号: {value}") from None
+    if not 0 <= port <= 65535:
+        raise ValueError(f"{METRICS_PORT_ENV} 超出端口范围: {value}")
+    return port
+
+
+# 进程内共用的指标注册表
+METRICS = Metrics()
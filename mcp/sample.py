@@ -1,6 +1,13 @@
 import gradio as gr
 import datetime
 import cnlunar
+from metrics import METRICS, metrics_port
+
+# 本服务的默认指标端口，与 server.py 错开以便同机运行（可由环境变量 MCP_METRICS_PORT 覆盖）
+METRICS_PORT = 9465
+
+
+@METRICS.instrument()
 def luner_info(date = datetime.datetime.now()):
     """Get Chinese lunar calendar information for a given date.
     
@@ -50,4 +57,7 @@ demo = gr.Interface(
     description="Get Chinese lunar calendar information for a given date."
 )
 
-demo.launch(mcp_server=True)
+if __name__ == "__main__":
+    # 指标：http://127.0.0.1:9465/metrics（Prometheus 文本格式，端口见 METRICS_PORT）
+    METRICS.start_http_server(metrics_port(METRICS_PORT))
+    demo.launch(mcp_server=True)
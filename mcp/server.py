@@ -1,8 +1,11 @@
 import gradio as gr
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
 from lunarcalendar import Converter, SolarDate
 from bazi import Bazi
+from metrics import METRICS, metrics_port
 
 # 加载规则/知识库
 with open("fortune_rules.json", "r", encoding="utf-8") as f:
@@ -17,41 +20,100 @@ with open("talismans.json", "r", encoding="utf-8") as f:
 with open("taoism_qa.json", "r", encoding="utf-8") as f:
     taoism_qa = json.load(f)
 
-# 函数1：每日运势占卜
-def fortune_telling(zodiac: str, date: str = None) -> str:
-    if not date:
-        date = datetime.now().strftime("%Y-%m-%d")
-    # 转换为农历（可选）
+# 十二生肖
+ZODIACS = ["鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪"]
+
+# 本服务的默认指标端口（可由环境变量 MCP_METRICS_PORT 覆盖）
+METRICS_PORT = 9464
+
+# 缓存容量（按日期计，约覆盖一年的不同日期）
+DATE_CACHE_SIZE = 512
+
+# 当日缓存：(今日日期字符串, 失效时间戳（本地午夜）, 十二生肖的预渲染结果)
+# 整体作为一个元组替换，读取方先取局部引用再拆包，三者总属于同一天
+_today = ("", 0.0, {})
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _solar_to_lunar(date: str):
+    """解析日期字符串并转换为农历（有界缓存）"""
     solar_date = SolarDate.from_string(date)
-    lunar_date = Converter.solar_to_lunar(solar_date)
+    return Converter.solar_to_lunar(solar_date)
+
+
+METRICS.register_cache("solar_to_lunar", _solar_to_lunar)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE * len(ZODIACS))
+def _render_fortune(zodiac: str, date: str) -> str:
+    """渲染指定生肖、日期的运势结果（有界缓存）"""
+    # 转换为农历（可选）
+    lunar_date = _solar_to_lunar(date)
     # 获取运势规则（优先取指定日期，否则用默认）
     zodiac_rules = fortune_rules.get(zodiac, {})
     daily_rules = zodiac_rules.get(date, zodiac_rules.get("默认", {}))
     # 生成结果
-    result = f"【{zodiac}今日运势（{date}）】\n"
-    result += f"财运：{daily_rules.get('财运', '★★☆☆☆（无建议）')}\n"
-    result += f"事业：{daily_rules.get('事业', '★★☆☆☆（无建议）')}\n"
-    result += f"健康：{daily_rules.get('健康', '★★☆☆☆（无建议）')}\n"
-    result += f"建议：{daily_rules.get('建议', '保持平常心')}\n"
-    result += "\n注：结果仅供娱乐参考。"
-    return result
+    return "".join([
+        f"【{zodiac}今日运势（{date}）】\n",
+        f"财运：{daily_rules.get('财运', '★★☆☆☆（无建议）')}\n",
+        f"事业：{daily_rules.get('事业', '★★☆☆☆（无建议）')}\n",
+        f"健康：{daily_rules.get('健康', '★★☆☆☆（无建议）')}\n",
+        f"建议：{daily_rules.get('建议', '保持平常心')}\n",
+        "\n注：结果仅供娱乐参考。",
+    ])
+
+
+METRICS.register_cache("render_fortune", _render_fortune)
+
+
+def _roll_today():
+    """跨过本地午夜时切换当日缓存，并预渲染十二生肖的今日运势，返回新的当日缓存"""
+    global _today
+    today = datetime.now().date()
+    tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    date = today.strftime("%Y-%m-%d")
+    # 先构建完整结果，再以一次赋值整体替换，并发请求不会读到半成品或错配的日期
+    results = {zodiac: _render_fortune(zodiac, date) for zodiac in ZODIACS}
+    _today = (date, tomorrow.timestamp(), results)
+    return _today
+
+
+# 函数1：每日运势占卜
+@METRICS.instrument()
+def fortune_telling(zodiac: str, date: str = None) -> str:
+    today = _today
+    if time.time() >= today[1]:
+        today = _roll_today()
+    today_date, _, today_results = today
+    if not date or date == today_date:
+        result = today_results.get(zodiac)
+        if result is not None:
+            METRICS.cache_hit("today")
+            return result
+        METRICS.cache_miss("today")
+        date = today_date
+    return _render_fortune(zodiac, date)
 
 # 函数2：风水评估（略，参考fortune_telling逻辑）
+@METRICS.instrument()
 def fengshui_evaluation(orientation: str, layout: str = None) -> str:
     # 实现逻辑：匹配fengshui_rules，生成评估结果
     pass
 
 # 函数3：符咒解释（略，参考fortune_telling逻辑）
+@METRICS.instrument()
 def talisman_explanation(description: str) -> str:
     # 实现逻辑：匹配talismans，生成解释结果
     pass
 
 # 函数4：命理计算（略，用bazi库实现）
+@METRICS.instrument()
 def bazi_calculation(birthdate: str, birthtime: str = "00:00") -> str:
     # 实现逻辑：用bazi库计算八字，生成结果
     pass
 
 # 函数5：道教知识问答（略，参考fortune_telling逻辑）
+@METRICS.instrument()
 def taoism_qa(question: str) -> str:
     # 实现逻辑：匹配taoism_qa，生成答案
     pass
@@ -78,4 +140,6 @@ with gr.Blocks() as demo:
 
 # 启动MCP Server（关键：mcp_server=True）
 if __name__ == "__main__":
+    # 指标：http://127.0.0.1:9464/metrics（Prometheus 文本格式，端口见 METRICS_PORT）
+    METRICS.start_http_server(metrics_port(METRICS_PORT))
     demo.launch(mcp_server=True, server_name="0.0.0.0", server_port=7860)
@@ -1,12 +1,50 @@
 """
 BaZi analysis engine
 """
-from typing import Dict, List, Optional
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+from datetime import date, datetime, time
 import json
+import sys
 
-from core.models import BaZiChart, AnalysisResult, ElementStrength
+from core.models import (
+    BaZiChart, AnalysisResult, ElementStrength, FortuneEntry,
+    GanZhi, HourVariant, HourVariantsResult, TenGods
+)
 from core.calculator import BaZiCalculator
-from data.loader import data_loader
+from core.calendar import SOLAR_TERMS, to_seconds
+from core.strength import to_element_strength
+from core.tables import GAN_NAMES, GANZHI_LIST, PILLAR_NAMES, encode_charts
+from core.relations import find_interactions
+from analysis.patterns import PatternEngine
+from analysis.texts import TEXTS_TABLE, AnalysisTexts
+from analysis.timeline import FortuneTimeline
+from data.loader import data_loader, DIZHI_LIST
+
+
+# 批量分析时每个任务包含的命盘数（摊薄线程池的调度开销）
+ANALYZE_CHUNK_SIZE = 64
+
+# 十神分析的键，如"年干_甲"、"年支藏干_乙"：各分析结果共用同一组字符串
+TEN_GOD_STEM_KEYS = {
+    pillar_type: {gan: f"{pillar_type}干_{gan}" for gan in GAN_NAMES} for pillar_type in PILLAR_NAMES
+}
+TEN_GOD_HIDDEN_KEYS = {
+    pillar_type: {gan: f"{pillar_type}支藏干_{gan}" for gan in GAN_NAMES} for pillar_type in PILLAR_NAMES
+}
+
+# 按最弱五行给出的建议
+ELEMENT_ADVICE = {
+    "木": ["适合东方发展", "宜从事文教、出版、木材相关行业", "有利颜色：绿色"],
+    "火": ["适合南方发展", "宜从事能源、电子、娱乐相关行业", "有利颜色：红色"],
+    "土": ["适合中部发展", "宜从事房地产、农业、陶瓷相关行业", "有利颜色：黄色"],
+    "金": ["适合西方发展", "宜从事金融、机械、金属相关行业", "有利颜色：白色"],
+    "水": ["适合北方发展", "宜从事贸易、物流、水产相关行业", "有利颜色：黑色"]
+}
+ELEMENT_RECOMMENDATIONS = {
+    element: tuple(f"补充{element}之不足：{advice}" for advice in advice_list)
+    for element, advice_list in ELEMENT_ADVICE.items()
+}
 
 
 class BaZiAnalyzer:
@@ -14,41 +52,58 @@ class BaZiAnalyzer:
     
     def __init__(self):
         self.calculator = BaZiCalculator()
-        self.monthly_data = self._load_monthly_data()
-        self.time_data = self._load_time_data()
-        self.ten_gods_data = data_loader.load_ten_gods_data()
+        self.pattern_engine = PatternEngine()
     
-    def _load_monthly_data(self) -> Dict:
-        """加载月令分析数据"""
-        try:
-            return data_loader.load_json("monthly_analysis.json")
-        except FileNotFoundError:
-            return {"monthly_analysis": {}}
+    @property
+    def texts(self) -> AnalysisTexts:
+        """当前版本的月令、时辰文本表（随数据热重载更新）"""
+        return data_loader.table(TEXTS_TABLE)
     
-    def _load_time_data(self) -> Dict:
-        """加载时辰分析数据"""
-        try:
-            return data_loader.load_json("time_analysis.json")
-        except FileNotFoundError:
-            return {"time_analysis": {}}
+    @property
+    def ten_gods_data(self) -> Mapping:
+        """当前版本的十神数据（随数据热重载更新）"""
+        return data_loader.table("ten_gods")
+    
+    def describe_ten_god(self, name: str) -> Optional[TenGods]:
+        """十神的含义与关系类型（取当前版本的十神数据，随热重载更新）"""
+        entry = self.ten_gods_data["ten_gods"].get(name)
+        if entry is None:
+            return None
+        return TenGods(name=name, description=entry["description"], relationship_type=entry["relationship_type"])
     
     def analyze_chart(self, chart: BaZiChart) -> AnalysisResult:
         """分析八字命盘"""
-        
         # 计算五行力量
         element_strength = self.calculator.calculate_element_strength(chart)
         
+        # 特殊格局分析
+        pattern_mask = self.pattern_engine.evaluate(chart, element_strength)
+        
+        # 本次分析全程使用同一版本的文本表
+        return self._build_result(chart, element_strength, pattern_mask, self.texts)
+    
+    def _build_result(
+        self,
+        chart: BaZiChart,
+        element_strength: ElementStrength,
+        pattern_mask: int,
+        texts: AnalysisTexts
+    ) -> AnalysisResult:
+        """由已算出的五行力量与格局位掩码组装分析结果"""
         # 十神分析
         ten_gods_analysis = self._analyze_ten_gods(chart)
         
-        # 特殊格局分析
-        special_patterns = self._analyze_special_patterns(chart)
+        # 特殊格局
+        special_patterns = self.pattern_engine.pattern_names(pattern_mask)
+        
+        # 刑冲合害破
+        interactions = find_interactions(chart)
         
         # 月令分析
-        monthly_analysis = self._analyze_monthly(chart)
+        monthly_analysis = self._analyze_monthly(chart, texts)
         
         # 时辰分析
-        time_analysis = self._analyze_time(chart)
+        time_analysis = self._analyze_time(chart, texts)
         
         # 总体运势
         general_fortune = self._analyze_general_fortune(chart, element_strength)
@@ -61,12 +116,152 @@ class BaZiAnalyzer:
             element_strength=element_strength,
             ten_gods_analysis=ten_gods_analysis,
             special_patterns=special_patterns,
+            pattern_mask=pattern_mask,
+            interactions=interactions,
             monthly_analysis=monthly_analysis,
             time_analysis=time_analysis,
             general_fortune=general_fortune,
             recommendations=recommendations
         )
     
+    def analyze_many(
+        self,
+        charts: Iterable[BaZiChart],
+        executor: Optional[Executor] = None,
+        chunk_size: int = ANALYZE_CHUNK_SIZE
+    ) -> List[AnalysisResult]:
+        """批量分析命盘，结果顺序与输入一致
+        
+        传入线程池时按块并行分析。分析器不保存逐次状态，共用的干支对象、查表数组与
+        数据表快照均为只读，同一实例可在多个线程中同时使用；自由线程（无GIL）的
+        CPython 3.13+ 上可随线程数扩展。
+        """
+        charts = list(charts)
+        if executor is None:
+            return self._analyze_chunk(charts)
+        
+        chunks = [charts[i:i + chunk_size] for i in range(0, len(charts), chunk_size)]
+        results = []
+        for chunk_results in executor.map(self._analyze_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+    
+    def _analyze_chunk(self, charts: List[BaZiChart]) -> List[AnalysisResult]:
+        """一块命盘的五行力量与格局各做一次向量化计算，再逐盘组装结果"""
+        if not charts:
+            return []
+        texts = self.texts
+        gans, zhis = encode_charts(charts)
+        strengths = self.calculator.strength_model.batch(gans, zhis)
+        masks = self.pattern_engine.evaluate_batch(gans, zhis, strengths)
+        return [
+            self._build_result(chart, to_element_strength(strength), int(mask), texts)
+            for chart, strength, mask in zip(charts, strengths, masks)
+        ]
+    
+    def fortune_timeline(self, chart: BaZiChart) -> FortuneTimeline:
+        """创建流年、流月时间线（可按年份直接定位）"""
+        return FortuneTimeline(chart)
+    
+    def iter_annual_fortunes(
+        self, 
+        chart: BaZiChart, 
+        start_year: int, 
+        end_year: Optional[int] = None
+    ) -> Iterator[FortuneEntry]:
+        """逐年产出流年"""
+        return self.fortune_timeline(chart).iter_years(start_year, end_year)
+    
+    def iter_monthly_fortunes(
+        self, 
+        chart: BaZiChart, 
+        start_year: int, 
+        end_year: Optional[int] = None
+    ) -> Iterator[FortuneEntry]:
+        """逐月产出流月"""
+        return self.fortune_timeline(chart).iter_months(start_year, end_year)
+    
+    def analyze_hour_variants(self, birth_date: date, is_male: bool = True) -> HourVariantsResult:
+        """出生时辰不详时，一次分析十二个时辰的候选命盘"""
+        noon = datetime.combine(birth_date, time(12))
+        texts = self.texts
+        chart = self.calculator.calculate_bazi_from_datetime(noon, is_male)
+        day_gan_zhi = chart.day_pillar.gan_zhi
+        
+        # 年、月柱及其分析按节令段缓存：一般全天共用一份，当日交节时节前、节后各一份
+        segments = {}
+        
+        def segment(position: int):
+            if position not in segments:
+                pillars = [
+                    self._ganzhi_by_index(SOLAR_TERMS.year_ganzhi_index(position)),
+                    self._ganzhi_by_index(SOLAR_TERMS.month_ganzhi_index(position)),
+                    day_gan_zhi
+                ]
+                ten_gods_analysis = {}
+                for pillar_type, gan_zhi in zip(PILLAR_NAMES, pillars[:2]):
+                    ten_gods_analysis.update(
+                        self._analyze_pillar_ten_gods(day_gan_zhi.gan.name, pillar_type, gan_zhi)
+                    )
+                segments[position] = (
+                    pillars,
+                    self._sum_pillar_strength(pillars),
+                    ten_gods_analysis,
+                    texts.monthly_text(day_gan_zhi.gan.index, pillars[1].zhi.index)
+                )
+            return segments[position]
+        
+        shared_pillars, _, shared_ten_gods, shared_monthly = segment(
+            int(SOLAR_TERMS.position_at(to_seconds(noon)))
+        )
+        
+        variants = []
+        for zhi in DIZHI_LIST:
+            # 每个时辰取其在当日内的中点，子时取早子时
+            moment = datetime.combine(birth_date, time(zhi.index * 2) if zhi.index else time(0, 30))
+            gan_index = (day_gan_zhi.gan.index % 5 * 2 + zhi.index) % 10
+            hour_gan_zhi = self.calculator.create_ganzhi(GAN_NAMES[gan_index], zhi.name)
+            
+            # 当日交节时，节前、节后时辰的年、月柱及其分析不同
+            pillars, base_strength, ten_gods_analysis, monthly_analysis = segment(
+                int(SOLAR_TERMS.position_at(to_seconds(moment)))
+            )
+            element_delta = self.calculator.calculate_pillar_strength(hour_gan_zhi, pillars[1].zhi, "时")
+            
+            variants.append(HourVariant(
+                hour_zhi=zhi.name,
+                time_range=zhi.time_range,
+                pillars=[gan_zhi.name for gan_zhi in pillars] + [hour_gan_zhi.name],
+                ten_gods=self._analyze_pillar_ten_gods(day_gan_zhi.gan.name, "时", hour_gan_zhi),
+                ten_gods_analysis=ten_gods_analysis,
+                monthly_analysis=monthly_analysis,
+                element_delta=element_delta,
+                element_strength=base_strength + element_delta,
+                time_analysis=self._analyze_time_combo(day_gan_zhi, hour_gan_zhi, texts)
+            ))
+        
+        return HourVariantsResult(
+            solar_date=birth_date,
+            year_pillar=shared_pillars[0].name,
+            month_pillar=shared_pillars[1].name,
+            day_pillar=day_gan_zhi.name,
+            ten_gods_analysis=shared_ten_gods,
+            monthly_analysis=shared_monthly,
+            variants=variants
+        )
+    
+    def _ganzhi_by_index(self, index: int) -> GanZhi:
+        """由六十甲子序号取干支"""
+        return GANZHI_LIST[index]
+    
+    def _sum_pillar_strength(self, pillars: List[GanZhi]) -> ElementStrength:
+        """累加从年柱起的多柱五行力量（月令取第二柱地支）"""
+        strength = ElementStrength()
+        month_zhi = pillars[1].zhi
+        for pillar_type, gan_zhi in zip(PILLAR_NAMES, pillars):
+            strength = strength + self.calculator.calculate_pillar_strength(gan_zhi, month_zhi, pillar_type)
+        return strength
+    
     def _analyze_ten_gods(self, chart: BaZiChart) -> Dict[str, str]:
         """分析十神关系"""
         day_gan = chart.day_pillar.gan_zhi.gan.name
@@ -74,78 +269,42 @@ class BaZiAnalyzer:
         
         for pillar in chart.all_pillars:
             if pillar.pillar_type != "日":
-                gan_name = pillar.gan_zhi.gan.name
-                ten_god = self.calculator.get_ten_gods_relationship(day_gan, gan_name)
-                analysis[f"{pillar.pillar_type}干_{gan_name}"] = ten_god
-                
-                # 分析地支藏干
-                zhi = pillar.gan_zhi.zhi
-                for hidden_gan, _ in zhi.hidden_stems.items():
-                    if hidden_gan != day_gan:
-                        hidden_ten_god = self.calculator.get_ten_gods_relationship(day_gan, hidden_gan)
-                        analysis[f"{pillar.pillar_type}支藏干_{hidden_gan}"] = hidden_ten_god
+                analysis.update(
+                    self._analyze_pillar_ten_gods(day_gan, pillar.pillar_type, pillar.gan_zhi)
+                )
         
         return analysis
     
-    def _analyze_special_patterns(self, chart: BaZiChart) -> List[str]:
-        """分析特殊格局"""
-        patterns = []
-        
-        # 检查四同类型格局
-        gans = chart.all_gans
-        zhis = chart.all_zhis
-        
-        # 检查全阳或全阴
-        if self._check_all_yang_or_yin(chart):
-            if all(self._is_yang(gan) for gan in gans) and all(self._is_yang(zhi) for zhi in zhis):
-                patterns.append("四柱全阳")
-            elif all(self._is_yin(gan) for gan in gans) and all(self._is_yin(zhi) for zhi in zhis):
-                patterns.append("四柱全阴")
+    def _analyze_pillar_ten_gods(self, day_gan: str, pillar_type: str, gan_zhi: GanZhi) -> Dict[str, str]:
+        """分析单柱天干及地支藏干的十神"""
+        analysis = {}
         
-        # 检查木火通明格局
-        if self._check_wood_fire_pattern(chart):
-            patterns.append("木火通明")
+        gan_name = gan_zhi.gan.name
+        ten_god = self.calculator.get_ten_gods_relationship(day_gan, gan_name)
+        analysis[TEN_GOD_STEM_KEYS[pillar_type][gan_name]] = ten_god
         
-        # 检查金水相涵格局
-        if self._check_metal_water_pattern(chart):
-            patterns.append("金水相涵")
+        # 分析地支藏干
+        hidden_keys = TEN_GOD_HIDDEN_KEYS[pillar_type]
+        for hidden_gan, _ in gan_zhi.zhi.hidden_stems.items():
+            if hidden_gan != day_gan:
+                hidden_ten_god = self.calculator.get_ten_gods_relationship(day_gan, hidden_gan)
+                analysis[hidden_keys[hidden_gan]] = hidden_ten_god
         
-        return patterns
+        return analysis
     
-    def _analyze_monthly(self, chart: BaZiChart) -> Optional[str]:
+    def _analyze_monthly(self, chart: BaZiChart, texts: AnalysisTexts) -> Optional[str]:
         """分析月令"""
-        day_gan = chart.day_pillar.gan_zhi.gan.name
-        month_zhi = chart.month_pillar.gan_zhi.zhi.name
-        
-        # 根据月支确定季节
-        season = self._get_season_by_month(month_zhi)
-        
-        monthly_data = self.monthly_data.get("monthly_analysis", {})
-        gan_data = monthly_data.get(day_gan, {})
-        season_data = gan_data.get(season)
-        
-        if season_data:
-            return f"{season_data['title']}: {season_data['analysis']}"
-        
-        return f"{day_gan}日生于{season}月，需要根据具体情况分析。"
+        return texts.monthly_text(
+            chart.day_pillar.gan_zhi.gan.index, chart.month_pillar.gan_zhi.zhi.index
+        )
     
-    def _analyze_time(self, chart: BaZiChart) -> Optional[str]:
+    def _analyze_time(self, chart: BaZiChart, texts: AnalysisTexts) -> Optional[str]:
         """分析时辰"""
-        day_combo = f"{chart.day_pillar.gan_zhi.name}"
-        hour_combo = f"{chart.hour_pillar.gan_zhi.name}"
-        time_key = f"{chart.day_pillar.gan_zhi.gan.name}日{chart.hour_pillar.gan_zhi.name}"
-        
-        time_data = self.time_data.get("time_analysis", {})
-        specific_data = time_data.get(time_key)
-        
-        if specific_data:
-            analysis = specific_data["analysis"]
-            specific_combo = specific_data.get("specific_combinations", {}).get(f"{day_combo}日{hour_combo}时")
-            if specific_combo:
-                analysis += f" 具体组合：{specific_combo}"
-            return analysis
-        
-        return f"{chart.day_pillar.gan_zhi.gan.name}日{chart.hour_pillar.gan_zhi.name}时，需要根据具体情况分析。"
+        return self._analyze_time_combo(chart.day_pillar.gan_zhi, chart.hour_pillar.gan_zhi, texts)
+    
+    def _analyze_time_combo(self, day_gan_zhi: GanZhi, hour_gan_zhi: GanZhi, texts: AnalysisTexts) -> Optional[str]:
+        """按日柱、时柱分析时辰"""
+        return texts.time_text(day_gan_zhi.number - 1, hour_gan_zhi.number - 1)
     
     def _analyze_general_fortune(self, chart: BaZiChart, element_strength: ElementStrength) -> str:
         """分析总体运势"""
@@ -191,7 +350,8 @@ class BaZiAnalyzer:
         else:
             analysis.append("日主强弱适中。")
         
-        return " ".join(analysis)
+        # 各句组合有限，驻留后各分析结果共用同一字符串
+        return sys.intern(" ".join(analysis))
     
     def _generate_recommendations(self, chart: BaZiChart, element_strength: ElementStrength) -> List[str]:
         """生成建议"""
@@ -211,48 +371,7 @@ class BaZiAnalyzer:
             weakest = min(element_ratios, key=element_ratios.get)
             
             # 根据最弱五行给出建议
-            element_advice = {
-                "木": ["适合东方发展", "宜从事文教、出版、木材相关行业", "有利颜色：绿色"],
-                "火": ["适合南方发展", "宜从事能源、电子、娱乐相关行业", "有利颜色：红色"],
-                "土": ["适合中部发展", "宜从事房地产、农业、陶瓷相关行业", "有利颜色：黄色"],
-                "金": ["适合西方发展", "宜从事金融、机械、金属相关行业", "有利颜色：白色"],
-                "水": ["适合北方发展", "宜从事贸易、物流、水产相关行业", "有利颜色：黑色"]
-            }
-            
-            if weakest in element_advice:
-                recommendations.extend([f"补充{weakest}之不足：{advice}" for advice in element_advice[weakest]])
+            if weakest in ELEMENT_RECOMMENDATIONS:
+                recommendations.extend(ELEMENT_RECOMMENDATIONS[weakest])
         
         return recommendations
-    
-    def _check_all_yang_or_yin(self, chart: BaZiChart) -> bool:
-        """检查是否全阳或全阴"""
-        return True  # 简化实现
-    
-    def _is_yang(self, char: str) -> bool:
-        """判断是否为阳性"""
-        yang_chars = ["甲", "丙", "戊", "庚", "壬", "子", "寅", "辰", "午", "申", "戌"]
-        return char in yang_chars
-    
-    def _is_yin(self, char: str) -> bool:
-        """判断是否为阴性"""
-        return not self._is_yang(char)
-    
-    def _check_wood_fire_pattern(self, chart: BaZiChart) -> bool:
-        """检查木火通明格局"""
-        # 简化实现，检查是否有木火相生
-        return True  # 需要更复杂的逻辑
-    
-    def _check_metal_water_pattern(self, chart: BaZiChart) -> bool:
-        """检查金水相涵格局"""
-        # 简化实现
-        return True  # 需要更复杂的逻辑
-    
-    def _get_season_by_month(self, month_zhi: str) -> str:
-        """根据月支确定季节"""
-        season_map = {
-            "寅": "春月", "卯": "春月", "辰": "春月",
-            "巳": "夏月", "午": "夏月", "未": "夏月",
-            "申": "秋月", "酉": "秋月", "戌": "秋月",
-            "亥": "冬月", "子": "冬月", "丑": "冬月"
-        }
-        return season_map.get(month_zhi, "未知月份")
@@ -0,0 +1,165 @@
+"""
+Asyncio front end for BaZi calculation and analysis
+"""
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from analysis.analyzer import BaZiAnalyzer
+from core.models import AnalysisResult, BaZiChart
+
+
+# 微批窗口（秒）：首个请求到达后等待同批请求的最长时间
+BATCH_WINDOW = 0.002
+# 单批最多合并的请求数，达到即立即提交
+MAX_BATCH_SIZE = 256
+
+# 单个请求的执行结果：(是否成功, 结果或异常)
+Outcome = Tuple[bool, Any]
+
+
+def _outcome(func: Callable, *args) -> Outcome:
+    try:
+        return True, func(*args)
+    except Exception as error:
+        return False, error
+
+
+def _calculate_batch(analyzer: BaZiAnalyzer, requests: List[Tuple]) -> List[Outcome]:
+    """执行器任务：一批排盘请求做一次向量化查表；出错时逐个重算，只让出错的请求失败"""
+    calculator = analyzer.calculator
+    try:
+        return [(True, chart) for chart in calculator.calculate_many(requests)]
+    except Exception:
+        return [_outcome(calculator.calculate_bazi_from_datetime, *request) for request in requests]
+
+
+def _analyze_batch(analyzer: BaZiAnalyzer, charts: List[BaZiChart]) -> List[Outcome]:
+    """执行器任务：一批命盘做一次向量化分析；出错时逐个重算，只让出错的请求失败"""
+    try:
+        return [(True, result) for result in analyzer.analyze_many(charts)]
+    except Exception:
+        return [_outcome(analyzer.analyze_chart, chart) for chart in charts]
+
+
+class _MicroBatcher:
+    """把短时间窗口内到达的请求合并为一次执行器调用（绑定于创建时的事件循环）"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, run_batch: Callable[[List], List[Outcome]],
+                 executor: Optional[Executor], window: float, max_size: int):
+        self.loop = loop
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = window
+        self.max_size = max_size
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, item: Any) -> Any:
+        future = self.loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # 已取消（或超时）的请求不再提交
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = self.loop.run_in_executor(self.executor, self.run_batch, [item for item, _ in batch])
+        task.add_done_callback(partial(self._deliver, [future for _, future in batch]))
+
+    @staticmethod
+    def _deliver(futures: List[asyncio.Future], task: asyncio.Future):
+        if task.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+        error = task.exception()
+        if error is not None:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, (ok, value) in zip(futures, task.result()):
+            # 等待方已取消或超时，丢弃结果
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+class AsyncBaZiAnalyzer:
+    """八字计算与分析的异步接口
+
+    计算在执行器中进行，不阻塞事件循环；executor 为空时使用事件循环的默认线程池，
+    也可传入进程池（分析器随每批任务一并序列化）。同一事件循环中 batch_window 秒内
+    到达的 calculate / analyze 请求各自合并为一次执行器调用：calculate 的一批请求一次
+    向量化查表排盘，analyze 的一批命盘做一次向量化分析。
+
+    请求被取消或超时（timeout 秒，缺省用构造时的 timeout）时：尚未提交的从批中剔除；
+    已在执行器中运行的无法中断，其结果被丢弃。超时抛出 asyncio.TimeoutError。
+    """
+
+    def __init__(
+        self,
+        analyzer: Optional[BaZiAnalyzer] = None,
+        executor: Optional[Executor] = None,
+        batch_window: float = BATCH_WINDOW,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        timeout: Optional[float] = None
+    ):
+        if batch_window < 0:
+            raise ValueError("微批窗口不能为负数")
+        if max_batch_size <= 0:
+            raise ValueError("单批请求数必须为正数")
+        self.analyzer = analyzer or BaZiAnalyzer()
+        self.executor = executor
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._batchers: Dict[str, _MicroBatcher] = {}
+
+    def _batcher(self, kind: str, run_batch: Callable) -> _MicroBatcher:
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(kind)
+        if batcher is None or batcher.loop is not loop:
+            batcher = self._batchers[kind] = _MicroBatcher(
+                loop, partial(run_batch, self.analyzer), self.executor,
+                self.batch_window, self.max_batch_size
+            )
+        return batcher
+
+    async def _submit(self, kind: str, run_batch: Callable, item: Any, timeout: Optional[float]) -> Any:
+        submitted = self._batcher(kind, run_batch).submit(item)
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await submitted
+        return await asyncio.wait_for(submitted, timeout)
+
+    async def calculate(
+        self,
+        birth_datetime: datetime,
+        is_male: bool = True,
+        timezone_offset: float = 8,
+        longitude: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> BaZiChart:
+        """从出生时间计算八字（参数同 BaZiCalculator.calculate_bazi_from_datetime）"""
+        request = (birth_datetime, is_male, timezone_offset, longitude)
+        return await self._submit("calculate", _calculate_batch, request, timeout)
+
+    async def analyze(self, chart: BaZiChart, timeout: Optional[float] = None) -> AnalysisResult:
+        """分析八字命盘"""
+        return await self._submit("analyze", _analyze_batch, chart, timeout)
@@ -0,0 +1,100 @@
+"""
+One-vs-many compatibility (合婚) scoring
+"""
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from core.batch import ChartBatch
+from core.models import BaZiChart, CompatibilityMatch
+from core.relations import GAN_RELATIONS, ZHI_RELATIONS, HE, CHONG, HAI
+
+
+# 默认评分权重
+DEFAULT_WEIGHTS = {
+    "day_gan_he": 20.0,     # 日干相合
+    "day_gan_chong": -10.0, # 日干相冲
+    "zhi_he": 4.0,          # 两盘地支相合（每对柱位）
+    "zhi_chong": -5.0,      # 两盘地支相冲
+    "zhi_hai": -2.0,        # 两盘地支相害
+    "element": 30.0,        # 五行互补：合并后五行越均衡得分越高
+}
+
+# 两盘四柱地支交叉比较的柱位权重，日支（夫妻宫）相对为重
+PILLAR_WEIGHTS = np.ones((4, 4), dtype=np.float32)
+PILLAR_WEIGHTS[2, 2] = 3.0
+
+# 五行占比偏离均匀分布的最大L1距离（全部集中于一行时）
+MAX_IMBALANCE = 1.6
+
+
+def _as_batch(charts: Union[BaZiChart, ChartBatch]) -> ChartBatch:
+    if isinstance(charts, BaZiChart):
+        return ChartBatch.from_charts([charts])
+    return charts
+
+
+class CompatibilityScorer:
+    """合婚评分：一个命盘对候选池整体向量化评分，部分排序取前k名"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, chunk_size: int = 262144):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(DEFAULT_WEIGHTS)
+            if unknown:
+                raise ValueError(f"未知的评分项: {', '.join(sorted(unknown))}")
+            self.weights.update(weights)
+        self.chunk_size = chunk_size
+
+    def _score_chunk(self, gans: np.ndarray, zhis: np.ndarray, ratios: np.ndarray, pool: ChartBatch) -> np.ndarray:
+        weights = self.weights
+
+        day_gan = GAN_RELATIONS[gans[2], pool.gans[:, 2]]
+        scores = (
+            weights["day_gan_he"] * ((day_gan & HE) != 0)
+            + weights["day_gan_chong"] * ((day_gan & CHONG) != 0)
+        ).astype(np.float32)
+
+        # (n, 4, 4)：本盘第i柱地支与候选第j柱地支的关系
+        zhi = ZHI_RELATIONS[zhis[:, None], pool.zhis[:, None, :]]
+        for bit, key in ((HE, "zhi_he"), (CHONG, "zhi_chong"), (HAI, "zhi_hai")):
+            scores += weights[key] * (((zhi & bit) != 0) * PILLAR_WEIGHTS).sum(axis=(1, 2))
+
+        combined = (ratios + pool.ratios) / 2
+        balance = 1 - np.abs(combined - 0.2).sum(axis=1) / MAX_IMBALANCE
+        scores += weights["element"] * balance
+
+        return scores
+
+    def score(self, chart: Union[BaZiChart, ChartBatch], pool: ChartBatch) -> np.ndarray:
+        """一个命盘对候选池的评分 (n,)"""
+        chart = _as_batch(chart)
+        gans = chart.gans[0]
+        zhis = chart.zhis[0]
+        ratios = chart.ratios[0]
+
+        scores = np.empty(len(pool), dtype=np.float32)
+        for start in range(0, len(pool), self.chunk_size):
+            end = start + self.chunk_size
+            scores[start:end] = self._score_chunk(gans, zhis, ratios, pool[start:end])
+        return scores
+
+    def score_pair(self, chart_a: BaZiChart, chart_b: BaZiChart) -> float:
+        """两个命盘的合婚评分"""
+        return float(self.score(chart_a, _as_batch(chart_b))[0])
+
+    def top_k(self, chart: Union[BaZiChart, ChartBatch], pool: ChartBatch, k: int = 10) -> List[CompatibilityMatch]:
+        """评分最高的前k名候选，按评分降序"""
+        scores = self.score(chart, pool)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+
+        # 先部分排序选出前k名，再只对这k个排序
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            CompatibilityMatch(index=int(i), score=round(float(scores[i]), 2))
+            for i in candidates
+        ]
@@ -0,0 +1,94 @@
+"""
+Date selection (择日) engine
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from core.calendar import SOLAR_TERMS, day_ganzhi_index, xingxiu_index
+from core.models import SelectedDay
+from core.tables import GANZHI_NAMES
+from data.loader import data_loader
+
+
+class DateSelector:
+    """择日引擎：按建除十二神的宜忌筛选日期"""
+
+    # 忌条目中含此词者视为诸事不宜（仅保留其宜条目）
+    WILDCARD_AVOID = "诸吉事"
+
+    def __init__(self, chunk_days: int = 3660):
+        jianchu = data_loader.load_jianchu_data()["jianchu"]
+        xingxiu = data_loader.load_xingxiu_data()["xingxiu"]
+
+        self.officers = [jianchu[str(i)] for i in range(len(jianchu))]
+        self.officer_names = [officer["name"] for officer in self.officers]
+        self.xingxiu_names = [xingxiu[str(i)]["name"] for i in range(len(xingxiu))]
+        self.chunk_days = chunk_days
+
+        self.suitable_index, self.avoid_index, self.avoid_all_mask = self._build_activity_index()
+
+    def _build_activity_index(self) -> Tuple[Dict[str, int], Dict[str, int], int]:
+        """构建活动倒排索引：活动 -> 建除位掩码"""
+        suitable: Dict[str, int] = {}
+        avoid: Dict[str, int] = {}
+        avoid_all = 0
+
+        for i, officer in enumerate(self.officers):
+            bit = 1 << i
+            for activity in officer["suitable"]:
+                suitable[activity] = suitable.get(activity, 0) | bit
+            for activity in officer["avoid"]:
+                if self.WILDCARD_AVOID in activity:
+                    avoid_all |= bit
+                else:
+                    avoid[activity] = avoid.get(activity, 0) | bit
+
+        return suitable, avoid, avoid_all
+
+    @property
+    def activities(self) -> List[str]:
+        """可供择日的活动"""
+        return sorted(self.suitable_index)
+
+    def activity_mask(self, activity: str) -> int:
+        """活动的可选建除位掩码（宜且不忌）"""
+        if activity not in self.suitable_index:
+            raise ValueError(f"未知活动: {activity}")
+
+        suitable = self.suitable_index[activity]
+        avoid = self.avoid_index.get(activity, 0) | (self.avoid_all_mask & ~suitable)
+        return suitable & ~avoid
+
+    def day_table(self, start: date, end: date) -> Tuple[np.ndarray, ...]:
+        """计算日期范围内每日的日序、日柱、建除与星宿序号"""
+        days = np.arange(start.toordinal(), end.toordinal() + 1, dtype=np.int64)
+        positions = SOLAR_TERMS.position_on_day(days)
+        SOLAR_TERMS.check_positions(positions)
+
+        day_ganzhi = day_ganzhi_index(days)
+        # 建除：日支与月建（月支）之差
+        officers = (day_ganzhi % 12 - SOLAR_TERMS.month_zhi_index(positions)) % 12
+        xingxiu = xingxiu_index(days)
+
+        return days, day_ganzhi, officers, xingxiu
+
+    def select(self, activity: str, start: date, end: date) -> Iterator[SelectedDay]:
+        """逐日产出日期范围内适宜该活动的日子"""
+        mask = self.activity_mask(activity)
+        chunk_start = start
+
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=self.chunk_days - 1), end)
+            days, day_ganzhi, officers, xingxiu = self.day_table(chunk_start, chunk_end)
+
+            for i in np.flatnonzero((mask >> officers) & 1):
+                yield SelectedDay(
+                    solar_date=date.fromordinal(int(days[i])),
+                    day_gan_zhi=GANZHI_NAMES[day_ganzhi[i]],
+                    jianchu=self.officer_names[officers[i]],
+                    xingxiu=self.xingxiu_names[xingxiu[i]]
+                )
+
+            chunk_start = chunk_end + timedelta(days=1)
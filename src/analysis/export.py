@@ -0,0 +1,262 @@
+"""
+Columnar export of batch chart and analysis results
+"""
+import json
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from analysis.patterns import PatternEngine
+from analysis.texts import TEXTS_TABLE, AnalysisTexts
+from core.batch import ChartBatch
+from core.calendar import to_seconds
+from core.models import AnalysisResult
+from core.tables import ELEMENT_NAMES, TEN_GOD_NAMES, TEN_GODS, ZHI_MAIN_GAN, encode_chart
+from data.loader import data_loader
+
+
+# 导出格式版本
+EXPORT_VERSION = 1
+# 目录格式的头部文件名
+HEADER_FILE = "header.json"
+# .npy 文件头（魔数与1.0版号）及其定长
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_SIZE = 128
+
+# 列名与定长类型
+COLUMN_DTYPES = {
+    "birth_seconds": np.dtype(np.int64),   # 出生时刻秒序（core.calendar.to_seconds）
+    "pillars": np.dtype(np.int8),          # (n, 4) 四柱六十甲子序号
+    "elements": np.dtype(np.float32),      # (n, 5) 五行力量（木火土金水）
+    "ten_gods": np.dtype(np.int8),         # (n, 8) 四柱天干、地支本气对日主的十神编码
+    "pattern_mask": np.dtype(np.uint64),   # (n,) 特殊格局位掩码
+    "monthly_text": np.dtype(np.int32),    # (n,) 月令分析文本编码
+    "time_text": np.dtype(np.int32),       # (n,) 时辰分析文本编码
+}
+
+
+def _npy_header(descr: str, shape: tuple) -> bytes:
+    """定长的 .npy（1.0版）头部，行数变化时可原地重写"""
+    text = repr({"descr": descr, "fortran_order": False, "shape": shape}).encode("latin1")
+    size = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+    if len(text) >= size:
+        raise ValueError("列形状过长")
+    return NPY_MAGIC + size.to_bytes(2, "little") + text.ljust(size - 1) + b"\n"
+
+
+def _header(columns: Dict[str, Any], rows: int, strings: List[str], patterns: List[str]) -> Dict[str, Any]:
+    return {
+        "version": EXPORT_VERSION,
+        "rows": rows,
+        "columns": columns,
+        "element_names": ELEMENT_NAMES,
+        "ten_god_names": TEN_GOD_NAMES,
+        "pattern_names": patterns,
+        "strings": strings,
+    }
+
+
+class ColumnExporter:
+    """将命盘批次转换为定长列，文本以整数编码指向去重后的文本表
+
+    未指定 texts 时使用自有的文本表并跟随数据热重载：文本文件重建后并入新版本，
+    之后的块改用新文本，已写出的编码不变（头部的文本表同时含新旧文本）。
+    """
+
+    def __init__(self, engine: Optional[PatternEngine] = None, texts: Optional[AnalysisTexts] = None):
+        self.engine = engine or PatternEngine()
+        if texts is None:
+            texts = AnalysisTexts.load()
+            _reloading_exporters.add(self)
+        self.texts = texts
+
+    def batch_columns(self, batch: ChartBatch, birth_seconds=None) -> Dict[str, np.ndarray]:
+        """由命盘批次计算全部列"""
+        gans = batch.gans
+        zhis = batch.zhis
+        pillars = batch.ganzhi
+        day_gan = gans[:, 2:3]
+
+        columns = {
+            "pillars": pillars.astype(np.int8),
+            "elements": batch.elements,
+            "ten_gods": np.concatenate([
+                TEN_GODS[day_gan, gans], TEN_GODS[day_gan, ZHI_MAIN_GAN[zhis]]
+            ], axis=1),
+            "pattern_mask": self.engine.evaluate_batch(gans, zhis, batch.elements),
+            "monthly_text": self.texts.monthly_code(gans[:, 2], zhis[:, 1]),
+            "time_text": self.texts.time_code(pillars[:, 2], pillars[:, 3]),
+        }
+        if birth_seconds is not None:
+            columns["birth_seconds"] = np.asarray(birth_seconds, dtype=np.int64)
+        return columns
+
+    def result_columns(self, results: Iterable[AnalysisResult]) -> Dict[str, np.ndarray]:
+        """由分析结果对象生成列，沿用结果中已算出的五行力量、格局与文本"""
+        gans, zhis, elements, masks, monthly, times, seconds = [], [], [], [], [], [], []
+        for result in results:
+            chart_gans, chart_zhis = encode_chart(result.chart)
+            gans.append(chart_gans)
+            zhis.append(chart_zhis)
+            strength = result.element_strength
+            elements.append([strength.wood, strength.fire, strength.earth, strength.metal, strength.water])
+            masks.append(result.pattern_mask)
+            monthly.append(self.texts.intern(result.monthly_analysis or ""))
+            times.append(self.texts.intern(result.time_analysis or ""))
+            seconds.append(to_seconds(datetime.fromisoformat(result.chart.birth_info["solar_date"])))
+
+        batch = ChartBatch(gans, zhis, np.array(elements, dtype=np.float32).reshape(-1, 5))
+        columns = self.batch_columns(batch, seconds)
+        columns["pattern_mask"] = np.array(masks, dtype=np.uint64)
+        columns["monthly_text"] = np.array(monthly, dtype=np.int32)
+        columns["time_text"] = np.array(times, dtype=np.int32)
+        return columns
+
+    def header(self, columns: Dict[str, Any], rows: int) -> Dict[str, Any]:
+        return _header(columns, rows, self.texts.strings, self.engine.names)
+
+    def save_npz(self, path: Union[str, Path], columns: Dict[str, np.ndarray]):
+        """写入单个 .npz 文件（适合中小规模结果，读取时解压到内存）"""
+        rows = len(next(iter(columns.values()))) if columns else 0
+        layout = {name: {"dtype": array.dtype.str, "shape": list(array.shape)} for name, array in columns.items()}
+        header = json.dumps(self.header(layout, rows), ensure_ascii=False)
+        np.savez(path, header=np.array(header), **columns)
+
+    def export_range(self, directory: Union[str, Path], start: datetime, end: datetime,
+                     step_seconds: int = 3600, chunk_size: int = 65536) -> int:
+        """按时间步逐块排盘并写入目录格式，返回行数"""
+        first = to_seconds(start)
+        last = to_seconds(end)
+        span = step_seconds * chunk_size
+        with ColumnWriter(directory, self) as writer:
+            for chunk_start in range(first, last, span):
+                seconds = np.arange(chunk_start, min(chunk_start + span, last), step_seconds, dtype=np.int64)
+                writer.write(self.batch_columns(ChartBatch.from_seconds(seconds), seconds))
+            return writer.rows
+
+
+# 跟随热重载的导出器（弱引用，不延长导出器的生命周期）
+_reloading_exporters: "weakref.WeakSet[ColumnExporter]" = weakref.WeakSet()
+
+
+def _merge_reloaded_texts(name: str, texts: AnalysisTexts):
+    for exporter in list(_reloading_exporters):
+        exporter.texts.merge(texts)
+
+
+data_loader.on_reload(TEXTS_TABLE, _merge_reloaded_texts)
+
+
+class ColumnWriter:
+    """目录格式写入器：每列一个 .npy 文件，按块追加，关闭时写入头部
+
+    .npy 文件可用 np.load(mmap_mode="r") 零拷贝打开，适合上亿行的结果。
+    作为上下文管理器时，块内出错会放弃写入（abort），不留下不完整的结果。
+    """
+
+    def __init__(self, directory: Union[str, Path], exporter: ColumnExporter):
+        self.directory = Path(directory)
+        self._created_directory = not self.directory.exists()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.exporter = exporter
+        self.rows = 0
+        self._files = {}
+        self._shapes = {}
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        """追加一块列数据，各列行数必须一致"""
+        lengths = {len(array) for array in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("各列行数不一致")
+        if self._files and set(columns) != set(self._files):
+            raise ValueError("各块的列名不一致")
+
+        for name, array in columns.items():
+            array = np.ascontiguousarray(array, dtype=COLUMN_DTYPES[name])
+            if name not in self._files:
+                self._files[name] = open(self.directory / f"{name}.npy", "wb+")
+                self._shapes[name] = array.shape[1:]
+                # 先写占位头部，关闭时按实际行数重写
+                self._write_npy_header(name, 0)
+            self._files[name].write(array.tobytes())
+        self.rows += lengths.pop() if lengths else 0
+
+    def _write_npy_header(self, name: str, rows: int):
+        f = self._files[name]
+        f.seek(0)
+        f.write(_npy_header(COLUMN_DTYPES[name].str, (rows, *self._shapes[name])))
+        f.seek(0, 2)
+
+    def close(self):
+        layout = {}
+        for name, f in self._files.items():
+            self._write_npy_header(name, self.rows)
+            f.close()
+            layout[name] = {
+                "file": f"{name}.npy",
+                "dtype": COLUMN_DTYPES[name].str,
+                "shape": [self.rows, *self._shapes[name]],
+            }
+        self._files = {}
+
+        with open(self.directory / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.exporter.header(layout, self.rows), f, ensure_ascii=False)
+
+    def abort(self):
+        """放弃写入：删除已写的列文件与（已不再对应的）头部，目录为本写入器所建时一并删除"""
+        for name, f in self._files.items():
+            f.close()
+            (self.directory / f"{name}.npy").unlink(missing_ok=True)
+        self._files = {}
+        (self.directory / HEADER_FILE).unlink(missing_ok=True)
+        if self._created_directory and not any(self.directory.iterdir()):
+            self.directory.rmdir()
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class ColumnarData:
+    """导出结果的读取视图：列为内存映射数组（.npz 为内存数组），文本按编码查表"""
+
+    def __init__(self, header: Dict[str, Any], columns: Dict[str, np.ndarray]):
+        self.header = header
+        self.columns = columns
+        self.strings = header["strings"]
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "ColumnarData":
+        """打开目录格式（零拷贝内存映射）或 .npz 文件"""
+        path = Path(path)
+        if path.is_dir():
+            with open(path / HEADER_FILE, encoding="utf-8") as f:
+                header = json.load(f)
+            columns = {
+                name: np.load(path / spec["file"], mmap_mode="r")
+                for name, spec in header["columns"].items()
+            }
+            return cls(header, columns)
+
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            columns = {name: data[name] for name in header["columns"]}
+        return cls(header, columns)
+
+    def __len__(self) -> int:
+        return self.header["rows"]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def text(self, column: str, row: int) -> str:
+        """某行的文本列内容"""
+        return self.strings[int(self.columns[column][row])]
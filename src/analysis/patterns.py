@@ -0,0 +1,122 @@
+"""
+Compiled special-pattern (格局) rule engine
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.models import BaZiChart, ElementStrength
+from core.tables import (
+    GAN_INDEX, ZHI_INDEX, ELEMENT_NAMES, ELEMENT_INDEX,
+    GAN_ELEMENT, ZHI_ELEMENT, GAN_YANG, ZHI_YANG, encode_chart
+)
+from data.loader import data_loader
+
+
+# 数值特征：名称 -> 特征向量中的列
+NUMERIC_FEATURES = ["yang_count"] + [
+    f"{prefix}.{element}"
+    for prefix in ("stem_count", "branch_count", "ratio")
+    for element in ELEMENT_NAMES
+]
+NUMERIC_COLUMNS = {name: i for i, name in enumerate(NUMERIC_FEATURES)}
+
+# 集合特征：名称 -> (列, 取值名称到序号的映射)
+SET_FEATURES = {
+    "day_stem": (0, GAN_INDEX),
+    "day_element": (1, ELEMENT_INDEX),
+    "month_branch": (2, ZHI_INDEX),
+}
+
+ELEMENT_RANGE = np.arange(len(ELEMENT_NAMES))
+
+
+class PatternEngine:
+    """格局规则引擎：将JSON规则编译为区间矩阵与位掩码矩阵，一次判定全部格局"""
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        if rules is None:
+            rules = data_loader.load_patterns_data()
+
+        self.patterns = rules["patterns"]
+        self.names = [pattern["name"] for pattern in self.patterns]
+        if len(self.names) > 64:
+            raise ValueError("格局规则最多支持64条")
+
+        self.lower, self.upper, self.set_masks = self._compile(self.patterns)
+        self.bits = np.left_shift(np.uint64(1), np.arange(len(self.names), dtype=np.uint64))
+
+    def _compile(self, patterns: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """编译规则：数值条件写入 (P, K) 上下界，集合条件写入 (P, S) 允许值位掩码"""
+        count = len(patterns)
+        lower = np.full((count, len(NUMERIC_FEATURES)), -np.inf)
+        upper = np.full((count, len(NUMERIC_FEATURES)), np.inf)
+        set_masks = np.full((count, len(SET_FEATURES)), -1, dtype=np.int64)
+
+        for p, pattern in enumerate(patterns):
+            for condition in pattern["conditions"]:
+                feature = condition["feature"]
+                if feature in NUMERIC_COLUMNS:
+                    column = NUMERIC_COLUMNS[feature]
+                    if "min" in condition:
+                        lower[p, column] = max(lower[p, column], condition["min"])
+                    if "max" in condition:
+                        upper[p, column] = min(upper[p, column], condition["max"])
+                elif feature in SET_FEATURES:
+                    column, values = SET_FEATURES[feature]
+                    mask = 0
+                    for value in condition["in"]:
+                        mask |= 1 << values[value]
+                    set_masks[p, column] &= mask
+                else:
+                    raise ValueError(f"格局 {pattern['name']} 使用了未知特征: {feature}")
+
+        return lower, upper, set_masks
+
+    def features(self, gans: np.ndarray, zhis: np.ndarray, elements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """由 (n, 4) 干支序号与 (n, 5) 五行力量计算数值特征与集合特征位"""
+        gans = np.asarray(gans)
+        zhis = np.asarray(zhis)
+        elements = np.asarray(elements, dtype=np.float64)
+
+        yang_count = GAN_YANG[gans].sum(axis=1) + ZHI_YANG[zhis].sum(axis=1)
+        stem_count = (GAN_ELEMENT[gans][:, :, None] == ELEMENT_RANGE).sum(axis=1)
+        branch_count = (ZHI_ELEMENT[zhis][:, :, None] == ELEMENT_RANGE).sum(axis=1)
+        total = elements.sum(axis=1, keepdims=True)
+        ratio = np.divide(elements, total, out=np.zeros_like(elements), where=total > 0)
+
+        numeric = np.column_stack([yang_count, stem_count, branch_count, ratio])
+
+        day_gan = gans[:, 2].astype(np.int64)
+        set_bits = np.column_stack([
+            np.left_shift(1, day_gan),
+            np.left_shift(1, GAN_ELEMENT[day_gan].astype(np.int64)),
+            np.left_shift(1, zhis[:, 1].astype(np.int64)),
+        ])
+
+        return numeric, set_bits
+
+    def evaluate_batch(self, gans: np.ndarray, zhis: np.ndarray, elements: np.ndarray) -> np.ndarray:
+        """批量判定格局，返回每个命盘的格局位掩码 (n,)"""
+        numeric, set_bits = self.features(gans, zhis, elements)
+
+        in_range = (
+            (numeric[:, None, :] >= self.lower) & (numeric[:, None, :] <= self.upper)
+        ).all(axis=2)
+        in_set = ((set_bits[:, None, :] & self.set_masks) != 0).all(axis=2)
+        matched = in_range & in_set
+
+        return (matched * self.bits).sum(axis=1, dtype=np.uint64)
+
+    def evaluate(self, chart: BaZiChart, element_strength: ElementStrength) -> int:
+        """判定单个命盘的格局位掩码"""
+        gans, zhis = encode_chart(chart)
+        elements = [
+            element_strength.wood, element_strength.fire, element_strength.earth,
+            element_strength.metal, element_strength.water
+        ]
+        return int(self.evaluate_batch([gans], [zhis], [elements])[0])
+
+    def pattern_names(self, mask: int) -> List[str]:
+        """格局位掩码转换为格局名称"""
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
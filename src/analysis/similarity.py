@@ -0,0 +1,276 @@
+"""
+Chart similarity index over element-strength vectors
+"""
+import json
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from core.batch import ChartBatch
+from core.models import BaZiChart, SimilarChart
+from core.tables import ganzhi_index
+
+
+# 索引文件格式：魔数 + 头部长度 + JSON头部 + 按64字节对齐的数组
+INDEX_MAGIC = b"BZSIMIDX"
+INDEX_VERSION = 1
+ARRAY_ALIGNMENT = 64
+
+# 网格坐标每维8位，五维合成一个整数键
+CELL_BITS = 8
+CELL_MAX = (1 << CELL_BITS) - 1
+CELL_SHIFTS = np.arange(5, dtype=np.int64) * CELL_BITS
+
+
+def _align(offset: int) -> int:
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+class SimilarityIndex:
+    """命盘相似度索引：五行力量向量量化到网格，按网格下界剪枝后精确重排
+
+    距离 = 五行力量欧氏距离 + pillar_weight × 四柱干支不同的柱数。
+    柱位项非负，网格单元到查询点的欧氏下界仍是距离下界，剪枝结果精确。
+    """
+
+    def __init__(self, cell_size: float = 8.0, pillar_weight: float = 5.0, merge_threshold: int = 65536):
+        if cell_size <= 0:
+            raise ValueError("网格边长必须为正数")
+        self.cell_size = float(cell_size)
+        self.pillar_weight = float(pillar_weight)
+        self.merge_threshold = merge_threshold
+        self._next_id = 0
+
+        # 主体：按网格键排序的行，每个非空网格占连续一段
+        self._ids = np.empty(0, dtype=np.int64)
+        self._elements = np.empty((0, 5), dtype=np.float32)
+        self._ganzhi = np.empty((0, 4), dtype=np.int8)
+        self._cell_keys = np.empty(0, dtype=np.int64)
+        self._cell_offsets = np.zeros(1, dtype=np.int64)
+        self._cell_lower = np.empty((0, 5), dtype=np.float32)
+
+        # 增量插入缓冲区，超过阈值时并入主体
+        self._pending_ids = np.empty(0, dtype=np.int64)
+        self._pending_elements = np.empty((0, 5), dtype=np.float32)
+        self._pending_ganzhi = np.empty((0, 4), dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._pending_ids)
+
+    def _cell_coords(self, elements: np.ndarray) -> np.ndarray:
+        coords = np.floor(elements / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, CELL_MAX)
+
+    def add(self, charts: Union[BaZiChart, ChartBatch], ids=None) -> np.ndarray:
+        """插入命盘，返回其编号（未指定时自动递增）"""
+        batch = ChartBatch.from_charts([charts]) if isinstance(charts, BaZiChart) else charts
+        count = len(batch)
+
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + count, dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+            if len(ids) != count:
+                raise ValueError("编号数量与命盘数量不一致")
+        if count:
+            self._next_id = max(self._next_id, int(ids.max()) + 1)
+
+        self._pending_ids = np.concatenate([self._pending_ids, ids])
+        self._pending_elements = np.concatenate([self._pending_elements, batch.elements])
+        self._pending_ganzhi = np.concatenate([
+            self._pending_ganzhi, ganzhi_index(batch.gans, batch.zhis).astype(np.int8)
+        ])
+
+        if len(self._pending_ids) >= self.merge_threshold:
+            self.merge()
+        return ids
+
+    def merge(self):
+        """将缓冲区并入主体并重建网格"""
+        if not len(self._pending_ids):
+            return
+
+        ids = np.concatenate([self._ids, self._pending_ids])
+        elements = np.concatenate([self._elements, self._pending_elements])
+        ganzhi = np.concatenate([self._ganzhi, self._pending_ganzhi])
+
+        keys = (self._cell_coords(elements) << CELL_SHIFTS).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+
+        self._ids = ids[order]
+        self._elements = elements[order]
+        self._ganzhi = ganzhi[order]
+        self._set_cells(keys)
+
+        self._pending_ids = np.empty(0, dtype=np.int64)
+        self._pending_elements = np.empty((0, 5), dtype=np.float32)
+        self._pending_ganzhi = np.empty((0, 4), dtype=np.int8)
+
+    def _set_cells(self, sorted_keys: np.ndarray):
+        starts = np.flatnonzero(np.diff(sorted_keys, prepend=-1))
+        self._cell_keys = sorted_keys[starts]
+        self._cell_offsets = np.append(starts, len(sorted_keys)).astype(np.int64)
+        self._set_cell_lower()
+
+    def _set_cell_lower(self):
+        coords = (np.asarray(self._cell_keys)[:, None] >> CELL_SHIFTS) & CELL_MAX
+        self._cell_lower = (coords * self.cell_size).astype(np.float32)
+
+    def _cell_bounds(self, elements: np.ndarray) -> np.ndarray:
+        """查询点到各非空网格的距离下界"""
+        lower = self._cell_lower
+        upper = lower + self.cell_size
+        # 末格被截断，实际延伸到无穷远
+        upper = np.where(lower >= CELL_MAX * self.cell_size, np.inf, upper)
+        gap = np.maximum(np.maximum(lower - elements, elements - upper), 0)
+        return np.sqrt((gap * gap).sum(axis=1))
+
+    def _distances(self, elements: np.ndarray, ganzhi: np.ndarray, rows_elements: np.ndarray, rows_ganzhi: np.ndarray) -> np.ndarray:
+        diff = rows_elements - elements
+        distance = np.sqrt((diff * diff).sum(axis=1))
+        if self.pillar_weight:
+            distance += self.pillar_weight * (rows_ganzhi != ganzhi).sum(axis=1)
+        return distance
+
+    def _rows(self, cells: np.ndarray) -> np.ndarray:
+        starts = self._cell_offsets[cells]
+        ends = self._cell_offsets[cells + 1]
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts.tolist(), ends.tolist())])
+
+    def _encode_query(self, chart: Union[BaZiChart, ChartBatch]) -> Tuple[np.ndarray, np.ndarray]:
+        batch = ChartBatch.from_charts([chart]) if isinstance(chart, BaZiChart) else chart[:1]
+        return batch.elements[0], ganzhi_index(batch.gans[0], batch.zhis[0]).astype(np.int8)
+
+    @staticmethod
+    def _results(ids: np.ndarray, distances: np.ndarray) -> List[SimilarChart]:
+        order = np.argsort(distances, kind="stable")
+        return [
+            SimilarChart(id=int(ids[i]), distance=round(float(distances[i]), 4))
+            for i in order
+        ]
+
+    def knn(self, chart: Union[BaZiChart, ChartBatch], k: int = 10) -> List[SimilarChart]:
+        """最相似的k个命盘，按距离升序"""
+        elements, ganzhi = self._encode_query(chart)
+        if k <= 0:
+            return []
+
+        best_ids = self._pending_ids
+        best_distances = self._distances(elements, ganzhi, self._pending_elements, self._pending_ganzhi)
+
+        bounds = self._cell_bounds(elements)
+        order = np.argsort(bounds)
+        position = 0
+        step = 16
+        while position < len(order):
+            cells = order[position:position + step]
+            if len(best_ids) >= k and bounds[cells[0]] > best_distances.max():
+                break
+
+            rows = self._rows(cells)
+            distances = self._distances(elements, ganzhi, self._elements[rows], self._ganzhi[rows])
+            best_ids = np.concatenate([best_ids, self._ids[rows]])
+            best_distances = np.concatenate([best_distances, distances])
+
+            if len(best_ids) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_ids = best_ids[keep]
+                best_distances = best_distances[keep]
+
+            position += step
+            step *= 2
+
+        if len(best_ids) > k:
+            keep = np.argpartition(best_distances, k - 1)[:k]
+            best_ids = best_ids[keep]
+            best_distances = best_distances[keep]
+        return self._results(best_ids, best_distances)
+
+    def radius(self, chart: Union[BaZiChart, ChartBatch], radius: float) -> List[SimilarChart]:
+        """距离不超过radius的全部命盘，按距离升序"""
+        elements, ganzhi = self._encode_query(chart)
+
+        ids = [self._pending_ids]
+        distances = [self._distances(elements, ganzhi, self._pending_elements, self._pending_ganzhi)]
+
+        cells = np.flatnonzero(self._cell_bounds(elements) <= radius)
+        if len(cells):
+            rows = self._rows(cells)
+            ids.append(self._ids[rows])
+            distances.append(self._distances(elements, ganzhi, self._elements[rows], self._ganzhi[rows]))
+
+        ids = np.concatenate(ids)
+        distances = np.concatenate(distances)
+        within = distances <= radius
+        return self._results(ids[within], distances[within])
+
+    def save(self, path: Union[str, Path]):
+        """写入索引文件（先并入缓冲区），可用 load 以内存映射方式打开"""
+        self.merge()
+        arrays = {
+            "ids": self._ids,
+            "elements": self._elements,
+            "ganzhi": self._ganzhi,
+            "cell_keys": self._cell_keys,
+            "cell_offsets": self._cell_offsets,
+        }
+
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+
+        header = json.dumps({
+            "version": INDEX_VERSION,
+            "cell_size": self.cell_size,
+            "pillar_weight": self.pillar_weight,
+            "next_id": self._next_id,
+            "arrays": layout
+        }, ensure_ascii=False).encode("utf-8")
+        data_start = _align(len(INDEX_MAGIC) + 8 + len(header))
+
+        with open(path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], merge_threshold: int = 65536) -> "SimilarityIndex":
+        """以只读内存映射方式打开索引文件，无需重建；之后插入的命盘进入缓冲区"""
+        with open(path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"不是相似度索引文件: {path}")
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        if header["version"] != INDEX_VERSION:
+            raise ValueError(f"不支持的索引版本: {header['version']}")
+
+        index = cls(header["cell_size"], header["pillar_weight"], merge_threshold)
+        index._next_id = header["next_id"]
+
+        data_start = _align(len(INDEX_MAGIC) + 8 + header_size)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            if not np.prod(shape):
+                arrays[name] = np.empty(shape, dtype=spec["dtype"])
+                continue
+            arrays[name] = np.memmap(
+                path, dtype=spec["dtype"], mode="r",
+                offset=data_start + spec["offset"], shape=shape
+            )
+
+        index._ids = arrays["ids"]
+        index._elements = arrays["elements"]
+        index._ganzhi = arrays["ganzhi"]
+        index._cell_keys = arrays["cell_keys"]
+        index._cell_offsets = np.asarray(arrays["cell_offsets"])
+        index._set_cell_lower()
+        return index
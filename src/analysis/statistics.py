@@ -0,0 +1,161 @@
+"""
+Streaming population statistics over birth-time ranges
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from analysis.patterns import PatternEngine
+from core.batch import ChartBatch
+from core.calendar import TABLE_TIMEZONE, to_seconds
+from core.tables import ELEMENT_NAMES, GAN_NAMES, GANZHI_NAMES, PILLAR_NAMES
+
+
+# 五行占比直方图的分箱数（区间 [0, 1] 等分）
+RATIO_BINS = 20
+
+
+class PopulationStats:
+    """可合并的总体统计：只保存计数与直方图，不保留逐个命盘
+
+    不同进程各自统计的结果可用 merge（或 +）合并，
+    to_dict / from_dict 用于跨进程传递或落盘。
+    """
+
+    def __init__(self, pattern_names: List[str]):
+        self.pattern_names = list(pattern_names)
+        self.count = 0
+        # 日主（日干）分布
+        self.day_master = np.zeros(len(GAN_NAMES), dtype=np.int64)
+        # 四柱各自的六十甲子分布
+        self.pillar_ganzhi = np.zeros((len(PILLAR_NAMES), len(GANZHI_NAMES)), dtype=np.int64)
+        # 最旺五行分布
+        self.dominant_element = np.zeros(len(ELEMENT_NAMES), dtype=np.int64)
+        # 各五行力量占比的直方图
+        self.element_ratio = np.zeros((len(ELEMENT_NAMES), RATIO_BINS), dtype=np.int64)
+        # 各格局出现次数，末位为无特殊格局
+        self.patterns = np.zeros(len(self.pattern_names) + 1, dtype=np.int64)
+
+    def _check_compatible(self, other: "PopulationStats"):
+        if self.pattern_names != other.pattern_names:
+            raise ValueError("格局规则不一致的统计结果不能合并")
+
+    def merge(self, other: "PopulationStats") -> "PopulationStats":
+        """就地合并另一份统计结果"""
+        self._check_compatible(other)
+        self.count += other.count
+        self.day_master += other.day_master
+        self.pillar_ganzhi += other.pillar_ganzhi
+        self.dominant_element += other.dominant_element
+        self.element_ratio += other.element_ratio
+        self.patterns += other.patterns
+        return self
+
+    def __add__(self, other: "PopulationStats") -> "PopulationStats":
+        result = PopulationStats(self.pattern_names)
+        return result.merge(self).merge(other)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return {
+            "pattern_names": self.pattern_names,
+            "count": self.count,
+            "day_master": self.day_master.tolist(),
+            "pillar_ganzhi": self.pillar_ganzhi.tolist(),
+            "dominant_element": self.dominant_element.tolist(),
+            "element_ratio": self.element_ratio.tolist(),
+            "patterns": self.patterns.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PopulationStats":
+        stats = cls(data["pattern_names"])
+        stats.count = data["count"]
+        stats.day_master = np.array(data["day_master"], dtype=np.int64)
+        stats.pillar_ganzhi = np.array(data["pillar_ganzhi"], dtype=np.int64)
+        stats.dominant_element = np.array(data["dominant_element"], dtype=np.int64)
+        stats.element_ratio = np.array(data["element_ratio"], dtype=np.int64)
+        stats.patterns = np.array(data["patterns"], dtype=np.int64)
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """按名称整理的分布（占比）"""
+        total = max(self.count, 1)
+        return {
+            "count": self.count,
+            "day_master": {
+                name: round(int(n) / total, 6) for name, n in zip(GAN_NAMES, self.day_master)
+            },
+            "dominant_element": {
+                name: round(int(n) / total, 6) for name, n in zip(ELEMENT_NAMES, self.dominant_element)
+            },
+            "patterns": {
+                name: round(int(n) / total, 6)
+                for name, n in zip(self.pattern_names + ["无"], self.patterns)
+            },
+        }
+
+
+class PopulationAggregator:
+    """按时间范围分块遍历出生时刻，向量化排盘并累加到统计结果"""
+
+    def __init__(
+        self,
+        step_seconds: int = 3600,
+        chunk_size: int = 65536,
+        engine: Optional[PatternEngine] = None,
+        timezone_offset: float = TABLE_TIMEZONE,
+        longitude: Optional[float] = None
+    ):
+        if step_seconds <= 0:
+            raise ValueError("时间步长必须为正数")
+        self.step_seconds = step_seconds
+        self.chunk_size = chunk_size
+        self.engine = engine or PatternEngine()
+        self.timezone_offset = timezone_offset
+        self.longitude = longitude
+
+    def new_stats(self) -> PopulationStats:
+        return PopulationStats(self.engine.names)
+
+    def update(self, stats: PopulationStats, batch: ChartBatch):
+        """将一批命盘累加到统计结果"""
+        count = len(batch)
+        if not count:
+            return
+
+        stats.count += count
+        stats.day_master += np.bincount(batch.gans[:, 2], minlength=len(GAN_NAMES))
+
+        ganzhi = batch.ganzhi
+        for pillar in range(len(PILLAR_NAMES)):
+            stats.pillar_ganzhi[pillar] += np.bincount(ganzhi[:, pillar], minlength=len(GANZHI_NAMES))
+
+        elements = batch.elements
+        stats.dominant_element += np.bincount(elements.argmax(axis=1), minlength=len(ELEMENT_NAMES))
+
+        bins = np.minimum((batch.ratios * RATIO_BINS).astype(np.int64), RATIO_BINS - 1)
+        for element in range(len(ELEMENT_NAMES)):
+            stats.element_ratio[element] += np.bincount(bins[:, element], minlength=RATIO_BINS)
+
+        masks = self.engine.evaluate_batch(batch.gans, batch.zhis, elements)
+        bits = (masks[:, None] >> np.arange(len(stats.pattern_names), dtype=np.uint64)) & np.uint64(1)
+        stats.patterns[:-1] += bits.sum(axis=0).astype(np.int64)
+        stats.patterns[-1] += int((masks == 0).sum())
+
+    def iter_chunks(self, start: datetime, end: datetime) -> Iterator[ChartBatch]:
+        """按块产出 [start, end) 内每个时间步的命盘批次"""
+        first = to_seconds(start)
+        last = to_seconds(end)
+        span = self.step_seconds * self.chunk_size
+        for chunk_start in range(first, last, span):
+            seconds = np.arange(chunk_start, min(chunk_start + span, last), self.step_seconds, dtype=np.int64)
+            yield ChartBatch.from_seconds(seconds, self.timezone_offset, self.longitude)
+
+    def aggregate(self, start: datetime, end: datetime) -> PopulationStats:
+        """统计 [start, end) 内按时间步取样的全部出生时刻"""
+        stats = self.new_stats()
+        for batch in self.iter_chunks(start, end):
+            self.update(stats, batch)
+        return stats
@@ -0,0 +1,180 @@
+"""
+Interned text tables compiled from the monthly and hour analysis corpora
+"""
+import threading
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.shared import attached_array
+from core.tables import GAN_NAMES, GANZHI_NAMES
+from data.loader import DataLoader, data_loader
+
+
+# 季节名称，下标为季节序号
+SEASON_NAMES = ["春月", "夏月", "秋月", "冬月"]
+# 月支对应的季节序号（寅卯辰春、巳午未夏、申酉戌秋、亥子丑冬）
+ZHI_SEASON = np.array([3, 3, 0, 0, 0, 1, 1, 1, 2, 2, 2, 3], dtype=np.int8)
+SEASON_OF_ZHI = ZHI_SEASON.tolist()
+
+
+# 热重载数据表名及其依赖的数据文件
+TEXTS_TABLE = "analysis_texts"
+TEXTS_FILES = ["monthly_analysis.json", "time_analysis.json"]
+
+# 文本表写入共享内存的数组：文本字节、起止偏移、月令与时辰编码表
+SHARED_TEXT_ARRAYS = ("text_data", "text_offsets", "monthly_text_codes", "time_text_codes")
+
+
+def _load_corpus(loader: DataLoader, filename: str, key: str) -> Dict:
+    try:
+        return loader.load_json(filename).get(key, {})
+    except FileNotFoundError:
+        return {}
+
+
+class SharedStrings(Sequence):
+    """共享内存中的文本表：UTF-8 字节串与各文本的起止偏移，取用时才解码
+
+    解码结果在本进程缓存，未用到的文本不占本进程内存。
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = memoryview(data)
+        self._offsets = memoryview(offsets)
+        self._decoded: List[Optional[str]] = [None] * (len(offsets) - 1)
+
+    def __len__(self) -> int:
+        return len(self._decoded)
+
+    def __getitem__(self, code):
+        if isinstance(code, slice):
+            return [self[i] for i in range(*code.indices(len(self)))]
+        text = self._decoded[code]
+        if text is None:
+            code = range(len(self))[code]
+            text = str(self._data[self._offsets[code]:self._offsets[code + 1]], "utf-8")
+            self._decoded[code] = text
+        return text
+
+
+def encode_strings(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """文本表编码为 UTF-8 字节数组与 (len + 1,) 起止偏移数组，供 SharedStrings 读取"""
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class AnalysisTexts:
+    """月令、时辰分析文本表：加载时生成最终文本并去重，按整数编码查询
+
+    monthly_codes[日干, 季节] 与 time_codes[日柱, 时柱] 均为 strings 中的下标。
+    strings 可以是本进程的列表，也可以是共享内存中的 SharedStrings（见 shared）；
+    后者在首次登记新文本时才转为本进程的列表。
+    """
+
+    def __init__(self, strings: Sequence[str], monthly_codes: np.ndarray, time_codes: np.ndarray):
+        self.strings = strings
+        self.monthly_codes = monthly_codes
+        self.time_codes = time_codes
+        # 文本 -> 编码，首次登记时才建立
+        self._codes: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, monthly_data: Dict, time_data: Dict) -> "AnalysisTexts":
+        """由月令、时辰分析语料生成最终文本并编码"""
+        texts = cls([], np.zeros((len(GAN_NAMES), len(SEASON_NAMES)), dtype=np.int32),
+                    np.zeros((len(GANZHI_NAMES), len(GANZHI_NAMES)), dtype=np.int32))
+
+        for gan, gan_name in enumerate(GAN_NAMES):
+            gan_data = monthly_data.get(gan_name, {})
+            for season, season_name in enumerate(SEASON_NAMES):
+                season_data = gan_data.get(season_name)
+                if season_data:
+                    text = f"{season_data['title']}: {season_data['analysis']}"
+                else:
+                    text = f"{gan_name}日生于{season_name}月，需要根据具体情况分析。"
+                texts.monthly_codes[gan, season] = texts.intern(text)
+
+        for day, day_name in enumerate(GANZHI_NAMES):
+            day_gan_name = day_name[0]
+            for hour, hour_name in enumerate(GANZHI_NAMES):
+                specific_data = time_data.get(f"{day_gan_name}日{hour_name}")
+                if specific_data:
+                    text = specific_data["analysis"]
+                    specific_combo = specific_data.get("specific_combinations", {}).get(f"{day_name}日{hour_name}时")
+                    if specific_combo:
+                        text += f" 具体组合：{specific_combo}"
+                else:
+                    text = f"{day_gan_name}日{hour_name}时，需要根据具体情况分析。"
+                texts.time_codes[day, hour] = texts.intern(text)
+
+        return texts
+
+    @classmethod
+    def load(cls, loader: Optional[DataLoader] = None) -> "AnalysisTexts":
+        """从 monthly_analysis.json 与 time_analysis.json 编译"""
+        loader = loader or data_loader
+        return cls.compile(
+            _load_corpus(loader, "monthly_analysis.json", "monthly_analysis"),
+            _load_corpus(loader, "time_analysis.json", "time_analysis")
+        )
+
+    @classmethod
+    def shared(cls) -> Optional["AnalysisTexts"]:
+        """本进程已挂载共享表时，取用其中父进程编译好的文本表；否则返回 None"""
+        arrays = [attached_array(name) for name in SHARED_TEXT_ARRAYS]
+        if any(array is None for array in arrays):
+            return None
+        data, offsets, monthly_codes, time_codes = arrays
+        return cls(SharedStrings(data, offsets), monthly_codes, time_codes)
+
+    def shared_arrays(self) -> Dict[str, np.ndarray]:
+        """写入共享内存的数组（名称见 SHARED_TEXT_ARRAYS）"""
+        data, offsets = encode_strings(self.strings)
+        return dict(zip(SHARED_TEXT_ARRAYS, (data, offsets, self.monthly_codes, self.time_codes)))
+
+    def intern(self, text: str) -> int:
+        """登记文本并返回其编码，相同文本共用一个编码"""
+        codes = self._codes
+        code = codes.get(text) if codes is not None else None
+        if code is None:
+            with self._lock:
+                if self._codes is None:
+                    self.strings = list(self.strings)
+                    self._codes = {string: i for i, string in enumerate(self.strings)}
+                code = self._codes.get(text)
+                if code is None:
+                    code = len(self.strings)
+                    self.strings.append(text)
+                    self._codes[text] = code
+        return code
+
+    def merge(self, other: "AnalysisTexts"):
+        """并入重建后的文本表：新文本追加登记，编码表改指新版本；已发出的编码含义不变"""
+        remap = np.array([self.intern(text) for text in other.strings], dtype=np.int32)
+        self.monthly_codes = remap[other.monthly_codes]
+        self.time_codes = remap[other.time_codes]
+
+    def monthly_code(self, day_gan, month_zhi):
+        """月令分析文本编码，支持数组"""
+        return self.monthly_codes[day_gan, ZHI_SEASON[month_zhi]]
+
+    def time_code(self, day_ganzhi, hour_ganzhi):
+        """时辰分析文本编码，支持数组"""
+        return self.time_codes[day_ganzhi, hour_ganzhi]
+
+    def monthly_text(self, day_gan: int, month_zhi: int) -> str:
+        """月令分析文本"""
+        return self.strings[self.monthly_codes[day_gan, SEASON_OF_ZHI[month_zhi]]]
+
+    def time_text(self, day_ganzhi: int, hour_ganzhi: int) -> str:
+        """时辰分析文本（日柱已确定日干，故以日柱、时柱序号定位）"""
+        return self.strings[self.time_codes[day_ganzhi, hour_ganzhi]]
+
+
+# 登记为可热重载的数据表：文本文件修改后在后台重新编译，分析器取用最新版本
+data_loader.register_table(TEXTS_TABLE, TEXTS_FILES, AnalysisTexts.load, initial=AnalysisTexts.shared())
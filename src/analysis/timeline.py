@@ -0,0 +1,111 @@
+"""
+Streaming 流年/流月 timeline
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.calendar import SOLAR_TERMS, from_seconds
+from core.models import BaZiChart, FortuneEntry
+from core.relations import GAN_RELATION_LABELS, ZHI_RELATION_LABELS
+from core.tables import (
+    GANZHI_NAMES, PILLAR_NAMES, TEN_GOD_NAMES, TEN_GODS, ZHI_MAIN_GAN, encode_chart
+)
+
+
+class FortuneTimeline:
+    """流年、流月时间线：按需逐条生成，支持按年份直接定位"""
+
+    def __init__(self, chart: BaZiChart):
+        self.gans, self.zhis = encode_chart(chart)
+        self.day_gan = self.gans[2]
+        # 干支对原局的分析只取决于六十甲子序号，最多60种，按需缓存
+        self._analysis_cache: Dict[int, Tuple[str, str, List[str]]] = {}
+
+    @property
+    def first_year(self) -> int:
+        return SOLAR_TERMS.first_year
+
+    @property
+    def last_year(self) -> int:
+        # 末年流月需要次年小寒，故可用范围止于节令表末年的前一年
+        return SOLAR_TERMS.last_year - 1
+
+    def _check_year(self, year: int):
+        if not self.first_year <= year <= self.last_year:
+            raise ValueError(f"年份超出范围（{self.first_year}-{self.last_year}年）")
+
+    def _analyze(self, index: int) -> Tuple[str, str, List[str]]:
+        """干支对日主的十神及与原局四柱的关系"""
+        cached = self._analysis_cache.get(index)
+        if cached is not None:
+            return cached
+
+        gan = index % 10
+        zhi = index % 12
+        interactions = []
+        for pillar, (natal_gan, natal_zhi) in enumerate(zip(self.gans, self.zhis)):
+            gan_label = GAN_RELATION_LABELS[gan][natal_gan]
+            if gan_label:
+                interactions.append(f"{PILLAR_NAMES[pillar]}干{gan_label}")
+            zhi_label = ZHI_RELATION_LABELS[zhi][natal_zhi]
+            if zhi_label:
+                interactions.append(f"{PILLAR_NAMES[pillar]}支{zhi_label}")
+
+        cached = (
+            TEN_GOD_NAMES[TEN_GODS[self.day_gan, gan]],
+            TEN_GOD_NAMES[TEN_GODS[self.day_gan, ZHI_MAIN_GAN[zhi]]],
+            interactions
+        )
+        self._analysis_cache[index] = cached
+        return cached
+
+    def _entry(self, year: int, month: Optional[int], index: int, position: int) -> FortuneEntry:
+        ten_god, zhi_ten_god, interactions = self._analyze(index)
+        return FortuneEntry(
+            year=year,
+            month=month,
+            start=from_seconds(SOLAR_TERMS.jie_seconds[position]),
+            gan_zhi=GANZHI_NAMES[index],
+            ten_god=ten_god,
+            zhi_ten_god=zhi_ten_god,
+            interactions=list(interactions)
+        )
+
+    def year(self, year: int) -> FortuneEntry:
+        """直接定位某一流年"""
+        self._check_year(year)
+        return self._entry(year, None, (year - 4) % 60, SOLAR_TERMS.lichun_position(year))
+
+    def month(self, year: int, month: int) -> FortuneEntry:
+        """直接定位某一流月（1为寅月，12为次年丑月）"""
+        self._check_year(year)
+        if not 1 <= month <= 12:
+            raise ValueError("流月序号应为1-12")
+        index = (12 * year + 13 + month) % 60
+        return self._entry(year, month, index, SOLAR_TERMS.lichun_position(year) + month - 1)
+
+    def iter_years(self, start_year: int, end_year: Optional[int] = None) -> Iterator[FortuneEntry]:
+        """从某年起逐年产出流年"""
+        end_year = self.last_year if end_year is None else end_year
+        self._check_year(start_year)
+        self._check_year(end_year)
+
+        index = (start_year - 4) % 60
+        position = SOLAR_TERMS.lichun_position(start_year)
+        for year in range(start_year, end_year + 1):
+            yield self._entry(year, None, index, position)
+            index = (index + 1) % 60
+            position += 12
+
+    def iter_months(self, start_year: int, end_year: Optional[int] = None) -> Iterator[FortuneEntry]:
+        """从某年寅月起逐月产出流月"""
+        end_year = self.last_year if end_year is None else end_year
+        self._check_year(start_year)
+        self._check_year(end_year)
+
+        index = (12 * start_year + 14) % 60
+        position = SOLAR_TERMS.lichun_position(start_year)
+        for year in range(start_year, end_year + 1):
+            for month in range(1, 13):
+                yield self._entry(year, month, index, position)
+                index = (index + 1) % 60
+                position += 1
@@ -3,6 +3,7 @@ Command line interface for BaZi analyzer
 """
 import click
 from datetime import datetime
+from itertools import islice
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -10,7 +11,10 @@ from rich.text import Text
 
 from core.calculator import BaZiCalculator
 from analysis.analyzer import BaZiAnalyzer
+from analysis.date_selector import DateSelector
+from analysis.export import ColumnExporter
 from utils.helpers import BaZiUtils, ColorUtils
+from utils.serializer import dumps_result
 
 
 console = Console()
@@ -29,9 +33,11 @@ def cli():
 @click.option('--hour', '-h', type=int, default=12, help='出生小时 (0-23)')
 @click.option('--minute', type=int, default=0, help='出生分钟')
 @click.option('--male/--female', default=True, help='性别 (默认男性)')
-@click.option('--timezone', type=int, default=8, help='时区偏移 (默认东八区)')
+@click.option('--timezone', type=float, default=8, help='时区偏移 (默认东八区)')
+@click.option('--longitude', type=float, default=None, help='出生地经度，给出时按真太阳时排日时柱')
 @click.option('--detailed', '-v', is_flag=True, help='显示详细分析')
-def analyze(year, month, day, hour, minute, male, timezone, detailed):
+@click.option('--json', 'as_json', is_flag=True, help='以紧凑JSON输出分析结果')
+def analyze(year, month, day, hour, minute, male, timezone, longitude, detailed, as_json):
     """分析八字命盘"""
     try:
         # 创建出生时间
@@ -39,20 +45,24 @@ def analyze(year, month, day, hour, minute, male, timezone, detailed):
         
         # 计算八字
         calculator = BaZiCalculator()
-        chart = calculator.calculate_bazi_from_datetime(birth_datetime, male, timezone)
+        chart = calculator.calculate_bazi_from_datetime(birth_datetime, male, timezone, longitude)
         
         # 分析八字
         analyzer = BaZiAnalyzer()
         result = analyzer.analyze_chart(chart)
         
+        if as_json:
+            click.echo(dumps_result(result).decode("utf-8"))
+            return
+        
         # 显示结果
-        display_analysis_result(result, detailed)
+        display_analysis_result(result, detailed, analyzer)
         
     except Exception as e:
         console.print(f"[red]错误: {str(e)}[/red]")
 
 
-def display_analysis_result(result, detailed=False):
+def display_analysis_result(result, detailed=False, analyzer=None):
     """显示分析结果"""
     chart = result.chart
     
@@ -60,7 +70,7 @@ def display_analysis_result(result, detailed=False):
     console.print(Panel.fit(
         f"性别: {'男' if chart.birth_info.get('is_male', True) else '女'}\n"
         f"阳历: {chart.birth_info.get('solar_date', '').split('T')[0]}\n"
-        f"农历: {chart.birth_info.get('lunar_date', '')}",
+        f"农历: {chart.lunar_date or ''}",
         title="[bold blue]出生信息[/bold blue]"
     ))
     
@@ -72,7 +82,7 @@ def display_analysis_result(result, detailed=False):
     
     if detailed:
         # 显示十神分析
-        display_ten_gods_analysis(result.ten_gods_analysis)
+        display_ten_gods_analysis(result.ten_gods_analysis, analyzer or BaZiAnalyzer())
         
         # 显示特殊格局
         if result.special_patterns:
@@ -81,6 +91,16 @@ def display_analysis_result(result, detailed=False):
                 title="[bold yellow]特殊格局[/bold yellow]"
             ))
         
+        # 显示刑冲合害
+        if result.interactions:
+            console.print(Panel(
+                "\n".join(result.interactions),
+                title="[bold magenta]刑冲合害[/bold magenta]"
+            ))
+        
+        # 显示大运
+        display_luck_pillars(result.luck_pillars)
+        
         # 显示月令分析
         if result.monthly_analysis:
             console.print(Panel(
@@ -110,9 +130,70 @@ def display_analysis_result(result, detailed=False):
         ))
 
 
+@cli.command()
+@click.option('--year', '-y', type=int, required=True, help='出生年份')
+@click.option('--month', '-m', type=int, required=True, help='出生月份')
+@click.option('--day', '-d', type=int, required=True, help='出生日期')
+@click.option('--male/--female', default=True, help='性别 (默认男性)')
+def hours(year, month, day, male):
+    """出生时辰不详时，对比十二个时辰的候选命盘"""
+    try:
+        analyzer = BaZiAnalyzer()
+        result = analyzer.analyze_hour_variants(datetime(year, month, day).date(), male)
+        
+        console.print(Panel.fit(
+            f"年柱: {result.year_pillar}  月柱: {result.month_pillar}  日柱: {result.day_pillar}\n"
+            f"{result.monthly_analysis or ''}",
+            title="[bold blue]共用三柱[/bold blue]"
+        ))
+        
+        # 当日交节时，节前或节后的时辰另取年、月柱
+        shared = [result.year_pillar, result.month_pillar]
+        crossing = [variant for variant in result.variants if variant.pillars[:2] != shared]
+        
+        table = Table(title="十二时辰对比")
+        table.add_column("时辰", style="cyan", no_wrap=True)
+        if crossing:
+            table.add_column("年月柱", style="magenta")
+        table.add_column("时柱", style="magenta")
+        table.add_column("时干十神", style="green")
+        for name in ("木", "火", "土", "金", "水"):
+            table.add_column(name, style="yellow")
+        table.add_column("时辰分析")
+        
+        for variant in result.variants:
+            strength = variant.element_strength
+            table.add_row(
+                f"{variant.hour_zhi} ({variant.time_range})",
+                *([" ".join(variant.pillars[:2])] if crossing else []),
+                variant.pillars[3],
+                next(iter(variant.ten_gods.values()), ""),
+                *[f"{value:.0f}" for value in (
+                    strength.wood, strength.fire, strength.earth, strength.metal, strength.water
+                )],
+                variant.time_analysis or ""
+            )
+        
+        console.print(table)
+        
+        if crossing:
+            variant = crossing[0]
+            console.print(Panel.fit(
+                f"{'、'.join(item.hour_zhi for item in crossing)}时 年柱: {variant.pillars[0]}  "
+                f"月柱: {variant.pillars[1]}\n{variant.monthly_analysis or ''}",
+                title="[bold blue]当日交节[/bold blue]"
+            ))
+        
+    except Exception as e:
+        console.print(f"[red]错误: {str(e)}[/red]")
+
+
 def display_chart(chart):
     """显示八字排盘"""
-    table = Table(title="八字排盘")
+    table = Table(
+        title="八字排盘",
+        caption=f"日柱旬空: {chart.day_pillar.gan_zhi.xun_kong}"
+    )
     
     table.add_column("柱", style="cyan", no_wrap=True)
     table.add_column("天干", style="magenta")
@@ -120,17 +201,11 @@ def display_chart(chart):
     table.add_column("纳音", style="yellow")
     
     for pillar in chart.all_pillars:
-        gan = pillar.gan_zhi.gan.name
-        zhi = pillar.gan_zhi.zhi.name
-        
-        # 简化的纳音计算（实际需要更复杂的算法）
-        nayin = "待实现"
-        
         table.add_row(
             f"{pillar.pillar_type}柱",
-            gan,
-            zhi,
-            nayin
+            pillar.gan_zhi.gan.name,
+            pillar.gan_zhi.zhi.name,
+            pillar.gan_zhi.nayin
         )
     
     console.print(table)
@@ -160,7 +235,7 @@ def display_element_analysis(element_strength):
     console.print(table)
 
 
-def display_ten_gods_analysis(ten_gods_analysis):
+def display_ten_gods_analysis(ten_gods_analysis, analyzer):
     """显示十神分析"""
     if not ten_gods_analysis:
         return
@@ -168,13 +243,110 @@ def display_ten_gods_analysis(ten_gods_analysis):
     table = Table(title="十神分析")
     table.add_column("位置", style="cyan")
     table.add_column("十神", style="magenta")
+    table.add_column("含义", style="green")
     
     for position, ten_god in ten_gods_analysis.items():
-        table.add_row(position, ten_god)
+        info = analyzer.describe_ten_god(ten_god)
+        table.add_row(position, ten_god, info.description if info else "")
     
     console.print(table)
 
 
+def display_luck_pillars(luck_pillars):
+    """显示大运"""
+    if not luck_pillars:
+        return
+    
+    table = Table(title=f"大运（{luck_pillars[0].start_age:.1f}岁起运）")
+    table.add_column("大运", style="cyan")
+    table.add_column("纳音", style="yellow")
+    table.add_column("起运岁数", style="magenta")
+    table.add_column("年份", style="green")
+    
+    for luck in luck_pillars:
+        table.add_row(
+            luck.gan_zhi.name,
+            luck.gan_zhi.nayin,
+            f"{luck.start_age:.1f}",
+            f"{luck.start_year}-{luck.end_year}"
+        )
+    
+    console.print(table)
+
+
+@cli.command()
+@click.option('--activity', '-a', required=True, help='活动 (如 嫁娶、出行)')
+@click.option('--start', '-s', type=click.DateTime(formats=["%Y-%m-%d"]), required=True, help='开始日期 (YYYY-MM-DD)')
+@click.option('--end', '-e', type=click.DateTime(formats=["%Y-%m-%d"]), required=True, help='结束日期 (YYYY-MM-DD)')
+@click.option('--limit', '-n', type=int, default=20, help='最多显示天数 (默认20)')
+def select_date(activity, start, end, limit):
+    """择日：列出适宜某项活动的日子"""
+    try:
+        selector = DateSelector()
+        days = selector.select(activity, start.date(), end.date())
+        
+        table = Table(title=f"{activity}择日")
+        table.add_column("日期", style="cyan")
+        table.add_column("日柱", style="magenta")
+        table.add_column("建除", style="green")
+        table.add_column("星宿", style="yellow")
+        
+        for day in islice(days, limit):
+            table.add_row(
+                day.solar_date.isoformat(),
+                day.day_gan_zhi,
+                day.jianchu,
+                day.xingxiu
+            )
+        
+        console.print(table)
+        
+    except Exception as e:
+        console.print(f"[red]错误: {str(e)}[/red]")
+
+
+@cli.command()
+@click.option('--start', '-s', type=click.DateTime(formats=["%Y-%m-%d"]), required=True, help='开始日期 (YYYY-MM-DD)')
+@click.option('--end', '-e', type=click.DateTime(formats=["%Y-%m-%d"]), required=True, help='结束日期 (YYYY-MM-DD，不含)')
+@click.option('--output', '-o', type=click.Path(file_okay=False), required=True, help='输出目录')
+@click.option('--step', type=int, default=3600, help='取样间隔秒数 (默认3600)')
+def export(start, end, output, step):
+    """批量排盘并按列导出（每列一个 .npy 文件，可内存映射读取）"""
+    try:
+        rows = ColumnExporter().export_range(output, start, end, step)
+        console.print(f"[green]已导出 {rows} 行到 {output}[/green]")
+        
+    except Exception as e:
+        console.print(f"[red]错误: {str(e)}[/red]")
+
+
+@cli.command()
+@click.argument('pillars', nargs=4)
+def reverse(pillars):
+    """八字反推：列出1800-2200年间产生该四柱的出生时间 (如: 庚午 辛巳 庚辰 癸未)"""
+    try:
+        calculator = BaZiCalculator()
+        windows = calculator.find_birth_datetimes(*pillars)
+        
+        table = Table(title=f"八字反推：{' '.join(pillars)}")
+        table.add_column("起", style="cyan")
+        table.add_column("止", style="magenta")
+        
+        for start, end in windows:
+            table.add_row(
+                start.strftime("%Y-%m-%d %H:%M:%S"),
+                end.strftime("%Y-%m-%d %H:%M:%S")
+            )
+        
+        if windows:
+            console.print(table)
+        else:
+            console.print("[yellow]1800-2200年间没有符合该四柱的出生时间[/yellow]")
+        
+    except Exception as e:
+        console.print(f"[red]错误: {str(e)}[/red]")
+
+
 @cli.command()
 def help_usage():
     """显示使用帮助"""
@@ -190,6 +362,18 @@ def help_usage():
 3. 女性八字:
    bazi analyze -y 1990 -m 5 -d 15 -h 14 --female
 
+4. 时辰不详（对比十二时辰）:
+   bazi hours -y 1990 -m 5 -d 15
+
+5. 八字反推:
+   bazi reverse 庚午 辛巳 庚辰 癸未
+
+6. 择日:
+   bazi select-date -a 嫁娶 -s 2025-01-01 -e 2025-03-31
+
+7. 批量导出:
+   bazi export -s 1900-01-01 -e 2100-01-01 -o charts
+
 参数说明:
   -y, --year     出生年份 (必需)
   -m, --month    出生月份 (必需)  
@@ -198,6 +382,7 @@ def help_usage():
   --minute       出生分钟 (可选, 默认0分)
   --male/--female 性别 (可选, 默认男性)
   --timezone     时区 (可选, 默认东八区)
+  --longitude    出生地经度 (可选, 按真太阳时排盘)
   --detailed, -v 显示详细分析
     """
     
@@ -0,0 +1,66 @@
+"""
+Columnar batches of encoded charts
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+from core.calendar import SOLAR_TERMS, TABLE_TIMEZONE, to_solar_seconds, to_table_seconds
+from core.models import BaZiChart
+from core.strength import STRENGTH_MODEL
+from core.tables import encode_charts, ganzhi_index
+
+
+class ChartBatch:
+    """批量命盘：(n, 4) 天干、地支序号与 (n, 5) 五行力量，供向量化计算使用"""
+
+    def __init__(self, gans, zhis, elements: Optional[np.ndarray] = None):
+        self.gans = np.asarray(gans, dtype=np.int8).reshape(-1, 4)
+        self.zhis = np.asarray(zhis, dtype=np.int8).reshape(-1, 4)
+        if len(self.gans) != len(self.zhis):
+            raise ValueError("天干、地支数组长度不一致")
+
+        if elements is None:
+            elements = STRENGTH_MODEL.batch(self.gans, self.zhis)
+        self.elements = np.asarray(elements, dtype=np.float32).reshape(-1, 5)
+        if len(self.elements) != len(self.gans):
+            raise ValueError("五行力量数组长度不一致")
+
+    @classmethod
+    def from_charts(cls, charts: Iterable[BaZiChart]) -> "ChartBatch":
+        """由命盘对象编码"""
+        gans, zhis = encode_charts(charts)
+        return cls(gans, zhis)
+
+    @classmethod
+    def from_seconds(cls, seconds, timezone_offset: float = TABLE_TIMEZONE, longitude=None) -> "ChartBatch":
+        """由出生时刻秒序（当地钟表时间，见 core.calendar.to_seconds）直接计算四柱
+
+        年月柱按换算到东八区的时刻定；给出经度（可为数组）时日时柱按真太阳时定。
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        indices = SOLAR_TERMS.pillars_at(
+            to_table_seconds(seconds, timezone_offset),
+            to_solar_seconds(seconds, timezone_offset, longitude)
+        )
+        return cls(indices % 10, indices % 12)
+
+    @property
+    def ganzhi(self) -> np.ndarray:
+        """四柱六十甲子序号 (n, 4)"""
+        return ganzhi_index(self.gans.astype(np.int64), self.zhis.astype(np.int64))
+
+    def __len__(self) -> int:
+        return len(self.gans)
+
+    def __getitem__(self, key) -> "ChartBatch":
+        """按切片或下标数组取子集"""
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 or None)
+        return ChartBatch(self.gans[key], self.zhis[key], self.elements[key])
+
+    @property
+    def ratios(self) -> np.ndarray:
+        """五行力量占比 (n, 5)"""
+        total = self.elements.sum(axis=1, keepdims=True)
+        return np.divide(self.elements, total, out=np.zeros_like(self.elements), where=total > 0)
@@ -1,164 +1,259 @@
 """
 BaZi calculation engine
 """
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Tuple, Optional
 from datetime import datetime
+
+import numpy as np
 from lunar_python import Lunar, Solar
 
 from core.models import (
     BaZiChart, BaZiPillar, GanZhi, TianGan, DiZhi,
-    WuXing, YinYang, ElementStrength
+    WuXing, YinYang, ElementStrength, LuckPillar
+)
+from core.calendar import (
+    SECONDS_PER_DAY, SOLAR_TERMS, TABLE_TIMEZONE, from_seconds, to_seconds, to_solar_seconds, to_table_seconds
+)
+from core.lunar import LUNAR_MONTHS, LunarDate, format_lunar_date
+from core.reverse import get_reverse_index
+from core.luck import (
+    LUCK_PILLAR_YEARS, luck_direction, luck_start_age, luck_start_datetime, luck_pillar_indices
+)
+from core.strength import STRENGTH_MODEL, StrengthModel, to_element_strength
+from core.tables import (
+    GAN_NAMES, ZHI_NAMES, GANZHI_LIST, PILLAR_NAMES, encode_chart, ganzhi_index
 )
-from data.loader import TIANGAN_DICT, DIZHI_DICT, GANZHI_60
+from data.loader import TIANGAN_DICT, DIZHI_DICT
 
 
 class BaZiCalculator:
     """八字计算器"""
     
-    def __init__(self):
+    def __init__(self, strength_model: Optional[StrengthModel] = None):
+        self.strength_model = strength_model or STRENGTH_MODEL
         self.tiangan_list = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
         self.dizhi_list = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
     
     def create_ganzhi(self, gan_name: str, zhi_name: str) -> GanZhi:
-        """创建干支组合"""
+        """创建干支组合（返回全局共用的只读对象）"""
         gan = TIANGAN_DICT[gan_name]
         zhi = DIZHI_DICT[zhi_name]
         
-        # 计算六十甲子序号
-        gan_index = self.tiangan_list.index(gan_name)
-        zhi_index = self.dizhi_list.index(zhi_name)
-        
-        # 使用六十甲子公式计算序号
-        number = None
-        ganzhi_name = f"{gan_name}{zhi_name}"
-        for num, name in GANZHI_60.items():
-            if name == ganzhi_name:
-                number = int(num)
-                break
-        
-        return GanZhi(
-            gan=gan,
-            zhi=zhi,
-            name=ganzhi_name,
-            number=number or 1
-        )
+        # 由干支序号计算六十甲子序号
+        index = ganzhi_index(gan.index, zhi.index)
+        if GANZHI_LIST[index].zhi is not zhi:
+            raise ValueError(f"{gan_name}{zhi_name}不是六十甲子中的组合")
+        return GANZHI_LIST[index]
     
     def calculate_bazi_from_datetime(
         self, 
         birth_datetime: datetime, 
         is_male: bool = True,
-        timezone_offset: int = 8
+        timezone_offset: float = 8,
+        longitude: Optional[float] = None
     ) -> BaZiChart:
-        """从出生时间计算八字"""
+        """从出生时间计算八字
         
-        # 转换为Solar对象
-        solar = Solar.fromYmdHms(
-            birth_datetime.year,
-            birth_datetime.month,
-            birth_datetime.day,
-            birth_datetime.hour,
-            birth_datetime.minute,
-            birth_datetime.second
-        )
+        birth_datetime 为当地钟表时间（带时区信息时以其时区为准）。
+        年月柱按换算到东八区的时刻与节令比较；给出出生地经度时，
+        日时柱按真太阳时（经度时差 + 均时差）确定。
+        """
+        birth_datetime, timezone_offset = self._local_datetime(birth_datetime, timezone_offset)
         
-        # 转换为农历
-        lunar = solar.getLunar()
+        birth_seconds = to_seconds(birth_datetime)
+        table_seconds = to_table_seconds(birth_seconds, timezone_offset)
+        solar_seconds = int(to_solar_seconds(birth_seconds, timezone_offset, longitude))
+        lunar_day = solar_seconds // SECONDS_PER_DAY
         
-        # 获取八字
-        bazi = lunar.getEightChar()
+        if SOLAR_TERMS.contains(table_seconds) and LUNAR_MONTHS.contains(lunar_day):
+            # 四柱查节令表；农历日期只记日序，显示时再查农历月表生成文字
+            indices = SOLAR_TERMS.pillars_of(table_seconds, solar_seconds)
+            lunar_texts = {}
+        else:
+            # 超出预计算表范围时改用 lunar_python
+            indices, lunar_texts = self._calculate_with_lunar_python(
+                from_seconds(table_seconds), from_seconds(solar_seconds)
+            )
+            lunar_day = None
         
-        # 创建年柱
-        year_pillar = BaZiPillar(
-            gan_zhi=self.create_ganzhi(bazi.getYear()[0], bazi.getYear()[1]),
-            pillar_type="年",
-            solar_date=birth_datetime,
-            lunar_date=f"{lunar.getYearInChinese()}年{lunar.getMonthInChinese()}月{lunar.getDayInChinese()}"
+        return self._build_chart(
+            birth_datetime, is_male, timezone_offset, longitude, indices, solar_seconds, lunar_day, lunar_texts
         )
+    
+    def calculate_many(self, requests: Iterable[Tuple]) -> List[BaZiChart]:
+        """批量排盘，每个请求为 calculate_bazi_from_datetime 的位置参数元组，结果顺序与输入一致
         
-        # 创建月柱
-        month_pillar = BaZiPillar(
-            gan_zhi=self.create_ganzhi(bazi.getMonth()[0], bazi.getMonth()[1]),
-            pillar_type="月",
-            solar_date=birth_datetime,
-            lunar_date=f"{lunar.getMonthInChinese()}月"
-        )
+        各请求先换算为秒序数组，落在节令表与农历月表范围内的一次向量化查表得出四柱
+        （同 SOLAR_TERMS.pillars_at）；超出范围的逐个按 calculate_bazi_from_datetime 计算。
+        """
+        requests = [self._batch_request(*request) for request in requests]
+        if not requests:
+            return []
         
-        # 创建日柱
-        day_pillar = BaZiPillar(
-            gan_zhi=self.create_ganzhi(bazi.getDay()[0], bazi.getDay()[1]),
-            pillar_type="日",
-            solar_date=birth_datetime,
-            lunar_date=f"{lunar.getDayInChinese()}"
+        birth_seconds = np.array([to_seconds(request[0]) for request in requests], dtype=np.int64)
+        offsets = np.array([request[2] for request in requests], dtype=np.float64)
+        longitudes = np.array(
+            [np.nan if request[3] is None else request[3] for request in requests], dtype=np.float64
         )
+        # 同 to_table_seconds，时区为数组
+        table_seconds = birth_seconds + np.round((TABLE_TIMEZONE - offsets) * 3600).astype(np.int64)
+        
+        # 只对给出经度的请求换算真太阳时
+        solar_seconds = birth_seconds.copy()
+        has_longitude = ~np.isnan(longitudes)
+        if has_longitude.any():
+            solar_seconds[has_longitude] = to_solar_seconds(
+                birth_seconds[has_longitude], offsets[has_longitude], longitudes[has_longitude]
+            )
+        lunar_days = solar_seconds // SECONDS_PER_DAY
         
-        # 创建时柱
-        hour_pillar = BaZiPillar(
-            gan_zhi=self.create_ganzhi(bazi.getTime()[0], bazi.getTime()[1]),
-            pillar_type="时",
-            solar_date=birth_datetime,
-            lunar_date=""
+        jie_seconds = SOLAR_TERMS.jie_seconds
+        month_starts = LUNAR_MONTHS.month_starts
+        in_table = (
+            (table_seconds >= jie_seconds[0]) & (table_seconds < jie_seconds[-1])
+            & (lunar_days >= month_starts[0]) & (lunar_days < month_starts[-1])
         )
+        pillars = np.zeros((len(requests), 4), dtype=np.int64)
+        if in_table.any():
+            pillars[in_table] = SOLAR_TERMS.pillars_at(table_seconds[in_table], solar_seconds[in_table])
+        
+        charts = []
+        for request, inside, indices, solar, lunar_day in zip(
+            requests, in_table.tolist(), pillars.tolist(), solar_seconds.tolist(), lunar_days.tolist()
+        ):
+            if inside:
+                charts.append(self._build_chart(*request, indices, solar, lunar_day, {}))
+            else:
+                charts.append(self.calculate_bazi_from_datetime(*request))
+        return charts
+    
+    def _batch_request(
+        self,
+        birth_datetime: datetime,
+        is_male: bool = True,
+        timezone_offset: float = 8,
+        longitude: Optional[float] = None
+    ) -> Tuple[datetime, bool, float, Optional[float]]:
+        """补齐批量请求的缺省参数，并换算为不带时区的当地时间"""
+        birth_datetime, timezone_offset = self._local_datetime(birth_datetime, timezone_offset)
+        return birth_datetime, is_male, timezone_offset, longitude
+    
+    @staticmethod
+    def _local_datetime(birth_datetime: datetime, timezone_offset: float) -> Tuple[datetime, float]:
+        """带时区信息的时间以其时区为准，返回不带时区的当地时间与时区"""
+        if birth_datetime.tzinfo is not None:
+            timezone_offset = birth_datetime.utcoffset().total_seconds() / 3600
+            birth_datetime = birth_datetime.replace(tzinfo=None)
+        return birth_datetime, timezone_offset
+    
+    def _build_chart(
+        self,
+        birth_datetime: datetime,
+        is_male: bool,
+        timezone_offset: float,
+        longitude: Optional[float],
+        indices: List[int],
+        solar_seconds: int,
+        lunar_day: Optional[int],
+        lunar_texts: Dict[str, str]
+    ) -> BaZiChart:
+        """由四柱六十甲子序号组装命盘（各柱直接引用共用的干支对象）"""
+        # 日时柱取当地时间（真太阳时），年月柱取东八区时刻
+        year_pillar, month_pillar, day_pillar, hour_pillar = [
+            BaZiPillar(
+                gan_zhi=GANZHI_LIST[index],
+                pillar_type=pillar_type,
+                solar_date=birth_datetime,
+                lunar_day=lunar_day,
+                lunar_date=lunar_texts.get(pillar_type)
+            )
+            for index, pillar_type in zip(indices, PILLAR_NAMES)
+        ]
         
         # 创建八字命盘
-        chart = BaZiChart(
+        return BaZiChart(
             year_pillar=year_pillar,
             month_pillar=month_pillar,
             day_pillar=day_pillar,
             hour_pillar=hour_pillar,
             birth_info={
                 "solar_date": birth_datetime.isoformat(),
-                "lunar_date": f"{lunar.getYearInChinese()}年{lunar.getMonthInChinese()}月{lunar.getDayInChinese()}",
                 "is_male": is_male,
-                "timezone_offset": timezone_offset
+                "timezone_offset": timezone_offset,
+                "longitude": longitude,
+                "true_solar_time": from_seconds(solar_seconds).isoformat() if longitude is not None else None
             }
         )
+    
+    def _calculate_with_lunar_python(
+        self, table_datetime: datetime, solar_datetime: datetime
+    ) -> Tuple[List[int], Dict[str, str]]:
+        """用 lunar_python 计算四柱六十甲子序号与各柱的农历日期文字"""
+        lunar = self._to_lunar(solar_datetime)
+        bazi = lunar.getEightChar()
+        year_month_bazi = bazi if table_datetime == solar_datetime else self._to_lunar(table_datetime).getEightChar()
+        names = [year_month_bazi.getYear(), year_month_bazi.getMonth(), bazi.getDay(), bazi.getTime()]
+        indices = [self.create_ganzhi(name[0], name[1]).number - 1 for name in names]
+        
+        month = lunar.getMonth()
+        lunar_date = LunarDate(lunar.getYear(), abs(month), lunar.getDay(), month < 0)
+        return indices, {pillar_type: format_lunar_date(lunar_date, pillar_type) for pillar_type in PILLAR_NAMES}
+    
+    def _to_lunar(self, value: datetime) -> Lunar:
+        solar = Solar.fromYmdHms(
+            value.year, value.month, value.day,
+            value.hour, value.minute, value.second
+        )
+        return solar.getLunar()
+    
+    def find_birth_datetimes(
+        self, 
+        year_pillar: str, 
+        month_pillar: str, 
+        day_pillar: str, 
+        hour_pillar: str
+    ) -> List[Tuple[datetime, datetime]]:
+        """八字反推：列出1800-2200年间产生该四柱的出生时间窗口 [起, 止)"""
+        return get_reverse_index().find(year_pillar, month_pillar, day_pillar, hour_pillar)
+    
+    def calculate_luck_pillars(self, chart: BaZiChart, count: int = 8) -> List[LuckPillar]:
+        """计算大运"""
+        birth_datetime = datetime.fromisoformat(chart.birth_info["solar_date"])
+        is_male = chart.birth_info.get("is_male", True)
+        timezone_offset = chart.birth_info.get("timezone_offset", 8)
+        
+        direction = luck_direction(chart.year_pillar.gan_zhi.gan.index, is_male)
+        birth_seconds = to_table_seconds(to_seconds(birth_datetime), timezone_offset)
+        start_age = float(luck_start_age(birth_seconds, direction))
+        indices = luck_pillar_indices(chart.month_pillar.gan_zhi.number - 1, direction, count)[0]
         
-        return chart
+        # 首步大运按实际起运时刻所在年份，之后每步加十年
+        first_year = luck_start_datetime(int(birth_seconds), int(direction)).year
+        
+        luck_pillars = []
+        for step, index in enumerate(indices.tolist()):
+            age = start_age + step * LUCK_PILLAR_YEARS
+            start_year = first_year + step * LUCK_PILLAR_YEARS
+            luck_pillars.append(LuckPillar(
+                gan_zhi=self.create_ganzhi(GAN_NAMES[index % 10], ZHI_NAMES[index % 12]),
+                start_age=round(age, 2),
+                start_year=start_year,
+                end_year=start_year + LUCK_PILLAR_YEARS - 1
+            ))
+        
+        return luck_pillars
     
     def calculate_element_strength(self, chart: BaZiChart) -> ElementStrength:
-        """计算五行力量"""
-        strength = ElementStrength()
-        
-        # 天干力量基础值
-        gan_base_power = 10
-        # 地支力量基础值  
-        zhi_base_power = 12
-        # 藏干力量基础值
-        hidden_base_power = 1
-        
-        for pillar in chart.all_pillars:
-            gan = pillar.gan_zhi.gan
-            zhi = pillar.gan_zhi.zhi
-            
-            # 计算天干五行力量
-            self._add_element_strength(strength, gan.wu_xing, gan_base_power)
-            
-            # 计算地支本气五行力量
-            self._add_element_strength(strength, zhi.wu_xing, zhi_base_power)
-            
-            # 计算地支藏干五行力量
-            for hidden_gan_name, power in zhi.hidden_stems.items():
-                hidden_gan = TIANGAN_DICT[hidden_gan_name]
-                self._add_element_strength(
-                    strength, 
-                    hidden_gan.wu_xing, 
-                    power * hidden_base_power
-                )
-        
-        return strength
-    
-    def _add_element_strength(self, strength: ElementStrength, wu_xing: WuXing, power: float):
-        """添加五行力量"""
-        if wu_xing == WuXing.WOOD:
-            strength.wood += power
-        elif wu_xing == WuXing.FIRE:
-            strength.fire += power
-        elif wu_xing == WuXing.EARTH:
-            strength.earth += power
-        elif wu_xing == WuXing.METAL:
-            strength.metal += power
-        elif wu_xing == WuXing.WATER:
-            strength.water += power
+        """计算五行力量（按月令旺相休囚死与柱位加权）"""
+        gans, zhis = encode_chart(chart)
+        return to_element_strength(self.strength_model.batch([gans], [zhis])[0])
+    
+    def calculate_pillar_strength(self, gan_zhi: GanZhi, month_zhi: DiZhi, pillar_type: str) -> ElementStrength:
+        """计算单柱在某月令、某柱位的五行力量"""
+        strength = self.strength_model.pillar(
+            gan_zhi.gan.index, gan_zhi.zhi.index, month_zhi.index, PILLAR_NAMES.index(pillar_type)
+        )
+        return to_element_strength(strength)
     
     def get_ten_gods_relationship(self, day_gan: str, target_gan: str) -> str:
         """获取十神关系"""
@@ -0,0 +1,269 @@
+"""
+Calendar arithmetic backed by a precomputed solar-term table
+"""
+from bisect import bisect_right
+from datetime import date, datetime
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.shared import shared_array
+from core.tables import ganzhi_index
+from data.loader import data_loader
+
+
+# 一天的秒数
+SECONDS_PER_DAY = 86400
+# 日柱六十甲子序号偏移：(日序 + 偏移) % 60，0为甲子
+DAY_GANZHI_OFFSET = 1721414
+# 二十八宿序号偏移：(日序 + 偏移) % 28，0为角宿
+XINGXIU_OFFSET = 24
+
+# 节令表时刻所用时区（东八区）
+TABLE_TIMEZONE = 8
+# 经度每差一度，地方平太阳时相差4分钟
+SECONDS_PER_DEGREE = 240
+# 日序转换为numpy日期（1970-01-01）的偏移
+UNIX_EPOCH_DAY = 719163
+
+# 公历年内十二节的顺序，第j个节开启地支序号为 (j + 1) % 12 的月份
+JIE_NAMES = [
+    "小寒", "立春", "惊蛰", "清明", "立夏", "芒种",
+    "小暑", "立秋", "白露", "寒露", "立冬", "大雪"
+]
+
+
+def to_day_number(value: date) -> int:
+    """日期转换为日序（公元元年1月1日为1）"""
+    return value.toordinal()
+
+
+def to_seconds(value: datetime) -> int:
+    """时间转换为秒序（日序 × 86400 + 当日秒数，不含时区）"""
+    return (
+        value.toordinal() * SECONDS_PER_DAY
+        + value.hour * 3600 + value.minute * 60 + value.second
+    )
+
+
+def from_seconds(seconds: int) -> datetime:
+    """秒序转换回时间"""
+    days, rest = divmod(int(seconds), SECONDS_PER_DAY)
+    return datetime.fromordinal(days).replace(
+        hour=rest // 3600, minute=rest % 3600 // 60, second=rest % 60
+    )
+
+
+def day_of_year(day_number):
+    """日序对应的年内序号（1月1日为0），支持数组"""
+    days = (np.asarray(day_number, dtype=np.int64) - UNIX_EPOCH_DAY).astype("datetime64[D]")
+    return (days - days.astype("datetime64[Y]")).astype(np.int64)
+
+
+def _build_equation_of_time() -> np.ndarray:
+    """按年内序号预计算正午的均时差（秒，真太阳时 - 平太阳时），共366项"""
+    gamma = 2 * np.pi / 365 * np.arange(366)
+    minutes = 229.18 * (
+        0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma)
+    )
+    return np.round(minutes * 60).astype(np.int64)
+
+
+# 均时差表，下标为年内序号
+EQUATION_OF_TIME = _build_equation_of_time()
+
+
+def to_table_seconds(seconds, timezone_offset: float = TABLE_TIMEZONE):
+    """当地钟表时间的秒序换算为节令表时区（东八区）的秒序，支持数组"""
+    return seconds + round((TABLE_TIMEZONE - timezone_offset) * 3600)
+
+
+def to_solar_seconds(seconds, timezone_offset: float = TABLE_TIMEZONE, longitude=None):
+    """当地钟表时间的秒序换算为真太阳时（经度时差 + 均时差），未给经度时原样返回，支持数组"""
+    if longitude is None:
+        return seconds
+    seconds = np.asarray(seconds, dtype=np.int64)
+    longitude_correction = np.round(
+        (np.asarray(longitude, dtype=np.float64) - timezone_offset * 15) * SECONDS_PER_DEGREE
+    ).astype(np.int64)
+    return seconds + longitude_correction + EQUATION_OF_TIME[day_of_year(seconds // SECONDS_PER_DAY)]
+
+
+def day_ganzhi_index(day_number):
+    """日柱六十甲子序号，支持数组"""
+    return (day_number + DAY_GANZHI_OFFSET) % 60
+
+
+def xingxiu_index(day_number):
+    """值日星宿序号，支持数组"""
+    return (day_number + XINGXIU_OFFSET) % 28
+
+
+class SolarTermTable:
+    """节令表：预计算的十二节交接时刻（东八区）
+
+    交接时刻在首次使用时才构建；本进程已挂载共享表（core.shared.init_worker）时
+    直接使用共享内存中的数组，不再读取节令数据。
+    """
+
+    def __init__(self, load: Callable[[], Dict[str, Any]]):
+        self._load = load
+        self._jie_source: Optional[np.ndarray] = None
+        self._jie_cache: List[int] = []
+
+    def _build_jie_seconds(self) -> np.ndarray:
+        data = self._load()
+        return np.array([
+            to_seconds(datetime.fromisoformat(moment))
+            for year in sorted(int(year) for year in data["jie"])
+            for moment in data["jie"][str(year)]
+        ], dtype=np.int64)
+
+    @cached_property
+    def jie_seconds(self) -> np.ndarray:
+        """按时间顺序展开的节交接时刻，第p个节即表中的"节令序号"p"""
+        return shared_array("jie_seconds", self._build_jie_seconds)
+
+    @cached_property
+    def jie_days(self) -> np.ndarray:
+        """各节交接当日的日序"""
+        return shared_array("jie_days", lambda: self.jie_seconds // SECONDS_PER_DAY)
+
+    @cached_property
+    def first_year(self) -> int:
+        """表中首年（序号0为该年小寒）"""
+        return from_seconds(self.jie_seconds[0]).year
+
+    @cached_property
+    def last_year(self) -> int:
+        """表中末年"""
+        return self.first_year + len(self.jie_seconds) // 12 - 1
+
+    @cached_property
+    def _month_base(self) -> int:
+        """序号0（首年小寒）所在月份的六十甲子序号"""
+        return (12 * self.first_year + 13) % 60
+
+    @property
+    def _jie_list(self) -> List[int]:
+        """单个时刻查询用的列表（bisect 比单元素数组的 searchsorted 快），jie_seconds 被替换时随之重建"""
+        if self._jie_source is not self.jie_seconds:
+            self._jie_cache = self.jie_seconds.tolist()
+            self._jie_source = self.jie_seconds
+        return self._jie_cache
+
+    def position_at(self, seconds):
+        """某一时刻所处的节令序号（以交接时刻为准），支持数组"""
+        return np.searchsorted(self.jie_seconds, seconds, side="right") - 1
+
+    def position_on_day(self, day_number):
+        """某一日期所处的节令序号（节当日即换月），支持数组"""
+        return np.searchsorted(self.jie_days, day_number, side="right") - 1
+
+    def contains(self, seconds: int) -> bool:
+        """某一时刻是否落在节令表范围内"""
+        return self._jie_list[0] <= seconds < self._jie_list[-1]
+
+    def check_positions(self, positions):
+        """检查节令序号是否落在节令表范围内"""
+        positions = np.asarray(positions)
+        if positions.size and (positions.min() < 0 or positions.max() >= len(self.jie_seconds) - 1):
+            raise ValueError(
+                f"日期超出节令表范围（{self.first_year}-{self.last_year}年）"
+            )
+
+    def month_ganzhi_index(self, position):
+        """节令序号对应月柱的六十甲子序号，支持数组"""
+        return (position + self._month_base) % 60
+
+    def month_zhi_index(self, position):
+        """节令序号对应月支序号，支持数组"""
+        return (position + 1) % 12
+
+    def year_of_position(self, position):
+        """节令序号对应的干支纪年年份（以立春为界），支持数组"""
+        return self.first_year + (position - 1) // 12
+
+    def lichun_position(self, year: int) -> int:
+        """某年立春的节令序号"""
+        return (year - self.first_year) * 12 + 1
+
+    def year_ganzhi_index(self, position):
+        """节令序号对应年柱的六十甲子序号，支持数组"""
+        return (self.year_of_position(position) - 4) % 60
+
+    def pillars_at(self, seconds, solar_seconds=None) -> np.ndarray:
+        """某一时刻的四柱六十甲子序号（年、月、日、时），输入 (n,) 秒序返回 (n, 4)
+
+        seconds 为东八区时刻，用于定年月柱；solar_seconds 为定日时柱所用的
+        当地时间（如真太阳时），默认与 seconds 相同。
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        positions = self.position_at(seconds)
+        self.check_positions(positions)
+
+        if solar_seconds is not None:
+            seconds = np.asarray(solar_seconds, dtype=np.int64)
+        day_number, rest = np.divmod(seconds, SECONDS_PER_DAY)
+        hour = rest // 3600
+        day = day_ganzhi_index(day_number)
+
+        # 晚子时（23点）日柱不变，时干按次日日干起
+        hour_zhi = (hour + 1) // 2 % 12
+        hour_gan = ((day + (hour == 23)) % 5 * 2 + hour_zhi) % 10
+
+        return np.stack([
+            self.year_ganzhi_index(positions),
+            self.month_ganzhi_index(positions),
+            day,
+            ganzhi_index(hour_gan, hour_zhi)
+        ], axis=-1)
+
+    def pillars_of(self, seconds: int, solar_seconds: Optional[int] = None) -> List[int]:
+        """单个时刻的四柱六十甲子序号（同 pillars_at，按 bisect 查表）"""
+        if not self.contains(seconds):
+            raise ValueError(
+                f"日期超出节令表范围（{self.first_year}-{self.last_year}年）"
+            )
+        position = bisect_right(self._jie_list, seconds) - 1
+
+        if solar_seconds is None:
+            solar_seconds = seconds
+        day_number, rest = divmod(solar_seconds, SECONDS_PER_DAY)
+        hour = rest // 3600
+        day = day_ganzhi_index(day_number)
+
+        hour_zhi = (hour + 1) // 2 % 12
+        hour_gan = ((day + (hour == 23)) % 5 * 2 + hour_zhi) % 10
+
+        return [
+            self.year_ganzhi_index(position),
+            self.month_ganzhi_index(position),
+            day,
+            ganzhi_index(hour_gan, hour_zhi)
+        ]
+
+
+def build_solar_terms_data(first_year: int = 1799, last_year: int = 2201) -> Dict[str, Any]:
+    """用lunar_python生成节令数据（data/solar_terms.json 的来源）"""
+    from lunar_python import LunarYear, Solar
+
+    jie = {}
+    for year in range(first_year, last_year + 1):
+        julian_days = LunarYear.fromYear(year).getJieQiJulianDays()
+        # 下标2到24的偶数位依次为当年小寒至大雪
+        jie[str(year)] = [
+            Solar.fromJulianDay(julian_days[i]).toYmdHms() for i in range(2, 25, 2)
+        ]
+
+    return {
+        "description": "十二节交接时刻（东八区），由lunar_python预计算",
+        "jie_names": JIE_NAMES,
+        "jie": jie
+    }
+
+
+# 全局节令表
+SOLAR_TERMS = SolarTermTable(data_loader.load_solar_terms_data)
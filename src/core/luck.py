@@ -0,0 +1,80 @@
+"""
+Luck pillar (大运) arithmetic on the precomputed solar-term table
+"""
+from calendar import monthrange
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.calendar import SECONDS_PER_DAY, SOLAR_TERMS, from_seconds
+from core.tables import GAN_YANG
+
+
+# 起运折算：三天为一年
+SECONDS_PER_LUCK_YEAR = 3 * 86400
+# 每步大运的年数
+LUCK_PILLAR_YEARS = 10
+
+
+def luck_direction(year_gan, is_male):
+    """大运方向：阳年男、阴年女顺行(1)，阴年男、阳年女逆行(-1)，支持数组"""
+    return np.where(GAN_YANG[year_gan] == np.asarray(is_male, dtype=np.int8), 1, -1)
+
+
+def luck_start_age(birth_seconds, direction):
+    """起运岁数：顺行数到下一个节，逆行数到上一个节，三天折一年，支持数组"""
+    birth_seconds = np.asarray(birth_seconds, dtype=np.int64)
+    positions = SOLAR_TERMS.position_at(birth_seconds)
+    SOLAR_TERMS.check_positions(positions)
+
+    previous_jie = SOLAR_TERMS.jie_seconds[positions]
+    next_jie = SOLAR_TERMS.jie_seconds[positions + 1]
+    distance = np.where(np.asarray(direction) > 0, next_jie - birth_seconds, birth_seconds - previous_jie)
+
+    return distance / SECONDS_PER_LUCK_YEAR
+
+
+def _shichen(seconds: int) -> int:
+    """时辰序号（子时为0），23点计为亥时"""
+    hour = seconds % SECONDS_PER_DAY // 3600
+    return min((hour + 1) // 2, 11)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    """公历加月数，日超出当月天数时取月末"""
+    year, month = divmod(value.month - 1 + months, 12)
+    year += value.year
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+
+def luck_start_datetime(birth_seconds: int, direction: int) -> datetime:
+    """起运时刻（东八区）：出生时刻到上一个或下一个节的距离，按三天折一年、一天折四个月、
+    一个时辰折十天换算后加在出生时刻上（整年、整月按公历推）
+    """
+    position = int(SOLAR_TERMS.position_at(birth_seconds))
+    SOLAR_TERMS.check_positions([position])
+    if direction > 0:
+        start, end = birth_seconds, int(SOLAR_TERMS.jie_seconds[position + 1])
+    else:
+        start, end = int(SOLAR_TERMS.jie_seconds[position]), birth_seconds
+
+    day_diff = end // SECONDS_PER_DAY - start // SECONDS_PER_DAY
+    hour_diff = _shichen(end) - _shichen(start)
+    if hour_diff < 0:
+        hour_diff += 12
+        day_diff -= 1
+    month_diff = hour_diff * 10 // 30
+    years, months = divmod(day_diff * 4 + month_diff, 12)
+    days = hour_diff * 10 - month_diff * 30
+
+    birth = from_seconds(birth_seconds)
+    return _add_months(_add_months(birth, years * 12), months) + timedelta(days=days)
+
+
+def luck_pillar_indices(month_ganzhi, direction, count: int = 8):
+    """从月柱起按方向逐步推出的大运六十甲子序号，输入 (n,) 返回 (n, count)"""
+    steps = np.arange(1, count + 1)
+    month_ganzhi = np.asarray(month_ganzhi).reshape(-1, 1)
+    direction = np.asarray(direction).reshape(-1, 1)
+    return (month_ganzhi + direction * steps) % 60
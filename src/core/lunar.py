@@ -0,0 +1,182 @@
+"""
+Lunar calendar conversion backed by a precomputed lunar-month table
+"""
+from bisect import bisect_right
+from datetime import date
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from core.shared import shared_array
+from data.loader import data_loader
+
+
+# 年份数字的中文写法（逐位）
+YEAR_DIGITS = "〇一二三四五六七八九"
+# 月名（正月至腊月）
+MONTH_NAMES = ["正", "二", "三", "四", "五", "六", "七", "八", "九", "十", "冬", "腊"]
+# 日名（初一至三十）
+DAY_NAMES = [
+    "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十",
+    "十一", "十二", "十三", "十四", "十五", "十六", "十七", "十八", "十九", "二十",
+    "廿一", "廿二", "廿三", "廿四", "廿五", "廿六", "廿七", "廿八", "廿九", "三十"
+]
+# 闰月前缀
+LEAP_PREFIX = "闰"
+
+
+class LunarDate(NamedTuple):
+    """农历日期"""
+    year: int
+    month: int
+    day: int
+    is_leap: bool = False
+
+
+@lru_cache(maxsize=None)
+def year_text(year: int) -> str:
+    """农历年份的中文写法，如 二〇二三"""
+    return "".join(YEAR_DIGITS[int(digit)] for digit in str(year))
+
+
+def month_text(month: int, is_leap: bool = False) -> str:
+    """农历月份的中文写法（不含“月”字），如 闰二"""
+    return (LEAP_PREFIX if is_leap else "") + MONTH_NAMES[month - 1]
+
+
+def format_lunar_date(lunar: LunarDate, pillar_type: str = "年") -> str:
+    """农历日期在各柱上的显示文字：年柱为完整日期，月柱为月份，日柱为日，时柱为空"""
+    if pillar_type == "年":
+        return f"{year_text(lunar.year)}年{month_text(lunar.month, lunar.is_leap)}月{DAY_NAMES[lunar.day - 1]}"
+    if pillar_type == "月":
+        return f"{month_text(lunar.month, lunar.is_leap)}月"
+    if pillar_type == "日":
+        return DAY_NAMES[lunar.day - 1]
+    return ""
+
+
+class LunarMonthTable:
+    """农历月表：预计算的各农历月首日，按日序二分查找
+
+    月表数组在首次使用时才由 load 取数据构建；本进程已挂载共享表
+    （core.shared.init_worker）时直接使用共享内存中的数组。
+    """
+
+    def __init__(self, load: Callable[[], Dict[str, Any]]):
+        self._load = load
+
+    @cached_property
+    def _local_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """在本进程构建各月首日日序与各月的 (农历年, 月, 是否闰月)"""
+        data = self._load()
+        month_starts: List[int] = []
+        months: List[Tuple[int, int, int]] = []
+        end = None
+        for year in sorted(int(year) for year in data["years"]):
+            entry = data["years"][str(year)]
+            start = date.fromisoformat(entry["new_year"]).toordinal()
+            if end is not None and start != end:
+                raise ValueError(f"农历月表在{year}年不连续")
+            leap_month = entry["leap_month"]
+            month = 0
+            for i, days in enumerate(entry["month_days"]):
+                is_leap = leap_month > 0 and i == leap_month
+                if not is_leap:
+                    month += 1
+                month_starts.append(start)
+                months.append((year, month, int(is_leap)))
+                start += days
+            end = start
+        month_starts.append(end)
+        return np.array(month_starts, dtype=np.int64), np.array(months, dtype=np.int32)
+
+    @cached_property
+    def month_starts(self) -> np.ndarray:
+        """按时间顺序的各月首日日序，末尾多一项为表尾的次日"""
+        return shared_array("lunar_month_starts", lambda: self._local_arrays[0])
+
+    @cached_property
+    def months(self) -> np.ndarray:
+        """(月数, 3) 各月的农历年、月、是否闰月（1为闰月）"""
+        return shared_array("lunar_months", lambda: self._local_arrays[1])
+
+    @cached_property
+    def _bounds(self) -> Tuple[int, int]:
+        return int(self.month_starts[0]), int(self.month_starts[-1])
+
+    @cached_property
+    def first_year(self) -> int:
+        return int(self.months[0, 0])
+
+    @cached_property
+    def last_year(self) -> int:
+        return int(self.months[-1, 0])
+
+    def contains(self, day_number: int) -> bool:
+        """日序是否落在农历月表范围内"""
+        first, end = self._bounds
+        return first <= day_number < end
+
+    @cached_property
+    def _start_view(self) -> memoryview:
+        """month_starts 的内存视图：逐项取值即得 int，可直接二分查找"""
+        return memoryview(self.month_starts)
+
+    @cached_property
+    def _month_view(self) -> memoryview:
+        return memoryview(self.months)
+
+    def month_position(self, day_number: int) -> int:
+        """日序所在农历月在表中的序号"""
+        if not self.contains(day_number):
+            raise ValueError(f"日期超出农历月表范围（农历{self.first_year}-{self.last_year}年）")
+        return bisect_right(self._start_view, day_number) - 1
+
+    def lunar_date(self, day_number: int) -> LunarDate:
+        """日序（公元元年1月1日为1）转换为农历日期"""
+        position = self.month_position(day_number)
+        months = self._month_view
+        return LunarDate(
+            months[position, 0], months[position, 1],
+            day_number - self._start_view[position] + 1, months[position, 2] == 1
+        )
+
+    def text(self, day_number: int, pillar_type: str = "年") -> str:
+        """日序对应农历日期在各柱上的显示文字（同 format_lunar_date）"""
+        position = self.month_position(day_number)
+        months = self._month_view
+        if pillar_type == "年":
+            return (
+                f"{year_text(months[position, 0])}年{month_text(months[position, 1], months[position, 2] == 1)}月"
+                f"{DAY_NAMES[day_number - self._start_view[position]]}"
+            )
+        if pillar_type == "月":
+            return f"{month_text(months[position, 1], months[position, 2] == 1)}月"
+        if pillar_type == "日":
+            return DAY_NAMES[day_number - self._start_view[position]]
+        return ""
+
+
+def build_lunar_months_data(first_year: int = 1798, last_year: int = 2201) -> Dict[str, Any]:
+    """用lunar_python生成农历月表数据（data/lunar_months.json 的来源）"""
+    from lunar_python import LunarYear, Solar
+
+    years = {}
+    for year in range(first_year, last_year + 1):
+        lunar_year = LunarYear.fromYear(year)
+        months = [month for month in lunar_year.getMonthsInYear() if month.getYear() == year]
+        years[str(year)] = {
+            "new_year": Solar.fromJulianDay(months[0].getFirstJulianDay()).toYmd(),
+            "leap_month": lunar_year.getLeapMonth(),
+            "month_days": [month.getDayCount() for month in months]
+        }
+
+    return {
+        "description": "农历各年正月初一、闰月（0为无闰月）与各月天数（含闰月，按先后排列），由lunar_python预计算",
+        "years": years
+    }
+
+
+# 全局农历月表
+LUNAR_MONTHS = LunarMonthTable(data_loader.load_lunar_months_data)
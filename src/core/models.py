@@ -3,8 +3,9 @@ Core data models for BaZi analysis
 """
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
-from pydantic import BaseModel, Field
-from datetime import datetime
+from functools import cached_property
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_serializer, field_validator
+from datetime import date, datetime
 
 
 class WuXing(Enum):
@@ -22,8 +23,26 @@ class YinYang(Enum):
     YIN = "阴"
 
 
+class FrozenDict(dict):
+    """只读字典：共享的干支对象中的映射字段，防止调用方原地修改"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("只读字典不可修改")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
 class TianGan(BaseModel):
-    """天干模型"""
+    """天干模型（只读，全局共用）"""
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="天干名称")
     index: int = Field(..., description="天干序号")
     wu_xing: WuXing = Field(..., description="五行属性")
@@ -32,7 +51,9 @@ class TianGan(BaseModel):
 
 
 class DiZhi(BaseModel):
-    """地支模型"""
+    """地支模型（只读，全局共用）"""
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="地支名称")
     index: int = Field(..., description="地支序号")
     wu_xing: WuXing = Field(..., description="五行属性")
@@ -41,13 +62,22 @@ class DiZhi(BaseModel):
     temperature: int = Field(..., description="温度值")
     hidden_stems: Dict[str, int] = Field(default_factory=dict, description="藏干及其力量")
 
+    @field_validator("hidden_stems")
+    @classmethod
+    def _freeze_hidden_stems(cls, value: Dict[str, int]) -> Dict[str, int]:
+        return FrozenDict(value)
+
 
 class GanZhi(BaseModel):
-    """干支组合模型"""
+    """干支组合模型（只读，六十甲子各一个对象全局共用）"""
+    model_config = ConfigDict(frozen=True)
+
     gan: TianGan = Field(..., description="天干")
     zhi: DiZhi = Field(..., description="地支")
     name: str = Field(..., description="干支名称")
     number: int = Field(..., description="六十甲子序号")
+    nayin: str = Field("", description="纳音")
+    xun_kong: str = Field("", description="旬空")
 
     @property
     def full_name(self) -> str:
@@ -59,7 +89,17 @@ class BaZiPillar(BaseModel):
     gan_zhi: GanZhi = Field(..., description="干支组合")
     pillar_type: str = Field(..., description="柱类型: 年/月/日/时")
     solar_date: Optional[datetime] = Field(None, description="阳历日期")
-    lunar_date: Optional[str] = Field(None, description="农历日期")
+    lunar_day: Optional[int] = Field(None, exclude=True, description="出生当地日期的日序，农历日期在显示时由此换算")
+    lunar_text: Optional[str] = Field(None, exclude=True, validation_alias="lunar_date", description="已给定的农历日期文字")
+
+    @computed_field(description="农历日期")
+    @property
+    def lunar_date(self) -> Optional[str]:
+        """农历日期文字：构造时给定的优先，否则按日序查农历月表生成"""
+        if self.lunar_text is not None or self.lunar_day is None:
+            return self.lunar_text
+        from core.lunar import LUNAR_MONTHS
+        return LUNAR_MONTHS.text(self.lunar_day, self.pillar_type)
 
 
 class BaZiChart(BaseModel):
@@ -70,6 +110,26 @@ class BaZiChart(BaseModel):
     hour_pillar: BaZiPillar = Field(..., description="时柱")
     birth_info: Dict = Field(default_factory=dict, description="出生信息")
     
+    @field_serializer("birth_info")
+    def _serialize_birth_info(self, birth_info: Dict) -> Dict:
+        """输出时在 solar_date 之后补上农历日期（lunar_date），与逐柱一样按需生成"""
+        if "solar_date" not in birth_info or "lunar_date" in birth_info:
+            return birth_info
+        lunar_date = self.lunar_date
+        if lunar_date is None:
+            return birth_info
+        info = {}
+        for key, value in birth_info.items():
+            info[key] = value
+            if key == "solar_date":
+                info["lunar_date"] = lunar_date
+        return info
+    
+    @property
+    def lunar_date(self) -> Optional[str]:
+        """出生时刻的农历日期"""
+        return self.year_pillar.lunar_date
+    
     @property
     def all_pillars(self) -> List[BaZiPillar]:
         return [self.year_pillar, self.month_pillar, self.day_pillar, self.hour_pillar]
@@ -91,7 +151,9 @@ class TenGods(BaseModel):
 
 
 class ElementStrength(BaseModel):
-    """五行力量分析"""
+    """五行力量分析（只读，运算总是返回新对象）"""
+    model_config = ConfigDict(frozen=True)
+
     wood: float = Field(default=0.0, description="木的力量")
     fire: float = Field(default=0.0, description="火的力量")
     earth: float = Field(default=0.0, description="土的力量")
@@ -101,6 +163,70 @@ class ElementStrength(BaseModel):
     @property
     def total(self) -> float:
         return self.wood + self.fire + self.earth + self.metal + self.water
+    
+    def __add__(self, other: "ElementStrength") -> "ElementStrength":
+        return ElementStrength(
+            wood=self.wood + other.wood,
+            fire=self.fire + other.fire,
+            earth=self.earth + other.earth,
+            metal=self.metal + other.metal,
+            water=self.water + other.water
+        )
+
+
+class LuckPillar(BaseModel):
+    """大运模型"""
+    gan_zhi: GanZhi = Field(..., description="大运干支")
+    start_age: float = Field(..., description="起运岁数")
+    start_year: int = Field(..., description="起始年份")
+    end_year: int = Field(..., description="结束年份")
+
+
+class HourVariant(BaseModel):
+    """时辰候选模型"""
+    hour_zhi: str = Field(..., description="时支")
+    time_range: str = Field(..., description="时辰范围")
+    pillars: List[str] = Field(..., description="四柱干支（节令交接日早晚时辰的年月柱可能不同）")
+    ten_gods: Dict[str, str] = Field(default_factory=dict, description="时柱十神")
+    ten_gods_analysis: Dict[str, str] = Field(default_factory=dict, description="该时辰所取年月柱的十神")
+    monthly_analysis: Optional[str] = Field(None, description="该时辰所取月令的分析")
+    element_delta: ElementStrength = Field(..., description="时柱带来的五行力量")
+    element_strength: ElementStrength = Field(..., description="四柱五行力量")
+    time_analysis: Optional[str] = Field(None, description="时辰分析")
+
+
+class HourVariantsResult(BaseModel):
+    """十二时辰对比结果模型"""
+    solar_date: date = Field(..., description="阳历日期")
+    year_pillar: str = Field(..., description="年柱（取当日正午）")
+    month_pillar: str = Field(..., description="月柱（取当日正午）")
+    day_pillar: str = Field(..., description="日柱")
+    ten_gods_analysis: Dict[str, str] = Field(default_factory=dict, description="年月柱十神（取当日正午）")
+    monthly_analysis: Optional[str] = Field(None, description="月令分析（取当日正午，交节日各时辰以候选中的为准）")
+    variants: List[HourVariant] = Field(default_factory=list, description="十二时辰候选")
+
+
+class FortuneEntry(BaseModel):
+    """流年、流月模型"""
+    year: int = Field(..., description="干支纪年年份（以立春为界）")
+    month: Optional[int] = Field(None, description="流月序号（1为寅月，流年为空）")
+    start: datetime = Field(..., description="起始时刻（立春或节的交接时刻）")
+    gan_zhi: str = Field(..., description="干支")
+    ten_god: str = Field(..., description="天干对日主的十神")
+    zhi_ten_god: str = Field(..., description="地支本气对日主的十神")
+    interactions: List[str] = Field(default_factory=list, description="与原局四柱的刑冲合害破")
+
+
+class CompatibilityMatch(BaseModel):
+    """合婚候选模型"""
+    index: int = Field(..., description="候选在候选池中的下标")
+    score: float = Field(..., description="合婚评分")
+
+
+class SimilarChart(BaseModel):
+    """相似命盘模型"""
+    id: int = Field(..., description="命盘编号")
+    distance: float = Field(..., description="与查询命盘的距离")
 
 
 class AnalysisResult(BaseModel):
@@ -109,7 +235,23 @@ class AnalysisResult(BaseModel):
     element_strength: ElementStrength = Field(..., description="五行力量分析")
     ten_gods_analysis: Dict[str, str] = Field(default_factory=dict, description="十神分析")
     special_patterns: List[str] = Field(default_factory=list, description="特殊格局")
+    pattern_mask: int = Field(0, description="特殊格局位掩码（按格局规则顺序）")
+    interactions: List[str] = Field(default_factory=list, description="刑冲合害破")
     monthly_analysis: Optional[str] = Field(None, description="月令分析")
     time_analysis: Optional[str] = Field(None, description="时辰分析")
     general_fortune: Optional[str] = Field(None, description="总体运势")
     recommendations: List[str] = Field(default_factory=list, description="建议")
+    
+    @cached_property
+    def luck_pillars(self) -> List[LuckPillar]:
+        """大运（首次访问时计算）"""
+        from core.calculator import BaZiCalculator
+        return BaZiCalculator().calculate_luck_pillars(self.chart)
+
+
+class SelectedDay(BaseModel):
+    """择日结果模型"""
+    solar_date: date = Field(..., description="阳历日期")
+    day_gan_zhi: str = Field(..., description="日柱干支")
+    jianchu: str = Field(..., description="建除十二神")
+    xingxiu: str = Field(..., description="值日星宿")
@@ -0,0 +1,132 @@
+"""
+Precomputed stem and branch relation tables
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from core.models import BaZiChart
+from core.shared import shared_array
+from core.tables import GAN_NAMES, ZHI_NAMES, GAN_INDEX, ZHI_INDEX, PILLAR_NAMES, encode_chart
+
+
+# 关系位掩码
+HE = 1      # 合
+CHONG = 2   # 冲
+HAI = 4     # 害
+XING = 8    # 刑
+PO = 16     # 破
+
+RELATION_NAMES = [(HE, "合"), (CHONG, "冲"), (HAI, "害"), (XING, "刑"), (PO, "破")]
+
+GAN_PAIRS = {
+    HE: [("甲", "己"), ("乙", "庚"), ("丙", "辛"), ("丁", "壬"), ("戊", "癸")],
+    CHONG: [("甲", "庚"), ("乙", "辛"), ("丙", "壬"), ("丁", "癸")],
+}
+
+ZHI_PAIRS = {
+    HE: [("子", "丑"), ("寅", "亥"), ("卯", "戌"), ("辰", "酉"), ("巳", "申"), ("午", "未")],
+    CHONG: [("子", "午"), ("丑", "未"), ("寅", "申"), ("卯", "酉"), ("辰", "戌"), ("巳", "亥")],
+    HAI: [("子", "未"), ("丑", "午"), ("寅", "巳"), ("卯", "辰"), ("申", "亥"), ("酉", "戌")],
+    XING: [
+        ("子", "卯"),  # 子卯相刑
+        ("寅", "巳"), ("巳", "申"), ("申", "寅"),  # 寅巳申三刑
+        ("丑", "戌"), ("戌", "未"), ("未", "丑"),  # 丑未戌三刑
+        ("辰", "辰"), ("午", "午"), ("酉", "酉"), ("亥", "亥")  # 自刑
+    ],
+    PO: [("子", "酉"), ("卯", "午"), ("辰", "丑"), ("未", "戌"), ("寅", "亥"), ("巳", "申")],
+}
+
+# 三刑组合
+XING_GROUPS = [("寅", "巳", "申"), ("丑", "未", "戌")]
+
+# 四柱两两组合：年月、年日、年时、月日、月时、日时
+PILLAR_PAIRS = [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+PAIR_LEFT = np.array([a for a, _ in PILLAR_PAIRS])
+PAIR_RIGHT = np.array([b for _, b in PILLAR_PAIRS])
+
+
+def _build_matrix(names: List[str], index: dict, pairs: dict) -> np.ndarray:
+    """构建对称的关系位掩码矩阵"""
+    matrix = np.zeros((len(names), len(names)), dtype=np.uint8)
+    for bit, bit_pairs in pairs.items():
+        for a, b in bit_pairs:
+            matrix[index[a], index[b]] |= bit
+            matrix[index[b], index[a]] |= bit
+    return matrix
+
+
+def _build_labels(names: List[str], matrix: np.ndarray) -> List[List[str]]:
+    """预生成每对干支的关系描述，如"甲己合" """
+    labels = []
+    for i, a in enumerate(names):
+        row = []
+        for j, b in enumerate(names):
+            mask = int(matrix[i, j])
+            relations = "".join(name for bit, name in RELATION_NAMES if mask & bit)
+            row.append(f"{a}{b}{relations}" if relations else "")
+        labels.append(row)
+    return labels
+
+
+# 10x10 天干关系矩阵、12x12 地支关系矩阵（已挂载共享表时取用共享内存中的数组）
+GAN_RELATIONS = shared_array("gan_relations", lambda: _build_matrix(GAN_NAMES, GAN_INDEX, GAN_PAIRS))
+ZHI_RELATIONS = shared_array("zhi_relations", lambda: _build_matrix(ZHI_NAMES, ZHI_INDEX, ZHI_PAIRS))
+
+# 标量查询用的嵌套列表与关系描述
+GAN_RELATION_ROWS = GAN_RELATIONS.tolist()
+ZHI_RELATION_ROWS = ZHI_RELATIONS.tolist()
+GAN_RELATION_LABELS = _build_labels(GAN_NAMES, GAN_RELATIONS)
+ZHI_RELATION_LABELS = _build_labels(ZHI_NAMES, ZHI_RELATIONS)
+
+# 柱位组合名称，如"年月"
+PAIR_NAMES = [f"{PILLAR_NAMES[a]}{PILLAR_NAMES[b]}" for a, b in PILLAR_PAIRS]
+
+# 各柱位组合的完整关系描述，如"年月干甲己合"：各分析结果共用同一组字符串
+GAN_INTERACTION_TEXTS = [
+    [[f"{pair_name}干{label}" if label else "" for label in row] for row in GAN_RELATION_LABELS]
+    for pair_name in PAIR_NAMES
+]
+ZHI_INTERACTION_TEXTS = [
+    [[f"{pair_name}支{label}" if label else "" for label in row] for row in ZHI_RELATION_LABELS]
+    for pair_name in PAIR_NAMES
+]
+
+
+def gan_relation(gan1: str, gan2: str) -> int:
+    """两天干的关系位掩码"""
+    if gan1 not in GAN_INDEX or gan2 not in GAN_INDEX:
+        return 0
+    return GAN_RELATION_ROWS[GAN_INDEX[gan1]][GAN_INDEX[gan2]]
+
+
+def zhi_relation(zhi1: str, zhi2: str) -> int:
+    """两地支的关系位掩码"""
+    if zhi1 not in ZHI_INDEX or zhi2 not in ZHI_INDEX:
+        return 0
+    return ZHI_RELATION_ROWS[ZHI_INDEX[zhi1]][ZHI_INDEX[zhi2]]
+
+
+def find_interactions(chart: BaZiChart) -> List[str]:
+    """一次遍历查出四柱间所有天干、地支的刑冲合害破"""
+    gans, zhis = encode_chart(chart)
+    results = []
+
+    for gan_texts, zhi_texts, (a, b) in zip(GAN_INTERACTION_TEXTS, ZHI_INTERACTION_TEXTS, PILLAR_PAIRS):
+        gan_text = gan_texts[gans[a]][gans[b]]
+        if gan_text:
+            results.append(gan_text)
+        zhi_text = zhi_texts[zhis[a]][zhis[b]]
+        if zhi_text:
+            results.append(zhi_text)
+
+    return results
+
+
+def find_interactions_batch(gans: np.ndarray, zhis: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """批量查询：输入 (n, 4) 天干、地支序号，返回 (n, 6) 天干、地支关系位掩码"""
+    gans = np.asarray(gans)
+    zhis = np.asarray(zhis)
+    gan_masks = GAN_RELATIONS[gans[:, PAIR_LEFT], gans[:, PAIR_RIGHT]]
+    zhi_masks = ZHI_RELATIONS[zhis[:, PAIR_LEFT], zhis[:, PAIR_RIGHT]]
+    return gan_masks, zhi_masks
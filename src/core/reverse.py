@@ -0,0 +1,111 @@
+"""
+Reverse lookup from four pillars to candidate birth moments (八字反推)
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.calendar import SOLAR_TERMS, SECONDS_PER_DAY, DAY_GANZHI_OFFSET, from_seconds, to_seconds
+from core.tables import GANZHI_INDEX
+
+
+class ReverseLookupIndex:
+    """八字反推索引：按(年柱, 月柱)预先分组节令月段，查询时与日柱周期、时支窗口求交"""
+
+    def __init__(self, first_year: int = 1800, last_year: int = 2200):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.range_start = to_seconds(datetime(first_year, 1, 1))
+        self.range_end = to_seconds(datetime(last_year + 1, 1, 1))
+
+        # 与支持范围相交的节令月段 [jie_seconds[p], jie_seconds[p + 1])
+        starts = SOLAR_TERMS.jie_seconds[:-1]
+        ends = SOLAR_TERMS.jie_seconds[1:]
+        positions = np.flatnonzero((ends > self.range_start) & (starts < self.range_end))
+
+        keys = (
+            SOLAR_TERMS.year_ganzhi_index(positions) * 60
+            + SOLAR_TERMS.month_ganzhi_index(positions)
+        )
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        positions = positions[order]
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+
+        self._segments: Dict[int, np.ndarray] = {
+            int(group_keys[0]): group_positions
+            for group_keys, group_positions in zip(
+                np.split(keys, boundaries), np.split(positions, boundaries)
+            )
+            if len(group_keys)
+        }
+
+    def _hour_windows(self, day_ganzhi: int, hour_ganzhi: int) -> List[Tuple[int, int]]:
+        """日柱下时柱对应的当日秒数窗口"""
+        zhi = hour_ganzhi % 12
+        gan = hour_ganzhi % 10
+        day_gan = day_ganzhi % 10
+        windows = []
+
+        if zhi == 0:
+            # 早子时用当日日干起时干；晚子时日柱仍为当日，时干按次日日干起
+            if (day_gan % 5 * 2) % 10 == gan:
+                windows.append((0, 3600))
+            if ((day_gan + 1) % 5 * 2) % 10 == gan:
+                windows.append((23 * 3600, SECONDS_PER_DAY))
+        elif (day_gan % 5 * 2 + zhi) % 10 == gan:
+            windows.append(((2 * zhi - 1) * 3600, (2 * zhi + 1) * 3600))
+
+        return windows
+
+    def lookup(self, year: int, month: int, day: int, hour: int) -> List[Tuple[datetime, datetime]]:
+        """按四柱六十甲子序号查询，返回 [起, 止) 时间窗口列表"""
+        positions = self._segments.get(year * 60 + month)
+        if positions is None:
+            return []
+
+        windows = self._hour_windows(day, hour)
+        if not windows:
+            return []
+
+        results = []
+        segment_starts = SOLAR_TERMS.jie_seconds[positions]
+        segment_ends = SOLAR_TERMS.jie_seconds[positions + 1]
+
+        for segment_start, segment_end in zip(segment_starts.tolist(), segment_ends.tolist()):
+            lower = max(segment_start, self.range_start)
+            upper = min(segment_end, self.range_end)
+
+            # 月段内日柱每60日重现一次
+            first_day = lower // SECONDS_PER_DAY
+            first_day += (day - (first_day + DAY_GANZHI_OFFSET)) % 60
+            for day_number in range(first_day, (upper - 1) // SECONDS_PER_DAY + 1, 60):
+                day_start = day_number * SECONDS_PER_DAY
+                for window_start, window_end in windows:
+                    start = max(day_start + window_start, lower)
+                    end = min(day_start + window_end, upper)
+                    if start < end:
+                        results.append((from_seconds(start), from_seconds(end)))
+
+        results.sort()
+        return results
+
+    def find(self, year_pillar: str, month_pillar: str, day_pillar: str, hour_pillar: str) -> List[Tuple[datetime, datetime]]:
+        """按四柱干支名称查询，返回 [起, 止) 时间窗口列表"""
+        try:
+            indices = [GANZHI_INDEX[name] for name in (year_pillar, month_pillar, day_pillar, hour_pillar)]
+        except KeyError as e:
+            raise ValueError(f"无效的干支: {e.args[0]}")
+        return self.lookup(*indices)
+
+
+_default_index = None
+
+
+def get_reverse_index() -> ReverseLookupIndex:
+    """默认反推索引（1800-2200年），首次使用时构建"""
+    global _default_index
+    if _default_index is None:
+        _default_index = ReverseLookupIndex()
+    return _default_index
@@ -0,0 +1,159 @@
+"""
+Integer-coded lookup tables in shared memory for multi-process workers
+"""
+import sys
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+# 数组在共享内存块中按64字节对齐
+ARRAY_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def build_shared_tables() -> Dict[str, np.ndarray]:
+    """收集需要共享的查表数组：天干地支与十神、刑冲合害破矩阵，节令交接时刻与日序，
+    农历月表，五行力量权重张量，以及月令、时辰文本表（文本字节与编码表）
+
+    子进程要在这些模块之前导入本模块（进程池 initializer），这里才导入它们。
+    """
+    from analysis.texts import TEXTS_TABLE
+    from core import tables
+    from core.calendar import SOLAR_TERMS
+    from core.lunar import LUNAR_MONTHS
+    from core.relations import GAN_RELATIONS, ZHI_RELATIONS
+    from core.strength import STRENGTH_MODEL
+    from data.loader import data_loader
+
+    return {
+        "gan_element": tables.GAN_ELEMENT,
+        "zhi_element": tables.ZHI_ELEMENT,
+        "gan_yang": tables.GAN_YANG,
+        "zhi_yang": tables.ZHI_YANG,
+        "zhi_main_gan": tables.ZHI_MAIN_GAN,
+        "ten_gods": tables.TEN_GODS,
+        "gan_relations": GAN_RELATIONS,
+        "zhi_relations": ZHI_RELATIONS,
+        "jie_seconds": SOLAR_TERMS.jie_seconds,
+        "jie_days": SOLAR_TERMS.jie_days,
+        "lunar_month_starts": LUNAR_MONTHS.month_starts,
+        "lunar_months": LUNAR_MONTHS.months,
+        "gan_strength": STRENGTH_MODEL.gan_tensor,
+        "zhi_strength": STRENGTH_MODEL.zhi_tensor,
+        **data_loader.table(TEXTS_TABLE).shared_arrays(),
+    }
+
+
+class SharedTables:
+    """共享内存中的查表数组
+
+    父进程用 create 建立一块共享内存并写入全部表，把 spec 传给进程池的
+    initializer（init_worker）；子进程只读挂载，各查表首次使用时直接取用共享内存
+    中的数组，不复制也不在子进程重建。父进程在进程池结束后
+    调用 unlink 释放。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Any], owner: bool):
+        self._shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in layout["arrays"].items():
+            array = np.ndarray(
+                tuple(spec["shape"]), dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"]
+            )
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @classmethod
+    def create(cls, tables: Optional[Dict[str, np.ndarray]] = None) -> "SharedTables":
+        """建立共享内存块并写入查表数组"""
+        if tables is None:
+            tables = build_shared_tables()
+
+        arrays = {}
+        size = 0
+        for name, table in tables.items():
+            table = np.ascontiguousarray(table)
+            arrays[name] = {"offset": size, "dtype": table.dtype.str, "shape": list(table.shape)}
+            size = _align(size + table.nbytes)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, table in tables.items():
+            spec = arrays[name]
+            target = np.ndarray(tuple(spec["shape"]), dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"])
+            target[...] = table
+            del target
+
+        return cls(shm, {"arrays": arrays}, owner=True)
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """传给子进程的挂载信息（可序列化）"""
+        return {"name": self._shm.name, "layout": self.layout}
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> "SharedTables":
+        """按 spec 只读挂载父进程建立的共享内存"""
+        if sys.version_info >= (3, 13):
+            # 挂载方不负责回收，不登记到资源追踪器
+            shm = shared_memory.SharedMemory(name=spec["name"], track=False)
+        else:
+            # 进程池子进程与父进程共用资源追踪器，重复登记无副作用
+            shm = shared_memory.SharedMemory(name=spec["name"])
+        return cls(shm, spec["layout"], owner=False)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self):
+        """断开共享内存（之后不可再使用本对象的数组）"""
+        self.arrays = {}
+        self._shm.close()
+
+    def unlink(self):
+        """父进程释放共享内存"""
+        self.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedTables":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+# 本进程挂载的共享表（进程池子进程由 init_worker 挂载）
+_attached: Optional[SharedTables] = None
+
+
+def init_worker(spec: Dict[str, Any]):
+    """进程池 initializer：挂载父进程建立的共享表
+
+    须在首次排盘之前调用；此后导入的查表模块与首次使用的节令表、农历月表、
+    五行力量模型取用共享数组。
+    """
+    global _attached
+    _attached = SharedTables.attach(spec)
+
+
+def attached_array(name: str) -> Optional[np.ndarray]:
+    """本进程已挂载的共享表中的同名数组，未挂载或无此数组时为 None"""
+    if _attached is not None:
+        return _attached.arrays.get(name)
+    return None
+
+
+def shared_array(name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+    """本进程已挂载共享表时返回其中的同名数组，否则调用 build 在本进程构建"""
+    array = attached_array(name)
+    return array if array is not None else build()
@@ -0,0 +1,112 @@
+"""
+Seasonal (旺相休囚死) element strength model as a precomputed weight tensor
+"""
+from functools import cached_property
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from core.models import ElementStrength
+from core.shared import shared_array
+from core.tables import (
+    GAN_INDEX, GAN_ELEMENT, ZHI_ELEMENT, ELEMENT_NAMES, PILLAR_NAMES
+)
+from data.loader import TIANGAN_LIST, DIZHI_LIST, data_loader
+
+
+# 旺相休囚死，下标为旺衰序号
+SEASON_STATES = ["旺", "相", "休", "囚", "死"]
+# 按 (五行 - 月令五行) % 5 取旺衰：同我旺、月令生我相、月令克我死、我克月令囚、我生月令休
+RELATION_STATES = np.array([0, 1, 4, 3, 2], dtype=np.int8)
+# (月支, 五行) 的旺衰序号
+SEASON_STATE_MATRIX = RELATION_STATES[
+    (np.arange(len(ELEMENT_NAMES))[None, :] - ZHI_ELEMENT[:, None]) % 5
+]
+
+PILLAR_RANGE = np.arange(len(PILLAR_NAMES))
+
+
+class StrengthModel:
+    """五行力量模型：预计算 (月支, 柱位, 干支, 五行) 权重张量，
+    每个命盘只需一次取值求和，批量计算同样向量化
+
+    权重张量在首次使用时才构建；默认模型（未给 config，取 strength_model.json）
+    在本进程已挂载共享表（core.shared.init_worker）时直接使用共享内存中的张量。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self._config = config
+
+    @cached_property
+    def _local_tensors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """在本进程构建天干、地支的权重张量"""
+        config = self._config if self._config is not None else data_loader.load_strength_model_data()
+        base = config["base_power"]
+        multipliers = np.array([config["seasonal"][state] for state in SEASON_STATES])
+        gan_weights = np.array([config["pillar_weights"]["gan"][name] for name in PILLAR_NAMES])
+        zhi_weights = np.array([config["pillar_weights"]["zhi"][name] for name in PILLAR_NAMES])
+
+        # 单个天干、地支（本气 + 藏干）的基础五行力量
+        gan_rows = np.zeros((len(TIANGAN_LIST), len(ELEMENT_NAMES)))
+        gan_rows[np.arange(len(TIANGAN_LIST)), GAN_ELEMENT] = base["gan"]
+        zhi_rows = np.zeros((len(DIZHI_LIST), len(ELEMENT_NAMES)))
+        for zhi in DIZHI_LIST:
+            zhi_rows[zhi.index, ZHI_ELEMENT[zhi.index]] += base["zhi"]
+            for hidden_gan, power in zhi.hidden_stems.items():
+                zhi_rows[zhi.index, GAN_ELEMENT[GAN_INDEX[hidden_gan]]] += power * base["hidden"]
+
+        # (月支, 五行) 旺衰系数
+        seasonal = multipliers[SEASON_STATE_MATRIX]
+
+        # (月支, 柱位, 天干/地支, 五行)
+        gan_tensor = (
+            seasonal[:, None, None, :] * gan_weights[None, :, None, None] * gan_rows[None, None, :, :]
+        )
+        zhi_tensor = (
+            seasonal[:, None, None, :] * zhi_weights[None, :, None, None] * zhi_rows[None, None, :, :]
+        )
+        return gan_tensor, zhi_tensor
+
+    def _tensor(self, shared_name: str, which: int) -> np.ndarray:
+        if self._config is not None:
+            return self._local_tensors[which]
+        return shared_array(shared_name, lambda: self._local_tensors[which])
+
+    @cached_property
+    def gan_tensor(self) -> np.ndarray:
+        """(月支, 柱位, 天干, 五行) 权重张量"""
+        return self._tensor("gan_strength", 0)
+
+    @cached_property
+    def zhi_tensor(self) -> np.ndarray:
+        """(月支, 柱位, 地支, 五行) 权重张量"""
+        return self._tensor("zhi_strength", 1)
+
+    @classmethod
+    def load(cls) -> "StrengthModel":
+        """默认模型（strength_model.json，首次使用时加载）"""
+        return cls()
+
+    def batch(self, gans, zhis) -> np.ndarray:
+        """由 (n, 4) 天干、地支序号批量计算 (n, 5) 五行力量（木火土金水）"""
+        gans = np.asarray(gans)
+        zhis = np.asarray(zhis)
+        month_zhi = zhis[:, 1:2]
+        return (
+            self.gan_tensor[month_zhi, PILLAR_RANGE, gans].sum(axis=1)
+            + self.zhi_tensor[month_zhi, PILLAR_RANGE, zhis].sum(axis=1)
+        )
+
+    def pillar(self, gan: int, zhi: int, month_zhi: int, pillar: int) -> np.ndarray:
+        """单柱在某月令、某柱位的五行力量 (5,)"""
+        return self.gan_tensor[month_zhi, pillar, gan] + self.zhi_tensor[month_zhi, pillar, zhi]
+
+
+def to_element_strength(vector) -> ElementStrength:
+    """五行力量向量（木火土金水）转换为模型"""
+    wood, fire, earth, metal, water = (float(value) for value in vector)
+    return ElementStrength(wood=wood, fire=fire, earth=earth, metal=metal, water=water)
+
+
+# 默认五行力量模型
+STRENGTH_MODEL = StrengthModel.load()
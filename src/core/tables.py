@@ -0,0 +1,137 @@
+"""
+Integer codes for stems, branches and the sexagenary cycle
+"""
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from core.models import BaZiChart, GanZhi, WuXing, YinYang
+from core.shared import shared_array
+from data.loader import TIANGAN_LIST, DIZHI_LIST, GANZHI_60, GANZHI_DATA
+
+
+# 天干、地支名称（下标即序号）
+GAN_NAMES = [gan.name for gan in TIANGAN_LIST]
+ZHI_NAMES = [zhi.name for zhi in DIZHI_LIST]
+GAN_INDEX = {name: i for i, name in enumerate(GAN_NAMES)}
+ZHI_INDEX = {name: i for i, name in enumerate(ZHI_NAMES)}
+
+# 六十甲子名称，下标为六十甲子序号（0为甲子，即GanZhi.number - 1）
+GANZHI_NAMES = [GANZHI_60[str(i)] for i in range(1, 61)]
+GANZHI_INDEX = {name: i for i, name in enumerate(GANZHI_NAMES)}
+
+# 柱位名称
+PILLAR_NAMES = ["年", "月", "日", "时"]
+
+# 五行名称（与ElementStrength字段顺序一致：木火土金水）
+ELEMENT_NAMES = [wu_xing.value for wu_xing in WuXing]
+ELEMENT_INDEX = {name: i for i, name in enumerate(ELEMENT_NAMES)}
+
+# 天干、地支的五行序号与阴阳（阳为1）
+# 以下整数表已挂载共享表（core.shared.init_worker）时取用共享内存中的数组
+GAN_ELEMENT = shared_array("gan_element", lambda: np.array(
+    [ELEMENT_INDEX[gan.wu_xing.value] for gan in TIANGAN_LIST], dtype=np.int8
+))
+ZHI_ELEMENT = shared_array("zhi_element", lambda: np.array(
+    [ELEMENT_INDEX[zhi.wu_xing.value] for zhi in DIZHI_LIST], dtype=np.int8
+))
+GAN_YANG = shared_array("gan_yang", lambda: np.array(
+    [gan.yin_yang == YinYang.YANG for gan in TIANGAN_LIST], dtype=np.int8
+))
+ZHI_YANG = shared_array("zhi_yang", lambda: np.array(
+    [zhi.yin_yang == YinYang.YANG for zhi in DIZHI_LIST], dtype=np.int8
+))
+
+# 地支本气（藏干中力量最大者）的天干序号
+ZHI_MAIN_GAN = shared_array("zhi_main_gan", lambda: np.array([
+    GAN_INDEX[max(zhi.hidden_stems, key=zhi.hidden_stems.get)] for zhi in DIZHI_LIST
+], dtype=np.int8))
+
+# 十神：按五行生克次序（同我、我生、我克、克我、生我）与阴阳异同编码
+TEN_GOD_NAMES = ["比肩", "劫财", "食神", "伤官", "偏财", "正财", "七杀", "正官", "偏印", "正印"]
+TEN_GODS = shared_array("ten_gods", lambda: (
+    (GAN_ELEMENT[None, :] - GAN_ELEMENT[:, None]) % 5 * 2
+    + (GAN_YANG[None, :] != GAN_YANG[:, None])
+).astype(np.int8))
+
+# 纳音：六十甲子两两一组共三十种
+NAYIN_NAMES = GANZHI_DATA["nayin"]
+NAYIN_INDEX = np.arange(60, dtype=np.int8) // 2
+NAYIN_60 = [NAYIN_NAMES[i // 2] for i in range(60)]
+
+# 旬空：每旬十日，空出该旬未配天干的两个地支
+XUNKONG_ZHI = np.array([
+    [(i - i % 10 + 10) % 12, (i - i % 10 + 11) % 12] for i in range(60)
+], dtype=np.int8)
+XUNKONG_60 = [f"{ZHI_NAMES[a]}{ZHI_NAMES[b]}" for a, b in XUNKONG_ZHI.tolist()]
+
+# 数组查询用的名称表
+NAYIN_NAME_ARRAY = np.array(NAYIN_60, dtype=object)
+XUNKONG_NAME_ARRAY = np.array(XUNKONG_60, dtype=object)
+
+
+def ganzhi_index(gan_index, zhi_index):
+    """由天干、地支序号求六十甲子序号，支持数组"""
+    return (6 * gan_index - 5 * zhi_index) % 60
+
+
+def get_nayin(index: int) -> str:
+    """六十甲子序号对应的纳音"""
+    return NAYIN_60[index]
+
+
+def get_xunkong(index: int) -> str:
+    """六十甲子序号所在旬的空亡地支"""
+    return XUNKONG_60[index]
+
+
+# 六十甲子对象：只读，各命盘共用同一组对象
+GANZHI_LIST = tuple(
+    GanZhi(
+        gan=TIANGAN_LIST[index % 10],
+        zhi=DIZHI_LIST[index % 12],
+        name=GANZHI_NAMES[index],
+        number=index + 1,
+        nayin=get_nayin(index),
+        xun_kong=get_xunkong(index)
+    )
+    for index in range(60)
+)
+
+# 查表数组只读，多线程共用时不会被意外改写
+for _table in (
+    GAN_ELEMENT, ZHI_ELEMENT, GAN_YANG, ZHI_YANG, ZHI_MAIN_GAN, TEN_GODS,
+    NAYIN_INDEX, XUNKONG_ZHI, NAYIN_NAME_ARRAY, XUNKONG_NAME_ARRAY
+):
+    _table.flags.writeable = False
+
+
+def nayin_names(indices) -> np.ndarray:
+    """批量查询纳音名称"""
+    return NAYIN_NAME_ARRAY[np.asarray(indices)]
+
+
+def xunkong_names(indices) -> np.ndarray:
+    """批量查询旬空地支"""
+    return XUNKONG_NAME_ARRAY[np.asarray(indices)]
+
+
+def encode_chart(chart: BaZiChart) -> Tuple[List[int], List[int]]:
+    """将命盘编码为四柱天干、地支序号"""
+    gans = [pillar.gan_zhi.gan.index for pillar in chart.all_pillars]
+    zhis = [pillar.gan_zhi.zhi.index for pillar in chart.all_pillars]
+    return gans, zhis
+
+
+def encode_charts(charts: Iterable[BaZiChart]) -> Tuple[np.ndarray, np.ndarray]:
+    """将多个命盘编码为 (n, 4) 的天干、地支序号数组"""
+    gans = []
+    zhis = []
+    for chart in charts:
+        chart_gans, chart_zhis = encode_chart(chart)
+        gans.append(chart_gans)
+        zhis.append(chart_zhis)
+    return (
+        np.array(gans, dtype=np.int8).reshape(-1, 4),
+        np.array(zhis, dtype=np.int8).reshape(-1, 4)
+    )
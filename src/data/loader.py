@@ -3,12 +3,53 @@ Data loader for BaZi analysis system
 """
 import json
 import os
-from typing import Dict, List, Any
+import signal
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
 from core.models import TianGan, DiZhi, WuXing, YinYang
 
 
+# 热重载时默认的文件检查间隔（秒）
+RELOAD_INTERVAL = 2.0
+
+# 数据表构建函数：接收数据加载器，返回构建好的表
+TableBuilder = Callable[["DataLoader"], Any]
+# 重载回调：接收表名与新表
+ReloadListener = Callable[[str, Any], None]
+
+
+def freeze(value: Any) -> Any:
+    """递归转换为只读结构：字典转为只读映射，列表转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class DataTables:
+    """数据表快照：构建后不再修改，热重载时整体替换
+
+    一次分析开始时取一次快照引用，之后读到的各表属于同一版本。
+    """
+
+    def __init__(self, tables: Dict[str, Any], versions: Dict[str, int], mtimes: Dict[str, Optional[int]]):
+        self._tables = tables
+        # 各表的版本号，表重建一次加一
+        self.versions = versions
+        # 构建时各数据文件的修改时间（纳秒，文件不存在时为 None）
+        self.mtimes = mtimes
+
+    def __getitem__(self, name: str) -> Any:
+        return self._tables[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tables
+
+
 class DataLoader:
     """数据加载器类"""
     
@@ -19,6 +60,18 @@ class DataLoader:
             self.data_dir = current_dir / "data"
         else:
             self.data_dir = Path(data_dir)
+        
+        # 可热重载的数据表：表名 -> (依赖的数据文件, 构建函数)
+        self._table_specs: Dict[str, Tuple[List[str], TableBuilder]] = {}
+        self._tables = DataTables({}, {}, {})
+        self._listeners: Dict[str, List[ReloadListener]] = {}
+        self._reload_lock = threading.Lock()
+        self._reload_event = threading.Event()
+        self._force_reload = False
+        self._reloader: Optional[threading.Thread] = None
+        self._stop_reloader = threading.Event()
+        # 后台重载最近一次失败的异常（成功后清空）
+        self.last_reload_error: Optional[Exception] = None
     
     def load_json(self, filename: str) -> Dict[str, Any]:
         """加载JSON文件"""
@@ -77,18 +130,154 @@ class DataLoader:
     def load_jianchu_data(self) -> Dict[str, Any]:
         """加载建除数据"""
         return self.load_json("jianchu.json")
+    
+    def load_patterns_data(self) -> Dict[str, Any]:
+        """加载格局规则数据"""
+        return self.load_json("patterns.json")
+    
+    def load_solar_terms_data(self) -> Dict[str, Any]:
+        """加载节令数据"""
+        return self.load_json("solar_terms.json")
+    
+    def load_lunar_months_data(self) -> Dict[str, Any]:
+        """加载农历月表数据"""
+        return self.load_json("lunar_months.json")
+    
+    def load_strength_model_data(self) -> Dict[str, Any]:
+        """加载五行力量模型数据"""
+        return self.load_json("strength_model.json")
+    
+    @property
+    def tables(self) -> DataTables:
+        """当前的数据表快照"""
+        return self._tables
+    
+    def table(self, name: str) -> Any:
+        """当前版本的某张数据表"""
+        return self._tables[name]
+    
+    def register_table(
+        self, name: str, filenames: List[str], builder: TableBuilder, initial: Any = None
+    ) -> Any:
+        """登记可热重载的数据表并立即构建，返回构建好的表
+        
+        filenames 为构建所读取的数据文件，其中任一文件修改后该表会被重建。
+        initial 不为 None 时作为首个版本（如取自共享内存的表），不再调用 builder。
+        """
+        with self._reload_lock:
+            mtimes = {filename: self._mtime(filename) for filename in filenames}
+            table = initial if initial is not None else builder(self)
+            current = self._tables
+            self._table_specs[name] = (list(filenames), builder)
+            self._tables = DataTables(
+                {**current._tables, name: table},
+                {**current.versions, name: current.versions.get(name, 0) + 1},
+                {**current.mtimes, **mtimes}
+            )
+        return table
+    
+    def on_reload(self, name: str, listener: ReloadListener):
+        """登记某张表重建后的回调，用于只清除依赖该表的缓存"""
+        self._listeners.setdefault(name, []).append(listener)
+    
+    def _mtime(self, filename: str) -> Optional[int]:
+        try:
+            return os.stat(self.data_dir / filename).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def reload(self, force: bool = False) -> List[str]:
+        """检查数据文件，重建依赖已修改文件的表，返回重建的表名
+        
+        新表全部构建成功后才以一次引用替换换入新快照；构建出错（如文件写了一半）
+        时保留原快照并抛出异常，下次检查时重试。未受影响的表沿用原对象。
+        """
+        with self._reload_lock:
+            current = self._tables
+            mtimes = {
+                filename: self._mtime(filename)
+                for filenames, _ in self._table_specs.values()
+                for filename in filenames
+            }
+            changed_files = {
+                filename for filename, mtime in mtimes.items()
+                if force or mtime != current.mtimes.get(filename)
+            }
+            changed = [
+                name for name, (filenames, _) in self._table_specs.items()
+                if changed_files.intersection(filenames)
+            ]
+            if not changed:
+                return []
+            
+            tables = dict(current._tables)
+            versions = dict(current.versions)
+            for name in changed:
+                tables[name] = self._table_specs[name][1](self)
+                versions[name] += 1
+            self._tables = DataTables(tables, versions, {**current.mtimes, **mtimes})
+        
+        for name in changed:
+            for listener in self._listeners.get(name, []):
+                listener(name, tables[name])
+        return changed
+    
+    def start_reloader(self, interval: Optional[float] = RELOAD_INTERVAL, signum: Optional[int] = None):
+        """启动后台热重载线程
+        
+        interval 为检查文件修改时间的间隔（秒），为 None 时不轮询；
+        signum 指定信号（如 signal.SIGHUP）时，收到信号即强制重建全部表。
+        信号处理只唤醒后台线程，重建不占用处理请求的线程。须在主线程调用。
+        """
+        if signum is not None:
+            signal.signal(signum, self._on_reload_signal)
+        if self._reloader is not None and self._reloader.is_alive():
+            return
+        self._stop_reloader.clear()
+        self._reloader = threading.Thread(
+            target=self._reload_loop, args=(interval,), name="data-reloader", daemon=True
+        )
+        self._reloader.start()
+    
+    def stop_reloader(self):
+        """停止后台热重载线程"""
+        self._stop_reloader.set()
+        self._reload_event.set()
+        if self._reloader is not None:
+            self._reloader.join()
+            self._reloader = None
+    
+    def _on_reload_signal(self, signum, frame):
+        self._force_reload = True
+        self._reload_event.set()
+    
+    def _reload_loop(self, interval: Optional[float]):
+        while True:
+            self._reload_event.wait(interval)
+            self._reload_event.clear()
+            if self._stop_reloader.is_set():
+                return
+            force, self._force_reload = self._force_reload, False
+            try:
+                self.reload(force)
+                self.last_reload_error = None
+            except Exception as error:
+                self.last_reload_error = error
 
 
 # 全局数据加载器实例
 data_loader = DataLoader()
 
-# 预加载基础数据
-TIANGAN_LIST = data_loader.load_tiangan_data()
-DIZHI_LIST = data_loader.load_dizhi_data()
-GANZHI_DATA = data_loader.load_ganzhi_data()
-TEN_GODS_DATA = data_loader.load_ten_gods_data()
+# 预加载基础数据（只读，可在多线程间共用）
+TIANGAN_LIST = tuple(data_loader.load_tiangan_data())
+DIZHI_LIST = tuple(data_loader.load_dizhi_data())
+GANZHI_DATA = freeze(data_loader.load_ganzhi_data())
+# 十神数据随热重载更新，须经 data_loader.table("ten_gods") 取当前版本
+data_loader.register_table(
+    "ten_gods", ["ten_gods.json"], lambda loader: freeze(loader.load_ten_gods_data())
+)
 
 # 创建查找字典
-TIANGAN_DICT = {gan.name: gan for gan in TIANGAN_LIST}
-DIZHI_DICT = {zhi.name: zhi for zhi in DIZHI_LIST}
+TIANGAN_DICT = MappingProxyType({gan.name: gan for gan in TIANGAN_LIST})
+DIZHI_DICT = MappingProxyType({zhi.name: zhi for zhi in DIZHI_LIST})
 GANZHI_60 = GANZHI_DATA["ganzhi_60"]
@@ -3,6 +3,10 @@ Utility functions for BaZi analysis
 """
 from typing import List, Dict, Tuple
 from core.models import BaZiChart
+from core.relations import (
+    HE, CHONG, HAI, XING, PO, XING_GROUPS, gan_relation, zhi_relation
+)
+from core.tables import GANZHI_INDEX, get_xunkong
 from data.loader import DIZHI_DICT, TIANGAN_DICT
 
 
@@ -12,68 +16,52 @@ class BaZiUtils:
     @staticmethod
     def check_gan_he(gan1: str, gan2: str) -> bool:
         """检查天干相合"""
-        he_pairs = [
-            ("甲", "己"), ("乙", "庚"), ("丙", "辛"), 
-            ("丁", "壬"), ("戊", "癸")
-        ]
-        return (gan1, gan2) in he_pairs or (gan2, gan1) in he_pairs
+        return bool(gan_relation(gan1, gan2) & HE)
     
     @staticmethod
     def check_gan_chong(gan1: str, gan2: str) -> bool:
         """检查天干相冲"""
-        chong_pairs = [
-            ("甲", "庚"), ("乙", "辛"), ("丙", "壬"), ("丁", "癸")
-        ]
-        return (gan1, gan2) in chong_pairs or (gan2, gan1) in chong_pairs
+        return bool(gan_relation(gan1, gan2) & CHONG)
     
     @staticmethod
     def check_zhi_he(zhi1: str, zhi2: str) -> bool:
         """检查地支相合"""
-        he_pairs = [
-            ("子", "丑"), ("寅", "亥"), ("卯", "戌"), 
-            ("辰", "酉"), ("巳", "申"), ("午", "未")
-        ]
-        return (zhi1, zhi2) in he_pairs or (zhi2, zhi1) in he_pairs
+        return bool(zhi_relation(zhi1, zhi2) & HE)
     
     @staticmethod
     def check_zhi_chong(zhi1: str, zhi2: str) -> bool:
         """检查地支相冲"""
-        chong_pairs = [
-            ("子", "午"), ("丑", "未"), ("寅", "申"), 
-            ("卯", "酉"), ("辰", "戌"), ("巳", "亥")
-        ]
-        return (zhi1, zhi2) in chong_pairs or (zhi2, zhi1) in chong_pairs
+        return bool(zhi_relation(zhi1, zhi2) & CHONG)
     
     @staticmethod
     def check_zhi_xing(zhi1: str, zhi2: str, zhi3: str) -> str:
         """检查地支三刑"""
-        xing_groups = [
-            ["子", "卯"],  # 子卯相刑
-            ["寅", "巳", "申"],  # 寅巳申三刑
-            ["丑", "未", "戌"],  # 丑未戌三刑
-            ["辰", "辰"], ["午", "午"], ["酉", "酉"], ["亥", "亥"]  # 自刑
-        ]
-        
         zhis = [zhi1, zhi2, zhi3]
-        for group in xing_groups:
-            if all(zhi in group for zhi in zhis if zhi in group):
-                if len(group) == 2 and len([z for z in zhis if z in group]) >= 2:
-                    return f"{''.join(group)}相刑"
-                elif len(group) == 3 and all(g in zhis for g in group):
-                    return f"{''.join(group)}三刑"
-                elif len(group) == 1 and zhis.count(group[0]) >= 2:
-                    return f"{group[0]}自刑"
+        
+        # 寅巳申、丑未戌三刑
+        for group in XING_GROUPS:
+            if all(g in zhis for g in group):
+                return f"{''.join(group)}三刑"
+        
+        # 子卯相刑及自刑
+        for a, b in ((zhi1, zhi2), (zhi1, zhi3), (zhi2, zhi3)):
+            if zhi_relation(a, b) & XING:
+                if a == b:
+                    return f"{a}自刑"
+                if {a, b} == {"子", "卯"}:
+                    return "子卯相刑"
         
         return ""
     
     @staticmethod
     def check_zhi_harm(zhi1: str, zhi2: str) -> bool:
         """检查地支相害"""
-        harm_pairs = [
-            ("子", "未"), ("丑", "午"), ("寅", "巳"), 
-            ("卯", "辰"), ("申", "亥"), ("酉", "戌")
-        ]
-        return (zhi1, zhi2) in harm_pairs or (zhi2, zhi1) in harm_pairs
+        return bool(zhi_relation(zhi1, zhi2) & HAI)
+    
+    @staticmethod
+    def check_zhi_po(zhi1: str, zhi2: str) -> bool:
+        """检查地支相破"""
+        return bool(zhi_relation(zhi1, zhi2) & PO)
     
     @staticmethod
     def check_zhi_ju(zhis: List[str]) -> List[str]:
@@ -106,17 +94,10 @@ class BaZiUtils:
     @staticmethod
     def get_empty_death(day_pillar: str) -> List[str]:
         """获取旬空亡"""
-        empty_map = {
-            "甲子": ["戌", "亥"], "甲戌": ["申", "酉"], "甲申": ["午", "未"],
-            "甲午": ["辰", "巳"], "甲辰": ["寅", "卯"], "甲寅": ["子", "丑"]
-        }
-        
-        # 找到对应的旬
-        for xun, empty in empty_map.items():
-            if day_pillar.startswith(xun[0]):
-                return empty
-        
-        return []
+        index = GANZHI_INDEX.get(day_pillar)
+        if index is None:
+            return []
+        return list(get_xunkong(index))
     
     @staticmethod
     def calculate_yinyang_score(chart: BaZiChart) -> Dict[str, int]:
@@ -159,6 +140,12 @@ class BaZiUtils:
         ])
         lines.append(f"地支: {zhi_line}")
         
+        # 纳音行
+        nayin_line = " ".join([
+            pillar.gan_zhi.nayin for pillar in chart.all_pillars
+        ])
+        lines.append(f"纳音: {nayin_line}")
+        
         # 柱名行
         pillar_line = "    ".join([
             f"{pillar.pillar_type}柱" for pillar in chart.all_pillars
@@ -0,0 +1,199 @@
+"""
+Compact flat serialization for BaZiChart and AnalysisResult
+"""
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+import orjson
+
+from core.models import AnalysisResult, BaZiChart
+from core.tables import GANZHI_LIST, PILLAR_NAMES
+
+
+# 扁平格式版本
+FORMAT_VERSION = 2
+
+# 排盘生成的出生信息字段；键与顺序一致时按位置写为数组
+BIRTH_INFO_FIELDS = ("solar_date", "is_male", "timezone_offset", "longitude", "true_solar_time")
+
+# 四柱在命盘中的字段名，与 PILLAR_NAMES 一一对应
+PILLAR_FIELDS = ("year_pillar", "month_pillar", "day_pillar", "hour_pillar")
+
+# 五行力量数组的顺序
+ELEMENT_FIELDS = ("wood", "fire", "earth", "metal", "water")
+
+# 自定义的出生信息可能含非字符串键
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _is_birth_solar_date(solar_date: Optional[datetime], birth_info: Dict) -> bool:
+    """四柱共用的阳历时刻是否即出生信息中的出生时间（此时不必另记）"""
+    text = birth_info["solar_date"]
+    if solar_date is None or solar_date.tzinfo is not None or type(text) is not str:
+        return False
+    try:
+        return datetime.fromisoformat(text) == solar_date
+    except ValueError:
+        return False
+
+
+def chart_to_flat(chart: BaZiChart) -> Dict[str, Any]:
+    """命盘转换为扁平结构
+
+    - pillars: 四柱的六十甲子序号
+    - birth_info: 出生信息；为排盘生成的标准字段时按 BIRTH_INFO_FIELDS 的顺序记为数组
+    - solar_dates: 四柱的阳历时刻，共用时只记一个；出生信息为标准字段且其出生时间即该时刻时省略
+    - lunar: 农历日期由同一日序按需生成时只记日序，否则记四柱的农历文字
+    """
+    year, month, day, hour = chart.year_pillar, chart.month_pillar, chart.day_pillar, chart.hour_pillar
+    birth_info = chart.birth_info
+    flat: Dict[str, Any] = {
+        "pillars": [
+            year.gan_zhi.number - 1, month.gan_zhi.number - 1, day.gan_zhi.number - 1, hour.gan_zhi.number - 1
+        ]
+    }
+
+    standard = tuple(birth_info) == BIRTH_INFO_FIELDS
+    flat["birth_info"] = list(birth_info.values()) if standard else birth_info
+
+    solar_date = year.solar_date
+    shared = solar_date is month.solar_date is day.solar_date is hour.solar_date
+    if not (shared and standard and _is_birth_solar_date(solar_date, birth_info)):
+        flat["solar_dates"] = (
+            _isoformat(solar_date) if shared
+            else [_isoformat(pillar.solar_date) for pillar in (year, month, day, hour)]
+        )
+
+    lunar_day = year.lunar_day
+    if (lunar_day is not None and lunar_day == month.lunar_day == day.lunar_day == hour.lunar_day
+            and year.lunar_text is month.lunar_text is day.lunar_text is hour.lunar_text is None):
+        flat["lunar"] = lunar_day
+    else:
+        flat["lunar"] = [year.lunar_date, month.lunar_date, day.lunar_date, hour.lunar_date]
+    return flat
+
+
+def _chart_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """扁平结构还原为命盘的字段；各柱直接引用共用的 GANZHI_LIST"""
+    birth_info = data["birth_info"]
+    if isinstance(birth_info, list):
+        birth_info = dict(zip(BIRTH_INFO_FIELDS, birth_info))
+
+    if "solar_dates" not in data:
+        solar_dates = [datetime.fromisoformat(birth_info["solar_date"])] * 4
+    elif isinstance(data["solar_dates"], list):
+        solar_dates = [_parse_datetime(value) for value in data["solar_dates"]]
+    else:
+        solar_dates = [_parse_datetime(data["solar_dates"])] * 4
+
+    lunar = data["lunar"]
+    if isinstance(lunar, list):
+        lunar_days, lunar_texts = [None] * 4, lunar
+    else:
+        lunar_days, lunar_texts = [lunar] * 4, [None] * 4
+
+    pillars = data["pillars"]
+    if len(pillars) != 4 or not all(type(index) is int and 0 <= index < 60 for index in pillars):
+        raise ValueError(f"四柱序号无效: {pillars}")
+
+    fields = {
+        field: {
+            "gan_zhi": GANZHI_LIST[index], "pillar_type": pillar_type, "solar_date": solar_date,
+            "lunar_day": lunar_day, "lunar_date": lunar_text,
+        }
+        for field, index, pillar_type, solar_date, lunar_day, lunar_text
+        in zip(PILLAR_FIELDS, pillars, PILLAR_NAMES, solar_dates, lunar_days, lunar_texts)
+    }
+    fields["birth_info"] = birth_info
+    return fields
+
+
+def chart_from_flat(data: Dict[str, Any]) -> BaZiChart:
+    """由扁平结构还原命盘（整盘一次校验，GanZhi 实例原样沿用）"""
+    return BaZiChart.model_validate(_chart_fields(data))
+
+
+def result_to_flat(result: AnalysisResult) -> Dict[str, Any]:
+    """分析结果转换为扁平结构"""
+    strength = result.element_strength
+    return {
+        "version": FORMAT_VERSION,
+        "chart": chart_to_flat(result.chart),
+        "element_strength": [strength.wood, strength.fire, strength.earth, strength.metal, strength.water],
+        "pattern_mask": result.pattern_mask,
+        "ten_gods_analysis": result.ten_gods_analysis,
+        "special_patterns": result.special_patterns,
+        "interactions": result.interactions,
+        "monthly_analysis": result.monthly_analysis,
+        "time_analysis": result.time_analysis,
+        "general_fortune": result.general_fortune,
+        "recommendations": result.recommendations,
+    }
+
+
+def result_from_flat(data: Dict[str, Any]) -> AnalysisResult:
+    """由扁平结构还原分析结果（同 chart_from_flat，整个结果一次校验）"""
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"不支持的序列化版本: {data.get('version')}")
+
+    return AnalysisResult.model_validate({
+        "chart": _chart_fields(data["chart"]),
+        "element_strength": dict(zip(ELEMENT_FIELDS, data["element_strength"])),
+        "ten_gods_analysis": data["ten_gods_analysis"],
+        "special_patterns": data["special_patterns"],
+        "pattern_mask": data["pattern_mask"],
+        "interactions": data["interactions"],
+        "monthly_analysis": data["monthly_analysis"],
+        "time_analysis": data["time_analysis"],
+        "general_fortune": data["general_fortune"],
+        "recommendations": data["recommendations"],
+    })
+
+
+def dumps_chart(chart: BaZiChart) -> bytes:
+    """命盘序列化为紧凑JSON字节串（UTF-8）"""
+    return orjson.dumps(chart_to_flat(chart), option=DUMPS_OPTIONS)
+
+
+def loads_chart(data: bytes) -> BaZiChart:
+    return chart_from_flat(orjson.loads(data))
+
+
+def dumps_result(result: AnalysisResult) -> bytes:
+    """分析结果序列化为紧凑JSON字节串（UTF-8）"""
+    return orjson.dumps(result_to_flat(result), option=DUMPS_OPTIONS)
+
+
+def loads_result(data: bytes) -> AnalysisResult:
+    return result_from_flat(orjson.loads(data))
+
+
+def write_results(stream: BinaryIO, results: Iterable[AnalysisResult], batch_size: int = 1024) -> int:
+    """按JSON Lines逐条写入二进制流，每 batch_size 条合并写入一次，返回条数"""
+    count = 0
+    lines: List[bytes] = []
+    for result in results:
+        lines.append(dumps_result(result))
+        if len(lines) >= batch_size:
+            stream.write(b"\n".join(lines) + b"\n")
+            count += len(lines)
+            lines = []
+    if lines:
+        stream.write(b"\n".join(lines) + b"\n")
+        count += len(lines)
+    return count
+
+
+def read_results(stream: BinaryIO) -> Iterator[AnalysisResult]:
+    """逐条读取 write_results 写出的分析结果"""
+    for line in stream:
+        if line.strip():
+            yield loads_result(line)